@@ -0,0 +1,50 @@
+from rest_framework import status
+
+from accounts.async_api import async_api_view, reponse_json
+from .models import DPI
+from .serializers import DPIDetailSerializer
+from .permissions import IsPatient, IsPatientOrMedecin
+from .conditional import reponse_non_modifiee, ajouter_entetes_validation
+
+
+@async_api_view([IsPatientOrMedecin])
+async def consulter_dpi_async(request, nss):
+    """
+    Version asynchrone de consulter_dpi.
+    """
+    try:
+        version = await DPI.visibles.filter(nss=nss).values_list('nss', 'updated_at').afirst()
+    except ValueError:
+        version = None
+    if version is None:
+        return reponse_json({'detail': 'DPI non trouvé pour cet utilisateur.'}, status.HTTP_404_NOT_FOUND)
+    non_modifiee = reponse_non_modifiee(request, *version)
+    if non_modifiee is not None:
+        return non_modifiee
+
+    try:
+        dpi = await DPI.visibles.select_related('patient', 'medecin_traitant').aget(nss=nss)
+    except DPI.DoesNotExist:
+        return reponse_json({'detail': 'DPI non trouvé pour cet utilisateur.'}, status.HTTP_404_NOT_FOUND)
+    return ajouter_entetes_validation(reponse_json(DPIDetailSerializer(dpi).data), dpi.nss, dpi.updated_at)
+
+
+@async_api_view([IsPatient])
+async def consulter_dpi_patient_async(request):
+    """
+    Version asynchrone de consulter_dpi_patient.
+    """
+    version = await DPI.visibles.filter(patient_id=request.user.id).values_list('nss', 'updated_at').afirst()
+    if version is None:
+        return reponse_json({'detail': 'DPI non trouvé pour cet utilisateur.'}, status.HTTP_404_NOT_FOUND)
+    non_modifiee = reponse_non_modifiee(request, *version)
+    if non_modifiee is not None:
+        return non_modifiee
+
+    try:
+        dpi = await DPI.visibles.select_related('patient', 'medecin_traitant').aget(patient_id=request.user.id)
+    except DPI.DoesNotExist:
+        return reponse_json({'detail': 'DPI non trouvé pour cet utilisateur.'}, status.HTTP_404_NOT_FOUND)
+    response_data = DPIDetailSerializer(dpi).data
+    response_data['nom'] = dpi.patient.nom
+    return ajouter_entetes_validation(reponse_json(response_data), dpi.nss, dpi.updated_at)
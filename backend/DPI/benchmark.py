@@ -0,0 +1,275 @@
+"""
+Banc de charge de l'API : scénarios couvrant les endpoints, exécution par des clients
+concurrents (en processus ou contre un serveur HTTP) et rapport de latence, débit et
+nombre de requêtes SQL par endpoint.
+"""
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from accounts.tokens import RoleRefreshToken
+from backend.metrics import CompteurSQL
+from consultations.models import Consultation
+
+# Mot de passe des comptes créés par DPI.seed.generer_hopital
+MOT_DE_PASSE = 'benchmark'
+
+
+class Scenario:
+    """
+    Un endpoint à solliciter : `requete(i)` retourne (url, données) pour le i-ème appel,
+    pour que les appels successifs portent sur des patients différents.
+    `role` vaut None pour un appel anonyme.
+    """
+    __slots__ = ('nom', 'methode', 'role', 'requete')
+
+    def __init__(self, nom, methode, role, requete):
+        self.nom = nom
+        self.methode = methode
+        self.role = role
+        self.requete = requete
+
+
+def scenarios(hopital):
+    """
+    Scénarios de lecture de chaque application (synchrones et asynchrones),
+    plus quelques écritures courantes et la connexion.
+    """
+    nss = hopital['nss']
+    medecin = hopital['personnel']['medecin']
+    consultations = list(
+        Consultation.objects.filter(dpi__in=nss[:100]).order_by('id_consultation').values_list('id_consultation', flat=True)[:1000]
+    )
+
+    def patient(i):
+        return nss[i % len(nss)]
+
+    def url(nom, **kwargs):
+        return reverse(nom, kwargs=kwargs)
+
+    date_debut = '2020-01-01'
+    return [
+        # DPI
+        Scenario('consulter_dpi', 'GET', 'medecin', lambda i: (url('consulter_dpi', nss=patient(i)), {})),
+        Scenario('consulter_dpi_patient', 'GET', 'patient', lambda i: (url('consulter_dpi_patient'), {})),
+        Scenario('rechercher_dpi_par_nss', 'GET', 'infirmier', lambda i: (url('rechercher_dpi_par_nss', nss=patient(i)), {})),
+        Scenario('dossier_patient', 'GET', 'medecin', lambda i: (url('dossier_patient', nss=patient(i)), {})),
+        Scenario('exporter_dossier', 'GET', 'medecin',
+                 lambda i: (url('exporter_dossier', nss=patient(i)), {'type_export': 'ndjson'})),
+        # Comptes
+        Scenario('login', 'POST', None,
+                 lambda i: (url('login'), {'email': medecin.email, 'password': MOT_DE_PASSE})),
+        Scenario('get_user', 'GET', 'medecin', lambda i: (url('get_user', user_id=medecin.id), {})),
+        Scenario('get_medecins', 'GET', 'medecin', lambda i: (url('get_medecins'), {})),
+        # Consultations
+        Scenario('get_all_consultations', 'GET', 'medecin', lambda i: (url('get_all_consultations'), {})),
+        Scenario('get_consultation_by_id', 'GET', 'medecin',
+                 lambda i: (url('get_consultation_by_id', id_consultation=consultations[i % len(consultations)]), {})),
+        Scenario('getConsultationByPatient', 'GET', 'medecin',
+                 lambda i: (url('getConsultationByPatient', id_dpi=patient(i)), {})),
+        Scenario('create_consultation', 'POST', 'medecin',
+                 lambda i: (url('create_consultation'), {'dpi': patient(i), 'date': date.today().isoformat(),
+                                                         'resume': 'Consultation de charge'})),
+        # Soins
+        Scenario('get_soins_par_dpi', 'GET', 'infirmier', lambda i: (url('get_soins_par_dpi', dpi_id=patient(i)), {})),
+        Scenario('ajouter-soins', 'POST', 'infirmier',
+                 lambda i: (url('ajouter-soins'), {'dpi': patient(i), 'soins': 'Pansement', 'observations': 'RAS'})),
+        # Tournée de 30 patients en une requête
+        Scenario('ajouter-soins-lot', 'POST', 'infirmier',
+                 lambda i: (url('ajouter-soins-lot'), {'soins': [
+                     {'dpi': patient(i + j), 'soins': 'Pansement', 'observations': 'RAS'} for j in range(30)
+                 ]})),
+        # Bilans
+        Scenario('get_images_radiologiques', 'GET', 'medecin',
+                 lambda i: (url('get_images_radiologiques'), {'nss': patient(i), 'date': date_debut})),
+        Scenario('get_analyse_biologiques', 'GET', 'medecin',
+                 lambda i: (url('get_analyse_biologiques'), {'nss': patient(i), 'date': date_debut})),
+        Scenario('get_all_images_radiologiques', 'GET', 'radiologue',
+                 lambda i: (url('get_all_images_radiologiques'), {'statut': 'pas_terminé', 'limit': 100})),
+        Scenario('get_all_analyses_biologiques', 'GET', 'laborantin',
+                 lambda i: (url('get_all_analyses_biologiques'), {'statut': 'pas_terminé', 'limit': 100})),
+        Scenario('changements_images_radiologiques', 'GET', 'radiologue',
+                 lambda i: (url('changements_images_radiologiques'), {'limit': 100})),
+        Scenario('changements_analyses_biologiques', 'GET', 'laborantin',
+                 lambda i: (url('changements_analyses_biologiques'), {'limit': 100})),
+        # Ordonnances
+        Scenario('get_ordonnances', 'GET', 'medecin',
+                 lambda i: (url('get_ordonnances'), {'nss': patient(i), 'date': date_debut})),
+        # Variantes asynchrones
+        Scenario('consulter_dpi_async', 'GET', 'medecin', lambda i: (url('consulter_dpi_async', nss=patient(i)), {})),
+        Scenario('get_soins_par_dpi_async', 'GET', 'infirmier',
+                 lambda i: (url('get_soins_par_dpi_async', dpi_id=patient(i)), {})),
+        Scenario('get_images_radiologiques_async', 'GET', 'medecin',
+                 lambda i: (url('get_images_radiologiques_async'), {'nss': patient(i), 'date': date_debut})),
+        Scenario('get_ordonnances_async', 'GET', 'medecin',
+                 lambda i: (url('get_ordonnances_async'), {'nss': patient(i), 'date': date_debut})),
+    ]
+
+
+def jetons(hopital):
+    """
+    Jeton d'accès JWT de chaque rôle du personnel, et d'un patient synthétique.
+    """
+    comptes = dict(hopital['personnel'])
+    comptes['patient'] = get_user_model().objects.get(dpi_as_patient=hopital['nss'][0])
+    return {role: str(RoleRefreshToken.for_user(compte).access_token) for role, compte in comptes.items()}
+
+
+class ClientInterne:
+    """
+    Appelle l'application dans le processus courant (pile WSGI complète, middlewares
+    compris) et compte les requêtes SQL de chaque appel.
+    """
+
+    def __init__(self):
+        self.client = Client(SERVER_NAME='localhost', raise_request_exception=False)
+
+    def envoyer(self, methode, url, donnees, jeton):
+        entetes = {'HTTP_AUTHORIZATION': f'Bearer {jeton}'} if jeton else {}
+        compteur = CompteurSQL()
+        with ExitStack() as stack:
+            for connexion in connections.all():
+                stack.enter_context(connexion.execute_wrapper(compteur))
+            if methode == 'GET':
+                response = self.client.get(url, donnees, **entetes)
+            else:
+                response = self.client.generic(methode, url, json.dumps(donnees), 'application/json', **entetes)
+            # Le contenu d'une réponse en streaming est produit (et lu en base) pendant sa lecture
+            taille = sum(map(len, response.streaming_content)) if response.streaming else len(response.content)
+        return response.status_code, taille, compteur.requetes
+
+    def fermer(self):
+        connections.close_all()
+
+
+class ClientHTTP:
+    """
+    Appelle un serveur déjà démarré à l'adresse `base_url`, qui doit utiliser la même base
+    de données et la même SECRET_KEY. Le nombre de requêtes SQL n'est pas mesuré.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def envoyer(self, methode, url, donnees, jeton):
+        entetes = {'Authorization': f'Bearer {jeton}'} if jeton else {}
+        corps = None
+        if methode == 'GET':
+            if donnees:
+                url = f'{url}?{urllib.parse.urlencode(donnees)}'
+        else:
+            corps = json.dumps(donnees).encode()
+            entetes['Content-Type'] = 'application/json'
+        requete = urllib.request.Request(self.base_url + url, data=corps, headers=entetes, method=methode)
+        try:
+            with urllib.request.urlopen(requete, timeout=self.timeout) as response:
+                return response.status, len(response.read()), None
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read()), None
+
+    def fermer(self):
+        pass
+
+
+def percentile(valeurs_triees, p):
+    """
+    Percentile `p` (0-100) par la méthode du rang le plus proche.
+    """
+    if not valeurs_triees:
+        return None
+    rang = max(1, -(-len(valeurs_triees) * p // 100))
+    return valeurs_triees[int(rang) - 1]
+
+
+def mesurer(scenario, fabrique_client, jetons_roles, nb_requetes, concurrence, echauffement=0):
+    """
+    Envoie `nb_requetes` appels du scénario répartis entre `concurrence` clients
+    simultanés (chacun dans son thread, avec sa propre connexion à la base) après
+    `echauffement` appels non mesurés. Retourne le résumé de l'endpoint.
+    """
+    jeton = jetons_roles.get(scenario.role)
+
+    def client_de_charge(indices, dans_un_thread=True):
+        client = fabrique_client()
+        mesures = []
+        try:
+            for i in indices:
+                url, donnees = scenario.requete(i)
+                debut = time.perf_counter()
+                statut, taille, requetes_sql = client.envoyer(scenario.methode, url, donnees, jeton)
+                mesures.append((time.perf_counter() - debut, statut, taille, requetes_sql))
+        finally:
+            if dans_un_thread:
+                client.fermer()
+        return mesures
+
+    client_de_charge(range(nb_requetes, nb_requetes + echauffement), dans_un_thread=False)
+
+    debut = time.perf_counter()
+    if concurrence <= 1:
+        mesures = client_de_charge(range(nb_requetes), dans_un_thread=False)
+    else:
+        with ThreadPoolExecutor(concurrence) as executor:
+            parts = executor.map(client_de_charge, [range(k, nb_requetes, concurrence) for k in range(concurrence)])
+            mesures = [mesure for part in parts for mesure in part]
+    duree = time.perf_counter() - debut
+
+    return resumer(scenario, mesures, duree)
+
+
+def resumer(scenario, mesures, duree):
+    latences = sorted(mesure[0] * 1000 for mesure in mesures)
+    statuts = Counter(mesure[1] for mesure in mesures)
+    requetes_sql = [mesure[3] for mesure in mesures if mesure[3] is not None]
+    return {
+        'endpoint': scenario.nom,
+        'methode': scenario.methode,
+        'role': scenario.role,
+        'requetes': len(mesures),
+        'erreurs': sum(compte for statut, compte in statuts.items() if statut >= 400),
+        'statuts': {str(statut): compte for statut, compte in sorted(statuts.items())},
+        'duree_s': round(duree, 3),
+        'debit_rps': round(len(mesures) / duree, 1) if duree else None,
+        'latence_moyenne_ms': round(sum(latences) / len(latences), 2) if latences else None,
+        'latence_p50_ms': arrondir(percentile(latences, 50)),
+        'latence_p95_ms': arrondir(percentile(latences, 95)),
+        'latence_p99_ms': arrondir(percentile(latences, 99)),
+        'latence_max_ms': arrondir(latences[-1] if latences else None),
+        'requetes_sql_moyenne': round(sum(requetes_sql) / len(requetes_sql), 1) if requetes_sql else None,
+        'requetes_sql_max': max(requetes_sql) if requetes_sql else None,
+        'octets_moyenne': round(sum(mesure[2] for mesure in mesures) / len(mesures)) if mesures else None,
+    }
+
+
+def arrondir(valeur):
+    return None if valeur is None else round(valeur, 2)
+
+
+def comparer(rapport, reference):
+    """
+    Variation (en %) du p95 et du débit de chaque endpoint par rapport à un rapport de référence.
+    """
+    precedents = {resultat['endpoint']: resultat for resultat in reference.get('endpoints', [])}
+    variations = {}
+    for resultat in rapport['endpoints']:
+        precedent = precedents.get(resultat['endpoint'])
+        if not precedent:
+            continue
+        variations[resultat['endpoint']] = {
+            cle: round((resultat[cle] - precedent[cle]) / precedent[cle] * 100, 1)
+            if resultat.get(cle) is not None and precedent.get(cle) else None
+            for cle in ('latence_p95_ms', 'debit_rps')
+        }
+    return variations
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def etag_dpi(nss, updated_at):
+    """
+    ETag fort d'un DPI : le NSS et la date de dernière modification à la microseconde.
+    """
+    return f'"{nss}-{(updated_at - EPOCH) // timedelta(microseconds=1)}"'
+
+
+def ajouter_entetes_validation(response, nss, updated_at):
+    """
+    Ajoute ETag et Last-Modified à la réponse. Cache-Control impose au client
+    de revalider (données médicales : cache privé uniquement).
+    """
+    response['ETag'] = etag_dpi(nss, updated_at)
+    response['Last-Modified'] = http_date(updated_at.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def reponse_non_modifiee(request, nss, updated_at):
+    """
+    Évalue If-None-Match / If-Modified-Since à partir de la seule version du DPI.
+    Retourne une réponse 304 (ou 412) si la copie du client est à jour, sinon None.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag_dpi(nss, updated_at),
+        last_modified=int(updated_at.timestamp()),
+    )
+    if response is not None:
+        ajouter_entetes_validation(response, nss, updated_at)
+    return response
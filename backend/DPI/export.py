@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+import zipfile
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import DPI
+from .serializers import DPIDetailSerializer
+from consultations.models import Consultation
+from consultations.serializers import ConsultationSerializer
+from soins.models import Soin
+from soins.serializers import SoinSerializer
+from ordonnance.models import Ordonnance
+from ordonnance.serializers import OrdonnanceDetailSerializer
+from medicaments.models import Medicament
+from bilans.models import AnalyseBiologique, ImageRadiologique, ParametreAnalyse
+from bilans.serializers import ImageRadiologiqueSerializer, AnalyseBiologiqueSerializer
+from bilans.querysets import optimiser_queryset
+from bilans.pagination import lots_par_curseur
+
+# Nombre de lignes lues en base (et sérialisées) à la fois
+EXPORT_CHUNK_SIZE = 500
+
+
+def sections_ndjson(nss):
+    """
+    (section, queryset, serializer) du dossier d'un patient, dans l'ordre de l'export NDJSON.
+    Chaque section est exportée par ordre de clé primaire (voir `lots`) ; les relations lues
+    par les serializers sont chargées par lot (select/prefetch_related).
+    """
+    return [
+        ('dpi', DPI.visibles.filter(nss=nss).select_related('patient', 'medecin_traitant'), DPIDetailSerializer),
+        ('consultations', Consultation.visibles.filter(dpi=nss), ConsultationSerializer),
+        ('ordonnances', Ordonnance.visibles.filter(consultation__dpi=nss).select_related('consultation__medecin')
+            .prefetch_related('medicaments'), OrdonnanceDetailSerializer),
+        ('soins', Soin.objects.filter(dpi=nss), SoinSerializer),
+        ('analyses_biologiques', optimiser_queryset(AnalyseBiologique.visibles.filter(consultation__dpi=nss), AnalyseBiologiqueSerializer),
+            AnalyseBiologiqueSerializer),
+        ('images_radiologiques', optimiser_queryset(ImageRadiologique.visibles.filter(consultation__dpi=nss), ImageRadiologiqueSerializer),
+            ImageRadiologiqueSerializer),
+    ]
+
+
+def tables_csv(nss):
+    """
+    (fichier, queryset) de chaque table du dossier pour l'export ZIP : une table par modèle,
+    avec ses colonnes en base, reliées par leurs identifiants, par ordre de clé primaire.
+    """
+    return [
+        ('dpi.csv', DPI.visibles.filter(nss=nss)),
+        ('consultations.csv', Consultation.visibles.filter(dpi=nss)),
+        ('ordonnances.csv', Ordonnance.visibles.filter(consultation__dpi=nss)),
+        ('medicaments.csv', Medicament.objects.filter(ordonnance__consultation__dpi=nss, ordonnance__consultation__supprime_le__isnull=True)),
+        ('soins.csv', Soin.objects.filter(dpi=nss)),
+        ('analyses_biologiques.csv', AnalyseBiologique.visibles.filter(consultation__dpi=nss)),
+        ('parametres_analyses.csv', ParametreAnalyse.objects.filter(analyse__consultation__dpi=nss, analyse__consultation__supprime_le__isnull=True)),
+        ('images_radiologiques.csv', ImageRadiologique.visibles.filter(consultation__dpi=nss)),
+    ]
+
+
+def lots(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Génère les objets du queryset par listes d'au plus `chunk_size`, par ordre de clé
+    primaire, avec une requête keyset par lot : seul le lot courant est en mémoire.
+    """
+    return lots_par_curseur(queryset, 'pk', chunk_size)
+
+
+def generer_ndjson(nss, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Une ligne JSON par enregistrement : {"section": ..., "data": {...}}.
+    """
+    for section, queryset, serializer_class in sections_ndjson(nss):
+        for lot in lots(queryset, chunk_size):
+            yield ''.join(
+                json.dumps({'section': section, 'data': data}, cls=JSONEncoder, ensure_ascii=False) + '\n'
+                for data in serializer_class(lot, many=True).data
+            )
+
+
+class TamponZip(io.RawIOBase):
+    """
+    Destination non positionnable de ZipFile : conserve les octets écrits jusqu'à ce
+    que le générateur les récupère avec `vider()`.
+    """
+
+    def __init__(self):
+        self.morceaux = []
+
+    def writable(self):
+        return True
+
+    def write(self, donnees):
+        self.morceaux.append(bytes(donnees))
+        return len(donnees)
+
+    def vider(self):
+        donnees = b''.join(self.morceaux)
+        self.morceaux.clear()
+        return donnees
+
+
+def generer_zip_csv(nss, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Archive ZIP d'un fichier CSV par table, produite au fil de la lecture :
+    chaque lot de lignes est compressé puis envoyé avant de lire le suivant.
+    """
+    tampon = TamponZip()
+    with zipfile.ZipFile(tampon, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for nom_fichier, queryset in tables_csv(nss):
+            # Sans la marque de suppression interne (backend.suppression)
+            colonnes = [field.attname for field in queryset.model._meta.concrete_fields if field.name != 'supprime_le']
+            with archive.open(nom_fichier, 'w', force_zip64=True) as entree:
+                texte = io.TextIOWrapper(entree, encoding='utf-8', newline='', write_through=True)
+                writer = csv.writer(texte)
+                writer.writerow(colonnes)
+                for lot in lots(queryset, chunk_size):
+                    writer.writerows([getattr(objet, colonne) for colonne in colonnes] for objet in lot)
+                    if donnees := tampon.vider():
+                        yield donnees
+                texte.detach()
+    # Fin de la dernière entrée et répertoire central de l'archive
+    yield tampon.vider()
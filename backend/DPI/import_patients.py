@@ -0,0 +1,186 @@
+import csv
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+
+from accounts.annuaire import id_medecin_par_nom
+from .models import DPI
+from .serializers import PatientImportSerializer
+
+BATCH_SIZE = 1000
+FORMATS = ('csv', 'ndjson')
+
+
+def detecter_format(nom_fichier):
+    """
+    Format d'après l'extension : .ndjson / .jsonl pour du JSON ligne par ligne, CSV sinon.
+    """
+    return 'ndjson' if nom_fichier.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def lire_lignes(fichier, format_fichier):
+    """
+    Lit un fichier texte ligne par ligne (sans le charger en mémoire) et génère
+    des couples (numéro de ligne, données). Les données valent None si la ligne
+    NDJSON n'est pas un objet JSON valide. En CSV, la ligne 1 est l'en-tête.
+    """
+    if format_fichier == 'csv':
+        for numero, ligne in enumerate(csv.DictReader(fichier), start=2):
+            yield numero, ligne
+        return
+
+    for numero, ligne in enumerate(fichier, start=1):
+        if not ligne.strip():
+            continue
+        try:
+            donnees = json.loads(ligne)
+        except ValueError:
+            donnees = None
+        yield numero, donnees if isinstance(donnees, dict) else None
+
+
+class HacheurMotsDePasse:
+    """
+    Hache les mots de passe d'un lot en parallèle dans un pool de `workers` processus
+    (PBKDF2 est coûteux en CPU et le GIL empêche de paralléliser avec des threads).
+    Avec un seul worker, le hachage a lieu dans le processus courant.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=django.setup)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor:
+            self.executor.shutdown()
+
+    def hacher(self, mots_de_passe):
+        if not self.executor:
+            return [make_password(mot_de_passe) for mot_de_passe in mots_de_passe]
+        chunksize = max(1, math.ceil(len(mots_de_passe) / (self.workers * 4)))
+        return list(self.executor.map(make_password, mots_de_passe, chunksize=chunksize))
+
+
+def importer_patients(lignes, batch_size=BATCH_SIZE, workers=None):
+    """
+    Crée un compte patient et un DPI pour chaque ligne valide de `lignes`
+    (couples (numéro, données) produits par `lire_lignes`), par lots de `batch_size`.
+
+    Une ligne invalide ou en conflit (NSS ou email déjà utilisé, médecin inconnu) est
+    signalée dans le rapport sans empêcher l'import des autres lignes.
+    Sans `workers`, les mots de passe sont hachés par un pool d'un processus par CPU :
+    réservé à la commande importer_patients, l'API passe workers=1.
+    Retourne le rapport : lignes lues, patients créés, erreurs par ligne et débit.
+    """
+    workers = workers or os.cpu_count() or 1
+    rapport = {'lignes': 0, 'crees': 0, 'erreurs': []}
+    debut = time.perf_counter()
+
+    with HacheurMotsDePasse(workers) as hacheur:
+        lignes = iter(lignes)
+        while lot := list(islice(lignes, batch_size)):
+            rapport['lignes'] += len(lot)
+            rapport['crees'] += importer_lot(lot, hacheur, rapport['erreurs'])
+
+    duree = time.perf_counter() - debut
+    rapport['erreurs'].sort(key=lambda erreur: erreur['ligne'])
+    rapport['duree_s'] = round(duree, 3)
+    rapport['lignes_par_seconde'] = round(rapport['lignes'] / duree, 1) if duree else None
+    return rapport
+
+
+def importer_lot(lot, hacheur, erreurs):
+    """
+    Valide un lot, écarte les doublons (deux requêtes pour tout le lot), hache les mots
+    de passe puis insère comptes et DPI en masse. Retourne le nombre de patients créés.
+    """
+    User = get_user_model()
+
+    valides = []
+    for numero, donnees in lot:
+        if donnees is None:
+            erreurs.append({'ligne': numero, 'erreurs': {'detail': ['Ligne JSON invalide.']}})
+            continue
+        serializer = PatientImportSerializer(data=donnees)
+        if not serializer.is_valid():
+            erreurs.append({'ligne': numero, 'nss': donnees.get('nss'), 'erreurs': serializer.errors})
+            continue
+        donnees = dict(serializer.validated_data)
+        donnees['patient_email'] = User.objects.normalize_email(donnees['patient_email'])
+        valides.append((numero, donnees))
+
+    nss_pris = set(DPI.objects.filter(nss__in=[d['nss'] for _, d in valides]).values_list('nss', flat=True))  # Y compris les DPI en attente de purge
+    emails_pris = set(User.objects.filter(email__in=[d['patient_email'] for _, d in valides]).values_list('email', flat=True))
+
+    a_creer = []
+    for numero, donnees in valides:
+        medecin_nom = donnees.get('medecin_traitant')
+        donnees['medecin_traitant_id'] = id_medecin_par_nom(medecin_nom) if medecin_nom else None
+        if donnees['nss'] in nss_pris:
+            detail = f"Le numéro de sécurité sociale '{donnees['nss']}' existe déjà."
+        elif donnees['patient_email'] in emails_pris:
+            detail = f"L'adresse email '{donnees['patient_email']}' existe déjà."
+        elif medecin_nom and not donnees['medecin_traitant_id']:
+            detail = f"Le médecin '{medecin_nom}' n'existe pas ou n'est pas valide."
+        else:
+            nss_pris.add(donnees['nss'])
+            emails_pris.add(donnees['patient_email'])
+            a_creer.append((numero, donnees))
+            continue
+        erreurs.append({'ligne': numero, 'nss': donnees['nss'], 'erreurs': {'detail': [detail]}})
+
+    mots_de_passe = hacheur.hacher([donnees['patient_password'] for _, donnees in a_creer])
+    for (_, donnees), mot_de_passe in zip(a_creer, mots_de_passe):
+        donnees['patient_password'] = mot_de_passe
+
+    try:
+        with transaction.atomic():
+            inserer_patients([donnees for _, donnees in a_creer])
+        return len(a_creer)
+    except IntegrityError:
+        # Conflit avec une écriture concurrente : on reprend ligne par ligne pour isoler les lignes fautives
+        crees = 0
+        for numero, donnees in a_creer:
+            try:
+                with transaction.atomic():
+                    inserer_patients([donnees])
+                crees += 1
+            except IntegrityError as e:
+                erreurs.append({'ligne': numero, 'nss': donnees['nss'], 'erreurs': {'detail': [str(e)]}})
+        return crees
+
+
+def inserer_patients(patients):
+    """
+    Insère en masse les comptes patients (mots de passe déjà hachés) puis leurs DPI.
+    """
+    User = get_user_model()
+    utilisateurs = User.objects.bulk_create([
+        User(email=p['patient_email'], nom=p['patient_nom'], role='patient', specialite='other', password=p['patient_password'])
+        for p in patients
+    ], batch_size=BATCH_SIZE)
+    if any(utilisateur.pk is None for utilisateur in utilisateurs):
+        # MySQL ne renvoie pas les clés primaires après bulk_create
+        ids = dict(User.objects.filter(email__in=[u.email for u in utilisateurs]).values_list('email', 'id'))
+        for utilisateur in utilisateurs:
+            utilisateur.pk = ids[utilisateur.email]
+
+    DPI.objects.bulk_create([
+        DPI(nss=p['nss'], date_naissance=p['date_naissance'], telephone=p['telephone'], adresse=p['adresse'],
+            mutuelle=p['mutuelle'], personne_contact=p.get('personne_contact') or None, sexe=p['sexe'],
+            patient=utilisateur, medecin_traitant_id=p['medecin_traitant_id'])
+        for p, utilisateur in zip(patients, utilisateurs)
+    ], batch_size=BATCH_SIZE)
@@ -0,0 +1,109 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from DPI.benchmark import ClientHTTP, ClientInterne, comparer, jetons, mesurer, scenarios
+from DPI.seed import generer_hopital, supprimer_hopital
+
+PREFIXE = 'benchapi'
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée un hôpital synthétique puis sollicite chaque endpoint de l'API avec des clients "
+        "concurrents et écrit un rapport JSON (latences p50/p95/p99, débit, requêtes SQL). "
+        "Comparer deux versions en lançant la commande sur chacune avec --reference."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=100, help="Nombre de patients à créer")
+        parser.add_argument('--consultations', type=int, default=20, help="Nombre de consultations par patient")
+        parser.add_argument('--requetes', type=int, default=200, help="Nombre d'appels mesurés par endpoint")
+        parser.add_argument('--concurrence', type=int, default=8, help="Nombre de clients simultanés")
+        parser.add_argument('--echauffement', type=int, default=5, help="Appels non mesurés avant chaque endpoint")
+        parser.add_argument('--endpoints', help="Noms d'endpoints à mesurer, séparés par des virgules (tous par défaut)")
+        parser.add_argument('--url', help="Adresse d'un serveur démarré sur la même base (appel en processus par défaut)")
+        parser.add_argument('--seed', type=int, default=0, help="Graine des données synthétiques")
+        parser.add_argument('--etiquette', default='', help="Libellé de la version mesurée, recopié dans le rapport")
+        parser.add_argument('--output', help="Fichier JSON où écrire le rapport")
+        parser.add_argument('--reference', help="Rapport JSON d'une version précédente à comparer")
+        parser.add_argument('--keep', action='store_true', help="Conserver les données créées (supprimées par défaut)")
+
+    def handle(self, *args, **options):
+        if options['requetes'] < 1 or options['concurrence'] < 1:
+            raise CommandError("--requetes et --concurrence doivent être strictement positifs.")
+
+        # Les données sont validées en base : les clients concurrents utilisent chacun leur connexion
+        self.stdout.write(f"Création de {options['patients']} patients x {options['consultations']} consultations...")
+        debut = time.perf_counter()
+        hopital = generer_hopital(options['patients'], options['consultations'], seed=options['seed'], prefixe=PREFIXE)
+        duree_creation = time.perf_counter() - debut
+        self.stdout.write(f"Données créées en {duree_creation:.1f} s")
+
+        try:
+            rapport = self.executer(hopital, options)
+        finally:
+            if not options['keep']:
+                supprimer_hopital(PREFIXE)
+        rapport['creation_s'] = round(duree_creation, 3)
+
+        for resultat in rapport['endpoints']:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{resultat['methode']} {resultat['endpoint']}"))
+            self.stdout.write(
+                f"  p50: {resultat['latence_p50_ms']:.2f} ms  p95: {resultat['latence_p95_ms']:.2f} ms  "
+                f"p99: {resultat['latence_p99_ms']:.2f} ms  débit: {resultat['debit_rps']} req/s  "
+                f"SQL: {resultat['requetes_sql_moyenne']}  erreurs: {resultat['erreurs']}"
+            )
+            if resultat['erreurs']:
+                self.stderr.write(f"{resultat['endpoint']}: réponses {resultat['statuts']}")
+
+        if options['reference']:
+            with open(options['reference'], encoding='utf-8') as fichier:
+                rapport['comparaison'] = comparer(rapport, json.load(fichier))
+            for endpoint, variation in rapport['comparaison'].items():
+                self.stdout.write(f"  {endpoint}: p95 {variation['latence_p95_ms']} %  débit {variation['debit_rps']} %")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fichier:
+                json.dump(rapport, fichier, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['output']}"))
+
+    def executer(self, hopital, options):
+        a_mesurer = scenarios(hopital)
+        if options['endpoints']:
+            noms = set(options['endpoints'].split(','))
+            inconnus = noms - {scenario.nom for scenario in a_mesurer}
+            if inconnus:
+                raise CommandError(f"Endpoints inconnus : {', '.join(sorted(inconnus))}")
+            a_mesurer = [scenario for scenario in a_mesurer if scenario.nom in noms]
+
+        if options['url']:
+            fabrique_client = lambda: ClientHTTP(options['url'])
+        else:
+            fabrique_client = ClientInterne
+        jetons_roles = jetons(hopital)
+
+        debut = time.perf_counter()
+        resultats = []
+        for scenario in a_mesurer:
+            self.stdout.write(f"Mesure de {scenario.nom}...")
+            resultats.append(mesurer(scenario, fabrique_client, jetons_roles, options['requetes'],
+                                     options['concurrence'], options['echauffement']))
+        duree = time.perf_counter() - debut
+
+        total = sum(resultat['requetes'] for resultat in resultats)
+        return {
+            'etiquette': options['etiquette'],
+            'vendor': connection.vendor,
+            'transport': options['url'] or 'interne',
+            'options': {k: options[k] for k in ('patients', 'consultations', 'requetes', 'concurrence', 'echauffement', 'seed')},
+            'total': {
+                'requetes': total,
+                'erreurs': sum(resultat['erreurs'] for resultat in resultats),
+                'duree_s': round(duree, 3),
+                'debit_rps': round(total / duree, 1) if duree else None,
+            },
+            'endpoints': resultats,
+        }
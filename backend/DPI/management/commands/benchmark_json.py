@@ -0,0 +1,111 @@
+import io
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from backend.parsers import RapideJSONParser
+from backend.renderers import RapideJSONRenderer, orjson
+from DPI.seed import generer_hopital
+from bilans.models import AnalyseBiologique, ImageRadiologique
+from bilans.querysets import optimiser_queryset
+from bilans.serializers import AnalyseBiologiqueSerializer, ImageRadiologiqueSerializer
+from consultations.models import Consultation
+from consultations.serializers import ConsultationDetailSerializer
+from ordonnance.models import Ordonnance
+from ordonnance.serializers import OrdonnanceDetailSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le rendu et la lecture JSON de DRF (json standard) et de RapideJSONRenderer / "
+        "RapideJSONParser (orjson) sur les réponses les plus volumineuses de l'API, "
+        "produites par les serializers réels à partir de données synthétiques."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=50, help="Nombre de patients à créer")
+        parser.add_argument('--consultations', type=int, default=200, help="Nombre de consultations par patient")
+        parser.add_argument('--repetitions', type=int, default=20, help="Nombre de mesures par réponse")
+        parser.add_argument('--output', help="Fichier JSON où écrire le rapport")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write("orjson n'est pas installé : RapideJSONRenderer utilise le rendu standard de DRF.")
+
+        with transaction.atomic():
+            hopital = generer_hopital(options['patients'], options['consultations'])
+            reponses = self.reponses(hopital['nss'][0])
+            transaction.set_rollback(True)
+
+        rapport = [self.mesurer(nom, donnees, options['repetitions']) for nom, donnees in reponses]
+
+        for resultat in rapport:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{resultat['reponse']} ({resultat['octets']} octets)"))
+            self.stdout.write(
+                f"  rendu: {resultat['rendu_standard_ms']:.2f} ms -> {resultat['rendu_rapide_ms']:.2f} ms "
+                f"(x{resultat['acceleration_rendu']})  lecture: {resultat['lecture_standard_ms']:.2f} ms -> "
+                f"{resultat['lecture_rapide_ms']:.2f} ms (x{resultat['acceleration_lecture']})"
+            )
+            if not resultat['identique']:
+                self.stderr.write(f"{resultat['reponse']}: les deux rendus ne décrivent pas les mêmes données")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fichier:
+                json.dump({'orjson': orjson.__version__ if orjson else None,
+                           'options': {k: options[k] for k in ('patients', 'consultations', 'repetitions')},
+                           'reponses': rapport}, fichier, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['output']}"))
+
+    def reponses(self, nss):
+        """
+        (nom, données sérialisées) des réponses mesurées, construites comme dans les vues.
+        """
+        analyses = optimiser_queryset(AnalyseBiologique.objects.order_by('id_analyse_biologique'), AnalyseBiologiqueSerializer)
+        images = optimiser_queryset(ImageRadiologique.objects.order_by('id_image_radiologique'), ImageRadiologiqueSerializer)
+        consultations = (
+            Consultation.objects.filter(dpi_id=nss).select_related('medecin', 'dpi')
+            .prefetch_related('analyses_biologiques', 'images_radiologiques').order_by('date', 'id_consultation')
+        )
+        ordonnances = (
+            Ordonnance.objects.filter(consultation__dpi=nss).select_related('consultation__medecin')
+            .prefetch_related('medicaments')
+        )
+        return [
+            ('analyses_biologiques_all', AnalyseBiologiqueSerializer(analyses, many=True).data),
+            ('images_radiologiques_all', ImageRadiologiqueSerializer(images, many=True).data),
+            ('historique_consultations', ConsultationDetailSerializer(consultations, many=True).data),
+            ('ordonnances', OrdonnanceDetailSerializer(ordonnances, many=True).data),
+        ]
+
+    def mesurer(self, nom, donnees, repetitions):
+        standard = JSONRenderer().render(donnees)
+        rapide = RapideJSONRenderer().render(donnees)
+        resultat = {
+            'reponse': nom,
+            'octets': len(standard),
+            'identique': json.loads(standard) == json.loads(rapide),
+            'rendu_standard_ms': mediane(lambda: JSONRenderer().render(donnees), repetitions),
+            'rendu_rapide_ms': mediane(lambda: RapideJSONRenderer().render(donnees), repetitions),
+            'lecture_standard_ms': mediane(lambda: JSONParser().parse(io.BytesIO(standard)), repetitions),
+            'lecture_rapide_ms': mediane(lambda: RapideJSONParser().parse(io.BytesIO(standard)), repetitions),
+        }
+        resultat['acceleration_rendu'] = round(resultat['rendu_standard_ms'] / resultat['rendu_rapide_ms'], 1)
+        resultat['acceleration_lecture'] = round(resultat['lecture_standard_ms'] / resultat['lecture_rapide_ms'], 1)
+        return resultat
+
+
+def mediane(fonction, repetitions):
+    """
+    Durée médiane (ms) de `repetitions` appels de `fonction`.
+    """
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return statistics.median(durees)
@@ -0,0 +1,104 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from DPI.seed import generer_hopital
+from consultations.models import Consultation
+from soins.models import Soin
+from ordonnance.models import Ordonnance
+from bilans.models import AnalyseBiologique, ImageRadiologique
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée un volume réaliste de données synthétiques puis mesure, pour chaque endpoint "
+        "de la chronologie patient, le nombre de requêtes SQL, la latence et le plan d'exécution. "
+        "Lancer la commande avant et après `migrate` pour comparer l'effet des index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=200, help="Nombre de patients à créer")
+        parser.add_argument('--consultations', type=int, default=50, help="Nombre de consultations par patient")
+        parser.add_argument('--repetitions', type=int, default=20, help="Nombre d'appels mesurés par endpoint")
+        parser.add_argument('--output', help="Fichier JSON où écrire le rapport")
+        parser.add_argument('--keep', action='store_true', help="Conserver les données créées (annulées par défaut)")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Création de {options['patients']} patients x {options['consultations']} consultations...")
+            debut = time.perf_counter()
+            hopital = generer_hopital(options['patients'], options['consultations'])
+            self.stdout.write(f"Données créées en {time.perf_counter() - debut:.1f} s")
+
+            rapport = [self.mesurer(endpoint, hopital, options['repetitions']) for endpoint in self.endpoints(hopital)]
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        for resultat in rapport:
+            self.stdout.write(self.style.MIGRATE_HEADING(resultat['endpoint']))
+            self.stdout.write(
+                f"  requêtes: {resultat['requetes']}  médiane: {resultat['latence_mediane_ms']:.2f} ms  "
+                f"p95: {resultat['latence_p95_ms']:.2f} ms"
+            )
+            self.stdout.write(f"  plan: {resultat['plan']}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fichier:
+                json.dump({'vendor': connection.vendor, 'options': {k: options[k] for k in ('patients', 'consultations', 'repetitions')},
+                           'endpoints': rapport}, fichier, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['output']}"))
+
+    def endpoints(self, hopital):
+        """
+        (nom de l'URL, kwargs, paramètres GET, rôle de l'appelant, requête principale à expliquer)
+        """
+        nss = hopital['nss'][len(hopital['nss']) // 2]
+        date = '2020-01-01'
+        return [
+            ('get_images_radiologiques', {}, {'nss': nss, 'date': date}, 'medecin',
+             ImageRadiologique.objects.filter(consultation__dpi=nss, consultation__date__gt=date)),
+            ('get_analyse_biologiques', {}, {'nss': nss, 'date': date}, 'medecin',
+             AnalyseBiologique.objects.filter(consultation__dpi=nss, consultation__date__gt=date)),
+            ('get_ordonnances', {}, {'nss': nss, 'date': date}, 'medecin',
+             Ordonnance.objects.filter(consultation__dpi=nss, consultation__date__gt=date)),
+            ('getConsultationByPatient', {'id_dpi': nss}, {}, 'medecin',
+             Consultation.objects.filter(dpi_id=nss)),
+            ('get_soins_par_dpi', {'dpi_id': nss}, {}, 'infirmier',
+             Soin.objects.filter(dpi=nss)),
+            ('get_all_images_radiologiques', {}, {'statut': 'pas_terminé', 'limit': 100}, 'radiologue',
+             ImageRadiologique.objects.filter(statut='pas_terminé').order_by('id_image_radiologique')[:101]),
+            ('get_all_analyses_biologiques', {}, {'statut': 'pas_terminé', 'limit': 100}, 'laborantin',
+             AnalyseBiologique.objects.filter(statut='pas_terminé').order_by('id_analyse_biologique')[:101]),
+        ]
+
+    def mesurer(self, endpoint, hopital, repetitions):
+        url_name, kwargs, params, role, requete = endpoint
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=hopital['personnel'][role])
+        url = reverse(url_name, kwargs=kwargs)
+
+        latences = []
+        for _ in range(repetitions):
+            with CaptureQueriesContext(connection) as ctx:
+                debut = time.perf_counter()
+                response = client.get(url, params)
+                latences.append((time.perf_counter() - debut) * 1000)
+        if response.status_code >= 400:
+            self.stderr.write(f"{url_name}: réponse HTTP {response.status_code}")
+
+        latences.sort()
+        return {
+            'endpoint': url_name,
+            'statut_http': response.status_code,
+            'requetes': len(ctx.captured_queries),
+            'latence_mediane_ms': statistics.median(latences),
+            'latence_p95_ms': latences[min(len(latences) - 1, int(len(latences) * 0.95))],
+            'plan': requete.explain(),
+        }
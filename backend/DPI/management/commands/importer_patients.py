@@ -0,0 +1,49 @@
+import io
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from DPI.import_patients import BATCH_SIZE, FORMATS, detecter_format, importer_patients, lire_lignes
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des patients (compte + DPI) depuis un fichier CSV ou NDJSON lu en continu. "
+        "Les mots de passe sont hachés en parallèle et les lignes en erreur sont listées "
+        "dans le rapport sans bloquer les autres."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Fichier CSV ou NDJSON ('-' pour l'entrée standard)")
+        parser.add_argument('--format', choices=FORMATS, help="Format du fichier (déduit de l'extension par défaut)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Nombre de lignes insérées par lot")
+        parser.add_argument('--workers', type=int, help="Processus de hachage des mots de passe (nombre de CPU par défaut)")
+        parser.add_argument('--rapport', help="Fichier JSON où écrire le rapport complet (erreurs comprises)")
+
+    def handle(self, *args, **options):
+        chemin = options['fichier']
+        format_fichier = options['format'] or ('csv' if chemin == '-' else detecter_format(chemin))
+
+        try:
+            fichier = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='') if chemin == '-' \
+                else open(chemin, encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f"Impossible d'ouvrir {chemin} : {e}")
+
+        with fichier:
+            rapport = importer_patients(lire_lignes(fichier, format_fichier), options['batch_size'], options['workers'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{rapport['crees']} patients créés sur {rapport['lignes']} lignes en {rapport['duree_s']:.1f} s "
+            f"({rapport['lignes_par_seconde']} lignes/s)"
+        ))
+        for erreur in rapport['erreurs'][:20]:
+            self.stderr.write(f"ligne {erreur['ligne']} : {json.dumps(erreur['erreurs'], ensure_ascii=False)}")
+        if len(rapport['erreurs']) > 20:
+            self.stderr.write(f"... {len(rapport['erreurs']) - 20} autres erreurs")
+
+        if options['rapport']:
+            with open(options['rapport'], 'w', encoding='utf-8') as sortie:
+                json.dump(rapport, sortie, ensure_ascii=False, indent=2, default=str)
+            self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['rapport']}"))
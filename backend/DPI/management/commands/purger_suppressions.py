@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.purge import etat_purge, purger
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge les DPI et consultations supprimés et toutes leurs dépendances par lots de DELETE "
+        "(à planifier par cron : les workers web ne purgent pas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--taille-lot', type=int, default=settings.PURGE_TAILLE_LOT, help="Lignes supprimées par DELETE")
+        parser.add_argument('--pause', type=float, default=settings.PURGE_PAUSE, help="Pause (secondes) entre deux lots")
+
+    def handle(self, *args, **options):
+        en_attente = etat_purge()['en_attente']
+        self.stdout.write(f"En attente : {en_attente['dpi']} DPI, {en_attente['consultations']} consultations")
+
+        supprimees = purger(options['taille_lot'], options['pause'], progression=self.progression)
+        if supprimees is None:
+            self.stdout.write("Une purge est déjà en cours : rien à faire.")
+            return
+
+        total = sum(supprimees.values())
+        self.stdout.write(self.style.SUCCESS(f"{total} lignes supprimées"))
+        for table, nombre in supprimees.items():
+            self.stdout.write(f"  {table}: {nombre}")
+
+    def progression(self, table, supprimees):
+        self.stdout.write(f"{table}: {supprimees} lignes supprimées", ending='\r')
+        self.stdout.flush()
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DPI', '0007_alter_dpi_medecin_traitant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dpi',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DPI', '0008_dpi_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dpi',
+            name='supprime_le',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
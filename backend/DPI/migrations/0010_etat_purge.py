@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DPI', '0009_suppression_differee'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EtatPurge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('en_cours', models.BooleanField(default=False)),
+                ('debut', models.DateTimeField(blank=True, null=True)),
+                ('fin', models.DateTimeField(blank=True, null=True)),
+                ('etape', models.CharField(blank=True, max_length=64, null=True)),
+                ('lots', models.PositiveIntegerField(default=0)),
+                ('lignes_supprimees', models.JSONField(default=dict)),
+                ('erreur', models.TextField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DPI', '0010_etat_purge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etatpurge',
+            name='mis_a_jour',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from backend.suppression import VisiblesManager
 
 class DPI(models.Model):
     SEXE_CHOICES = [
@@ -15,11 +16,37 @@ class DPI(models.Model):
     mutuelle = models.CharField(max_length=100)
     personne_contact = models.CharField(max_length=255, null=True, blank=True)
     sexe = models.CharField(max_length=1, choices=SEXE_CHOICES)
+    # Date de dernière modification du DPI (ou du nom du patient / médecin traitant), base de l'ETag
+    updated_at = models.DateTimeField(auto_now=True)
+    # Date de suppression : le DPI est masqué immédiatement, puis purgé par lots (backend.purge)
+    supprime_le = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
     
     # Relation 1:1 avec l'utilisateur ayant le rôle patient
     patient = models.OneToOneField(get_user_model(), on_delete=models.CASCADE, limit_choices_to={'role': 'patient'},related_name='dpi_as_patient')
     medecin_traitant = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, limit_choices_to={'role': 'medecin'},related_name='dpi_as_medecin_traitant',null=True, blank=True)
 
+    objects = models.Manager()  # Y compris ceux en attente de purge
+    visibles = VisiblesManager('supprime_le')  # DPI non supprimés, pour l'API
+
     def __str__(self):
         return f"DPI {self.nss}"
 
+
+
+class EtatPurge(models.Model):
+    """
+    Progression de la dernière purge des suppressions (backend.purge), en une seule ligne :
+    la purge tourne dans la commande purger_suppressions, l'API la lit ici. `en_cours` sert
+    aussi de verrou entre deux exécutions de la commande qui se chevauchent.
+    """
+    en_cours = models.BooleanField(default=False)
+    debut = models.DateTimeField(null=True, blank=True)
+    fin = models.DateTimeField(null=True, blank=True)
+    etape = models.CharField(max_length=64, null=True, blank=True)  # Table en cours de purge
+    lots = models.PositiveIntegerField(default=0)
+    lignes_supprimees = models.JSONField(default=dict)  # Par table
+    erreur = models.TextField(null=True, blank=True)
+    mis_a_jour = models.DateTimeField(null=True, blank=True)  # Dernière progression : une purge figée est abandonnée
+
+    def __str__(self):
+        return f"Purge du {self.debut}"
@@ -0,0 +1,114 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from .models import DPI
+from consultations.models import Consultation
+from soins.models import Soin
+from ordonnance.models import Ordonnance
+from medicaments.models import Medicament
+from bilans.models import AnalyseBiologique, ImageRadiologique, ParametreAnalyse
+
+BATCH_SIZE = 1000
+
+# Premier NSS utilisé pour les patients synthétiques (hors de la plage des NSS réels)
+NSS_DEPART = 900_000_000_000
+
+
+def generer_hopital(nb_patients=100, nb_consultations=20, seed=0, prefixe='bench'):
+    """
+    Crée un hôpital synthétique avec des insertions en masse (bulk_create) :
+    un médecin, un infirmier, un radiologue et un laborantin, puis pour chaque patient
+    un DPI, `nb_consultations` consultations étalées sur dix ans, avec soins, ordonnances,
+    médicaments, analyses biologiques (et leurs paramètres) et images radiologiques.
+
+    Les mots de passe sont hachés une seule fois et partagés par tous les comptes.
+    Retourne un dictionnaire contenant le personnel créé et la liste des NSS.
+    """
+    User = get_user_model()
+    rng = random.Random(seed)
+    mot_de_passe = make_password('benchmark')
+
+    personnel = {}
+    for role in ('medecin', 'infirmier', 'radiologue', 'laborantin'):
+        personnel[role], _ = User.objects.get_or_create(
+            email=f'{prefixe}-{role}@example.com',
+            defaults={'nom': f'{prefixe}-{role}', 'role': role, 'specialite': 'other', 'password': mot_de_passe},
+        )
+
+    # Patients et DPI
+    dernier_nss = DPI.objects.filter(nss__gte=NSS_DEPART).order_by('-nss').values_list('nss', flat=True).first()
+    premier_nss = (dernier_nss or NSS_DEPART) + 1
+    patients = User.objects.bulk_create([
+        User(email=f'{prefixe}-patient-{premier_nss + i}@example.com', nom=f'Patient {premier_nss + i}',
+             role='patient', specialite='other', password=mot_de_passe)
+        for i in range(nb_patients)
+    ], batch_size=BATCH_SIZE)
+    if any(patient.pk is None for patient in patients):
+        # MySQL ne renvoie pas les clés primaires après bulk_create
+        patients = list(User.objects.filter(email__startswith=f'{prefixe}-patient-').order_by('id'))[-nb_patients:]
+
+    dpis = DPI.objects.bulk_create([
+        DPI(nss=premier_nss + i, date_naissance=date(1940, 1, 1) + timedelta(days=rng.randrange(25000)),
+            telephone='0600000000', adresse='Adresse synthétique', mutuelle='Mutuelle',
+            sexe=rng.choice('MF'), patient=patient, medecin_traitant=personnel['medecin'])
+        for i, patient in enumerate(patients)
+    ], batch_size=BATCH_SIZE)
+
+    # Consultations étalées sur les dix dernières années
+    aujourd_hui = date.today()
+    Consultation.objects.bulk_create([
+        Consultation(dpi=dpi, medecin=personnel['medecin'], resume='Consultation synthétique',
+                     date=aujourd_hui - timedelta(days=rng.randrange(3650)))
+        for dpi in dpis for _ in range(nb_consultations)
+    ], batch_size=BATCH_SIZE)
+    consultations = list(
+        Consultation.objects.filter(dpi__nss__gte=premier_nss).only('id_consultation', 'dpi_id', 'date').order_by('id_consultation')
+    )
+
+    Soin.objects.bulk_create([
+        Soin(dpi_id=consultation.dpi_id, infirmier=personnel['infirmier'], date=consultation.date,
+             soins='Pansement', observations='RAS')
+        for consultation in consultations
+    ], batch_size=BATCH_SIZE)
+
+    Ordonnance.objects.bulk_create([
+        Ordonnance(consultation=consultation) for consultation in consultations
+    ], batch_size=BATCH_SIZE)
+    ordonnances = Ordonnance.objects.filter(consultation__dpi__nss__gte=premier_nss).only('id_ordonnance')
+    Medicament.objects.bulk_create([
+        Medicament(ordonnance=ordonnance, nom=nom, dose='500mg', duree=f'{jours} jours', duree_traitement=timedelta(days=jours))
+        for ordonnance in ordonnances.iterator(chunk_size=BATCH_SIZE)
+        for nom in rng.sample(['Paracétamol', 'Amoxicilline', 'Ibuprofène', 'Metformine'], 2)
+        for jours in [rng.randint(3, 30)]
+    ], batch_size=BATCH_SIZE)
+
+    statuts = ['terminé', 'pas_terminé']
+    AnalyseBiologique.objects.bulk_create([
+        AnalyseBiologique(consultation=consultation, type='Glycémie', statut=rng.choice(statuts),
+                          laborantin=personnel['laborantin'])
+        for consultation in consultations
+    ], batch_size=BATCH_SIZE)
+    analyses = AnalyseBiologique.objects.filter(consultation__dpi__nss__gte=premier_nss).only('id_analyse_biologique')
+    ParametreAnalyse.objects.bulk_create([
+        ParametreAnalyse(analyse=analyse, parametre='glycemie', valeur=round(rng.uniform(0.6, 2.0), 2))
+        for analyse in analyses.iterator(chunk_size=BATCH_SIZE)
+    ], batch_size=BATCH_SIZE)
+
+    ImageRadiologique.objects.bulk_create([
+        ImageRadiologique(consultation=consultation, type='Radio thorax', statut=rng.choice(statuts),
+                          radiologue=personnel['radiologue'])
+        for consultation in consultations
+    ], batch_size=BATCH_SIZE)
+
+    return {'personnel': personnel, 'nss': [dpi.nss for dpi in dpis]}
+
+
+def supprimer_hopital(prefixe='bench'):
+    """
+    Supprime les comptes créés par `generer_hopital` avec ce préfixe ; les DPI,
+    consultations, soins, ordonnances et bilans associés suivent par cascade.
+    """
+    return get_user_model().objects.filter(email__startswith=f'{prefixe}-').delete()
@@ -11,4 +11,22 @@ class DPIDetailSerializer(serializers.ModelSerializer):
     medecin_traitant = serializers.CharField(source='medecin_traitant.nom', read_only=True)
     class Meta:
         model = DPI
-        fields = ['nss', 'date_naissance', 'telephone', 'adresse', 'mutuelle', 'personne_contact', 'sexe', 'patient','medecin_traitant']
\ No newline at end of file
+        fields = ['nss', 'date_naissance', 'telephone', 'adresse', 'mutuelle', 'personne_contact', 'sexe', 'patient','medecin_traitant']
+
+class PatientImportSerializer(serializers.Serializer):
+    """
+    Une ligne du fichier d'import de patients : mêmes champs que la création d'un DPI
+    (creer_dpi). La validation ne fait aucune requête ; l'unicité du NSS et de l'email
+    est vérifiée par lot.
+    """
+    nss = serializers.IntegerField(min_value=1)
+    date_naissance = serializers.DateField()
+    telephone = serializers.CharField(max_length=15)
+    adresse = serializers.CharField(max_length=255)
+    mutuelle = serializers.CharField(max_length=100)
+    personne_contact = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    sexe = serializers.ChoiceField(choices=DPI.SEXE_CHOICES)
+    patient_nom = serializers.CharField(max_length=150)
+    patient_email = serializers.EmailField()
+    patient_password = serializers.CharField(max_length=128)
+    medecin_traitant = serializers.CharField(max_length=150, required=False, allow_blank=True, allow_null=True)
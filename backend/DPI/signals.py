@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import DPI
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def rafraichir_version_dpi(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Le nom du patient et celui du médecin traitant font partie du DPI renvoyé par
+    consulter_dpi : leur modification avance updated_at (et donc l'ETag) des DPI concernés.
+    """
+    if created or (update_fields is not None and 'nom' not in update_fields):
+        return
+    DPI.objects.filter(Q(patient=instance) | Q(medecin_traitant=instance)).update(updated_at=timezone.now())
@@ -1,10 +1,24 @@
+import io
+import json
+
 import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import Client
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 
 from .models import DPI
+from accounts.tokens import RoleRefreshToken
+from consultations.models import Consultation
+from ordonnance.models import Ordonnance
+from medicaments.models import Medicament
+from soins.models import Soin
+from bilans.models import AnalyseBiologique, ImageRadiologique, ParametreAnalyse
 
 User = get_user_model()
 
@@ -330,6 +344,27 @@ class TestModifierDPI:
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert "DPI non trouvé" in str(response.data["detail"])
 
+    @pytest.mark.parametrize("champ", ["nss", "patient"])
+    def test_modifier_dpi_unicite_avec_dpi_supprime(self, api_client, medecin_user, champ):
+        """
+        A DPI waiting for its purge keeps its NSS and patient: reusing them is a 400, not an IntegrityError.
+        """
+        dpis = [
+            DPI.objects.create(
+                nss=nss, date_naissance="1970-10-10", telephone="0707070707", adresse="A", mutuelle="M", sexe="M",
+                patient=User.objects.create_user(email=f'{nss}@example.com', nom='P', password='x', role='patient', specialite='other'),
+            )
+            for nss in ("333333333", "444444444")
+        ]
+        api_client.force_authenticate(user=medecin_user)
+        assert api_client.delete(reverse("supprimer_dpi", kwargs={"dpi_id": dpis[1].nss})).status_code == status.HTTP_204_NO_CONTENT
+
+        valeur = dpis[1].nss if champ == "nss" else dpis[1].patient_id
+        response = api_client.patch(reverse("modifier_dpi", kwargs={"dpi_id": dpis[0].nss}), {champ: valeur}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert champ in response.data
+
 
 @pytest.mark.django_db
 class TestSupprimerDPI:
@@ -364,7 +399,7 @@ class TestSupprimerDPI:
         response = api_client.delete(url, format='json')
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
-        assert not DPI.objects.filter(nss="444444444").exists()
+        assert not DPI.visibles.filter(nss="444444444").exists()
 
     def test_supprimer_dpi_not_found(self, api_client, medecin_user):
         api_client.force_authenticate(user=medecin_user)
@@ -373,3 +408,456 @@ class TestSupprimerDPI:
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert "DPI non trouvé" in str(response.data["detail"])
+
+
+@pytest.mark.django_db
+class TestBenchmarkTimeline:
+    """
+    Smoke test for the benchmark_timeline management command.
+    """
+
+    def test_benchmark_rolls_back_seeded_data(self, tmp_path):
+        output = tmp_path / "rapport.json"
+        call_command("benchmark_timeline", patients=2, consultations=2, repetitions=1, output=str(output), stdout=io.StringIO())
+
+        rapport = json.loads(output.read_text(encoding="utf-8"))
+        assert {endpoint["statut_http"] for endpoint in rapport["endpoints"]} == {200}
+        assert not DPI.objects.exists()
+
+
+@pytest.mark.django_db
+class TestBenchmarkJson:
+    """
+    Smoke test for the benchmark_json management command.
+    """
+
+    def test_benchmark_compares_renderers_on_real_payloads(self, tmp_path):
+        output = tmp_path / "rapport.json"
+        call_command("benchmark_json", patients=2, consultations=2, repetitions=1, output=str(output), stdout=io.StringIO())
+
+        rapport = json.loads(output.read_text(encoding="utf-8"))
+        assert [r["reponse"] for r in rapport["reponses"]] == [
+            "analyses_biologiques_all", "images_radiologiques_all", "historique_consultations", "ordonnances"
+        ]
+        assert all(r["identique"] and r["octets"] > 2 for r in rapport["reponses"])
+        assert not DPI.objects.exists()
+
+
+class TestBenchmarkApi:
+    """
+    Smoke tests for the benchmark_api management command.
+    """
+
+    @pytest.mark.django_db
+    def test_benchmark_covers_endpoints_and_deletes_seeded_data(self, tmp_path):
+        output = tmp_path / "rapport.json"
+        call_command("benchmark_api", patients=2, consultations=2, requetes=2, concurrence=1, echauffement=0,
+                     etiquette="v1", output=str(output), stdout=io.StringIO())
+
+        rapport = json.loads(output.read_text(encoding="utf-8"))
+        assert rapport["etiquette"] == "v1"
+        assert rapport["total"]["erreurs"] == 0
+        assert {"consulter_dpi", "get_ordonnances", "ajouter-soins", "login"} <= {e["endpoint"] for e in rapport["endpoints"]}
+        for endpoint in rapport["endpoints"]:
+            assert endpoint["requetes"] == 2
+            assert endpoint["latence_p50_ms"] <= endpoint["latence_p95_ms"] <= endpoint["latence_p99_ms"]
+            assert endpoint["requetes_sql_moyenne"] is not None
+        assert not DPI.objects.exists()
+        assert not get_user_model().objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_benchmark_with_concurrent_clients(self, tmp_path):
+        output = tmp_path / "rapport.json"
+        reference = tmp_path / "reference.json"
+        reference.write_text(json.dumps({"endpoints": [{"endpoint": "consulter_dpi", "latence_p95_ms": 1.0, "debit_rps": 1.0}]}))
+        call_command("benchmark_api", patients=3, consultations=1, requetes=6, concurrence=3,
+                     endpoints="consulter_dpi,get_soins_par_dpi", reference=str(reference),
+                     output=str(output), stdout=io.StringIO())
+
+        rapport = json.loads(output.read_text(encoding="utf-8"))
+        assert [e["endpoint"] for e in rapport["endpoints"]] == ["consulter_dpi", "get_soins_par_dpi"]
+        assert all(e["statuts"] == {"200": 6} for e in rapport["endpoints"])
+        assert set(rapport["comparaison"]) == {"consulter_dpi"}
+
+    @pytest.mark.django_db
+    def test_unknown_endpoint_is_rejected(self):
+        with pytest.raises(CommandError):
+            call_command("benchmark_api", patients=1, consultations=1, endpoints="inexistant", stdout=io.StringIO())
+        assert not DPI.objects.exists()
+
+
+@pytest.fixture
+def dossier(patient_user, medecin_user):
+    """
+    DPI of patient_user with a helper adding n fully populated consultations.
+    """
+    dpi = DPI.objects.create(
+        nss="555555555",
+        date_naissance="1960-03-03",
+        telephone="0755555555",
+        adresse="Address 555",
+        mutuelle="Mutuelle555",
+        sexe="M",
+        patient=patient_user,
+    )
+
+    def ajouter_consultations(n):
+        for i in range(n):
+            consultation = Consultation.objects.create(date=f"2024-01-{i + 1:02d}", dpi=dpi, medecin=medecin_user)
+            ordonnance = Ordonnance.objects.create(consultation=consultation)
+            Medicament.objects.create(nom="Paracétamol", dose="1g", duree="5 jours", ordonnance=ordonnance)
+            analyse = AnalyseBiologique.objects.create(type="Glycémie", consultation=consultation)
+            ParametreAnalyse.objects.create(analyse=analyse, parametre="glycemie", valeur=1.1)
+            ImageRadiologique.objects.create(type="IRM", consultation=consultation)
+            Soin.objects.create(date=consultation.date, soins="Pansement", dpi=dpi, infirmier=medecin_user)
+
+    dpi.ajouter_consultations = ajouter_consultations
+    return dpi
+
+
+@pytest.mark.django_db
+class TestDossierPatient:
+    """
+    Test suite for the dossier_patient view.
+    """
+
+    def test_dossier_complet(self, api_client, medecin_user, dossier):
+        dossier.ajouter_consultations(2)
+        api_client.force_authenticate(user=medecin_user)
+
+        response = api_client.get(reverse("dossier_patient", kwargs={"nss": dossier.nss}))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["dpi"]["patient"] == "PatientUser"
+        assert len(response.data["soins"]) == 2
+        assert len(response.data["consultations"]) == 2
+        assert response.data["ordonnances"][0]["medicaments"][0]["nom"] == "Paracétamol"
+        assert len(response.data["images_radiologiques"]) == 2
+        assert response.data["analyses_biologiques"][0]["parametres"] == [{"parametre": "glycemie", "valeur": 1.1}]
+
+    def test_dossier_nombre_de_requetes_constant(self, api_client, medecin_user, dossier):
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("dossier_patient", kwargs={"nss": dossier.nss})
+
+        dossier.ajouter_consultations(1)
+        with CaptureQueriesContext(connection) as une_consultation:
+            api_client.get(url)
+        dossier.ajouter_consultations(10)
+        with CaptureQueriesContext(connection) as onze_consultations:
+            api_client.get(url)
+
+        assert len(onze_consultations) == len(une_consultation)
+
+    def test_dossier_include(self, api_client, medecin_user, dossier):
+        dossier.ajouter_consultations(1)
+        api_client.force_authenticate(user=medecin_user)
+
+        response = api_client.get(reverse("dossier_patient", kwargs={"nss": dossier.nss}), {"include": "dpi,soins"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data) == {"dpi", "soins"}
+
+    def test_dossier_include_elements_vides(self, api_client, medecin_user, dossier):
+        api_client.force_authenticate(user=medecin_user)
+
+        response = api_client.get(reverse("dossier_patient", kwargs={"nss": dossier.nss}), {"include": "dpi,"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data) == {"dpi"}
+
+    def test_dossier_section_inconnue(self, api_client, medecin_user, dossier):
+        api_client.force_authenticate(user=medecin_user)
+        response = api_client.get(reverse("dossier_patient", kwargs={"nss": dossier.nss}), {"include": "factures"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_dossier_autre_patient_interdit(self, api_client, dossier):
+        autre_patient = User.objects.create_user(
+            email='other@example.com',
+            nom='OtherPatient',
+            password='password123',
+            role='patient',
+            specialite='some_specialite'
+        )
+        api_client.force_authenticate(user=autre_patient)
+        response = api_client.get(reverse("dossier_patient", kwargs={"nss": dossier.nss}))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestConsulterDPIAsync:
+    """
+    Test suite for the asynchronous DPI views.
+    """
+
+    def test_consulter_dpi_patient_async(self, api_client, patient_user):
+        DPI.objects.create(
+            nss="666666666",
+            date_naissance="1975-06-06",
+            telephone="0766666666",
+            adresse="Address 666",
+            mutuelle="Mutuelle666",
+            sexe="F",
+            patient=patient_user,
+        )
+        api_client.force_authenticate(user=patient_user)
+        synchrone = api_client.get(reverse("consulter_dpi_patient"))
+
+        token = RoleRefreshToken.for_user(patient_user).access_token
+        response = Client(HTTP_AUTHORIZATION=f"Bearer {token}").get(reverse("consulter_dpi_patient_async"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == synchrone.json()
+        assert response.json()["nom"] == "PatientUser"
+
+    def test_consulter_dpi_async_not_found(self, medecin_user):
+        token = RoleRefreshToken.for_user(medecin_user).access_token
+        response = Client(HTTP_AUTHORIZATION=f"Bearer {token}").get(reverse("consulter_dpi_async", kwargs={"nss": "999999998"}))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestConsulterDPIConditionnel:
+    """
+    Test suite for conditional GET (ETag / Last-Modified) on the DPI views.
+    """
+
+    @pytest.fixture
+    def dpi(self, patient_user, medecin_user):
+        return DPI.objects.create(
+            nss="777777777",
+            date_naissance="1982-07-07",
+            telephone="0777777777",
+            adresse="Address 777",
+            mutuelle="Mutuelle777",
+            sexe="M",
+            patient=patient_user,
+            medecin_traitant=medecin_user,
+        )
+
+    def test_304_en_une_requete(self, api_client, medecin_user, dpi, django_assert_num_queries):
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("consulter_dpi", kwargs={"nss": dpi.nss})
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response["ETag"]
+        assert "Last-Modified" in response
+
+        with django_assert_num_queries(1):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response["ETag"] == etag
+
+    def test_if_modified_since(self, api_client, medecin_user, dpi):
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("consulter_dpi", kwargs={"nss": dpi.nss})
+        last_modified = api_client.get(url)["Last-Modified"]
+
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_modification_change_etag(self, api_client, medecin_user, dpi):
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("consulter_dpi", kwargs={"nss": dpi.nss})
+        etag = api_client.get(url)["ETag"]
+
+        api_client.patch(reverse("modifier_dpi", kwargs={"dpi_id": dpi.nss}), {"telephone": "0700000000"}, format="json")
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["telephone"] == "0700000000"
+        assert response["ETag"] != etag
+
+    def test_nom_du_medecin_change_etag(self, api_client, medecin_user, dpi):
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("consulter_dpi", kwargs={"nss": dpi.nss})
+        etag = api_client.get(url)["ETag"]
+
+        medecin_user.nom = "Dr Nouveau Nom"
+        medecin_user.save()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["medecin_traitant"] == "Dr Nouveau Nom"
+
+    def test_consulter_dpi_patient_304(self, api_client, patient_user, dpi):
+        api_client.force_authenticate(user=patient_user)
+        url = reverse("consulter_dpi_patient")
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_consulter_dpi_async_304(self, medecin_user, dpi):
+        token = RoleRefreshToken.for_user(medecin_user).access_token
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        url = reverse("consulter_dpi_async", kwargs={"nss": dpi.nss})
+        etag = client.get(url)["ETag"]
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+class TestImporterPatients:
+    """
+    Test suite for the bulk patient import (command and endpoint).
+    """
+
+    ENTETE = "nss,date_naissance,telephone,adresse,mutuelle,sexe,patient_nom,patient_email,patient_password,medecin_traitant\n"
+
+    def test_commande_csv(self, tmp_path, medecin_user, patient_user):
+        DPI.objects.create(nss="111111111", date_naissance="1970-01-01", telephone="0", adresse="A",
+                           mutuelle="M", sexe="M", patient=patient_user)
+        fichier = tmp_path / "patients.csv"
+        fichier.write_text(
+            self.ENTETE
+            + "200000001,1990-01-01,0601,Adresse 1,Mutuelle,F,Patient Un,un@example.com,secret1,MedecinUser\n"
+            + "200000002,1991-02-02,0602,Adresse 2,Mutuelle,X,Patient Deux,deux@example.com,secret2,\n"
+            + "111111111,1992-03-03,0603,Adresse 3,Mutuelle,M,Patient Trois,trois@example.com,secret3,\n"
+            + "200000004,1993-04-04,0604,Adresse 4,Mutuelle,M,Patient Quatre,quatre@example.com,secret4,\n",
+            encoding="utf-8",
+        )
+        chemin_rapport = tmp_path / "rapport.json"
+
+        call_command("importer_patients", str(fichier), workers=2, rapport=str(chemin_rapport), stdout=io.StringIO(), stderr=io.StringIO())
+
+        rapport = json.loads(chemin_rapport.read_text(encoding="utf-8"))
+        assert rapport["lignes"] == 4
+        assert rapport["crees"] == 2
+        assert [erreur["ligne"] for erreur in rapport["erreurs"]] == [3, 4]
+        assert "sexe" in rapport["erreurs"][0]["erreurs"]
+        assert rapport["lignes_par_seconde"] > 0
+
+        dpi = DPI.objects.select_related("patient").get(nss=200000001)
+        assert dpi.medecin_traitant_id == medecin_user.id
+        assert dpi.patient.role == "patient"
+        assert dpi.patient.check_password("secret1")
+        assert DPI.objects.filter(nss=200000004).exists()
+
+    def test_endpoint_ndjson(self, api_client, administratif_user):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        lignes = [
+            {"nss": 300000001, "date_naissance": "1980-01-01", "telephone": "0701", "adresse": "A", "mutuelle": "M",
+             "sexe": "M", "patient_nom": "Ndjson Un", "patient_email": "ndjson1@example.com", "patient_password": "x"},
+            {"nss": 300000002, "date_naissance": "1980-01-01", "telephone": "0702", "adresse": "A", "mutuelle": "M",
+             "sexe": "F", "patient_nom": "Ndjson Deux", "patient_email": "ndjson1@example.com", "patient_password": "x"},
+        ]
+        contenu = "\n".join(json.dumps(ligne) for ligne in lignes) + "\n{pas du json}\n"
+        api_client.force_authenticate(user=administratif_user)
+
+        response = api_client.post(reverse("importer_dpi"), {
+            "fichier": SimpleUploadedFile("patients.ndjson", contenu.encode("utf-8")),
+        }, format="multipart")
+
+        assert response.status_code == status.HTTP_200_OK, response.data
+        assert response.data["crees"] == 1
+        assert [erreur["ligne"] for erreur in response.data["erreurs"]] == [2, 3]
+        assert "existe déjà" in response.data["erreurs"][0]["erreurs"]["detail"][0]
+
+    @pytest.mark.parametrize("limite", [{"DPI_IMPORT_MAX_LIGNES": 1}, {"DPI_IMPORT_MAX_OCTETS": 100}])
+    def test_endpoint_fichier_trop_gros(self, api_client, administratif_user, settings, limite):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        for nom, valeur in limite.items():
+            setattr(settings, nom, valeur)
+        contenu = self.ENTETE \
+            + "400000001,1990-01-01,0601,Adresse 1,Mutuelle,F,Patient Un,un@example.com,secret1,\n" \
+            + "400000002,1991-02-02,0602,Adresse 2,Mutuelle,M,Patient Deux,deux@example.com,secret2,\n"
+        api_client.force_authenticate(user=administratif_user)
+
+        response = api_client.post(reverse("importer_dpi"), {
+            "fichier": SimpleUploadedFile("patients.csv", contenu.encode("utf-8")),
+        }, format="multipart")
+
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert not DPI.objects.filter(nss__in=[400000001, 400000002]).exists()
+
+    def test_endpoint_reserve_aux_administratifs(self, api_client, medecin_user):
+        api_client.force_authenticate(user=medecin_user)
+
+        response = api_client.post(reverse("importer_dpi"), {}, format="multipart")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_endpoint_sans_fichier(self, api_client, administratif_user):
+        api_client.force_authenticate(user=administratif_user)
+
+        response = api_client.post(reverse("importer_dpi"), {}, format="multipart")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestExporterDossier:
+    """
+    Test suite for the streaming dossier export.
+    """
+
+    def test_export_ndjson(self, api_client, medecin_user, dossier):
+        dossier.ajouter_consultations(3)
+        api_client.force_authenticate(user=medecin_user)
+
+        response = api_client.get(reverse("exporter_dossier", kwargs={"nss": dossier.nss}))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/x-ndjson"
+        lignes = [json.loads(ligne) for ligne in b"".join(response.streaming_content).decode().splitlines()]
+        sections = [ligne["section"] for ligne in lignes]
+        assert sections == ["dpi"] + ["consultations"] * 3 + ["ordonnances"] * 3 + ["soins"] * 3 \
+            + ["analyses_biologiques"] * 3 + ["images_radiologiques"] * 3
+        assert lignes[0]["data"]["nss"] == int(dossier.nss)
+        assert lignes[4]["data"]["medicaments"][0]["nom"] == "Paracétamol"
+
+    def test_export_ndjson_par_lots(self, dossier, django_assert_max_num_queries):
+        from .export import generer_ndjson
+
+        dossier.ajouter_consultations(12)
+
+        # Chunks of 5 rows: the number of queries grows with the number of chunks, not of rows
+        with django_assert_max_num_queries(30):
+            lignes = "".join(generer_ndjson(dossier.nss, chunk_size=5)).splitlines()
+        assert len(lignes) == 1 + 12 * 5
+
+    def test_export_zip(self, api_client, patient_user, dossier):
+        import zipfile
+
+        dossier.ajouter_consultations(2)
+        api_client.force_authenticate(user=patient_user)
+
+        response = api_client.get(reverse("exporter_dossier", kwargs={"nss": dossier.nss}), {"type_export": "zip"})
+
+        assert response.status_code == status.HTTP_200_OK
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        assert archive.namelist() == [
+            "dpi.csv", "consultations.csv", "ordonnances.csv", "medicaments.csv", "soins.csv",
+            "analyses_biologiques.csv", "parametres_analyses.csv", "images_radiologiques.csv",
+        ]
+        medicaments = archive.read("medicaments.csv").decode().splitlines()
+        assert medicaments[0] == "id_medicament,nom,dose,duree,duree_traitement,ordonnance_id,catalogue_id"
+        assert len(medicaments) == 3
+        assert archive.read("dpi.csv").decode().splitlines()[1].startswith(str(dossier.nss))
+        assert "supprime_le" not in archive.read("consultations.csv").decode().splitlines()[0]
+
+    def test_export_autre_patient_interdit(self, api_client, dossier):
+        autre = User.objects.create_user(email="autre@example.com", nom="Autre", password="x", role="patient", specialite="other")
+        api_client.force_authenticate(user=autre)
+
+        response = api_client.get(reverse("exporter_dossier", kwargs={"nss": dossier.nss}))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_export_type_inconnu(self, api_client, medecin_user, dossier):
+        api_client.force_authenticate(user=medecin_user)
+
+        response = api_client.get(reverse("exporter_dossier", kwargs={"nss": dossier.nss}), {"type_export": "pdf"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
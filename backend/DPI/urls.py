@@ -3,9 +3,12 @@ from . import views
 
 urlpatterns = [
     path('creer/', views.creer_dpi, name='creer_dpi'),
+    path('importer/', views.importer_dpi, name='importer_dpi'),
     path('consulterPatient/', views.consulter_dpi_patient, name='consulter_dpi_patient'),
     path('consulter/<str:nss>/', views.consulter_dpi, name='consulter_dpi'),
     path('rechercher/<str:nss>/', views.rechercher_dpi_par_nss, name='rechercher_dpi_par_nss'),
     path('modifier/<int:dpi_id>/', views.modifier_dpi, name='modifier_dpi'),
     path('supprimer/<str:dpi_id>/', views.supprimer_dpi, name='supprimer_dpi'),
+    path('<str:nss>/dossier/', views.dossier_patient, name='dossier_patient'),
+    path('<str:nss>/export/', views.exporter_dossier, name='exporter_dossier'),
 ]
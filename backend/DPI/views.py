@@ -1,14 +1,33 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework import status
 from .models import DPI
 from .serializers import DPISerializer
 from .serializers import DPIDetailSerializer
-from .permissions import IsMedecin , IsMedecinOrInfirmier, IsAdministratifOrMedecin, IsPatientOrMedecin, IsPatient
-from django.contrib.auth import get_user_model
+from .permissions import IsMedecin , IsMedecinOrInfirmier, IsAdministratifOrMedecin, IsPatientOrMedecin, IsPatient, IsAdministratif
+from .import_patients import FORMATS, detecter_format, importer_patients, lire_lignes
+from .export import generer_ndjson, generer_zip_csv
+from django.http import StreamingHttpResponse
+from django.conf import settings
+import io
+from itertools import islice
+from .conditional import reponse_non_modifiee, ajouter_entetes_validation
 from accounts.serializers import UserSerializer
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from accounts.annuaire import id_medecin_par_nom
+from backend.docs import openapi, swagger_auto_schema
+from backend.purge import marquer_dpi
+from django.db.models import Prefetch
+from consultations.models import Consultation
+from consultations.serializers import ConsultationSerializer
+from soins.models import Soin
+from soins.serializers import SoinSerializer
+from ordonnance.serializers import OrdonnanceDetailSerializer
+from bilans.models import AnalyseBiologique
+from bilans.serializers import ImageRadiologiqueSerializer, AnalyseBiologiqueSerializer
+
+# Sections disponibles pour le dossier complet d'un patient
+DOSSIER_SECTIONS = ['dpi', 'soins', 'consultations', 'ordonnances', 'images_radiologiques', 'analyses_biologiques']
 
 @swagger_auto_schema(
     method='post',
@@ -25,20 +44,19 @@ from drf_yasg import openapi
 def creer_dpi(request):
             
         data = request.data.copy()   
-        User = get_user_model()
         nss = data.get("nss")
-        if DPI.objects.filter(nss=nss).exists():
+        if DPI.objects.filter(nss=nss).exists():  # Un DPI supprimé garde son NSS jusqu'à sa purge
          return Response({"detail": f"Le numéro de sécurité sociale '{nss}' existe déjà."},status=status.HTTP_400_BAD_REQUEST)
                 
         medecin_nom = data.get("medecin_traitant")
         if medecin_nom:
-            medecin = User.objects.filter(role="medecin", nom=medecin_nom).first()
-            if not medecin:
+            medecin_id = id_medecin_par_nom(medecin_nom)
+            if not medecin_id:
                 return Response(
                     {"detail": f"Le médecin '{medecin_nom}' n'existe pas ou n'est pas valide."},
                     status=status.HTTP_404_NOT_FOUND,
                 )
-            data["medecin_traitant"] = medecin.id
+            data["medecin_traitant"] = medecin_id
 
         # Étape 1 : Créer le patient dans la table User
         patient_data = {
@@ -66,6 +84,52 @@ def creer_dpi(request):
             return Response(status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@swagger_auto_schema(
+    method='post',
+    operation_description="Importer en masse des patients (compte + DPI) depuis un fichier CSV ou NDJSON. Accessible uniquement aux administratifs.",
+    manual_parameters=[
+        openapi.Parameter('fichier', openapi.IN_FORM, description="Fichier CSV (avec en-tête) ou NDJSON : mêmes champs que la création d'un DPI", type=openapi.TYPE_FILE, required=True),
+        openapi.Parameter('type_fichier', openapi.IN_FORM, description=f"Format du fichier ({', '.join(FORMATS)}), déduit de l'extension par défaut", type=openapi.TYPE_STRING, required=False),
+    ],
+    responses={
+        200: "Rapport d'import : lignes lues, patients créés, erreurs par ligne, lignes/s.",
+        400: "Fichier manquant ou format inconnu.",
+        413: "Fichier trop volumineux ou trop de lignes : utiliser la commande importer_patients.",
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAdministratif])
+@parser_classes([MultiPartParser])
+def importer_dpi(request):
+    """
+    Import en masse de patients. Les lignes invalides ou en conflit sont listées dans le
+    rapport sans empêcher l'import des autres. Le fichier est limité à DPI_IMPORT_MAX_OCTETS
+    octets et DPI_IMPORT_MAX_LIGNES lignes, vérifiés avant tout import, et les mots de passe
+    sont hachés dans le worker : pas de pool de processus dans un serveur web multithreadé.
+    """
+    fichier = request.FILES.get('fichier')
+    if not fichier:
+        return Response({'detail': "Le champ 'fichier' est obligatoire."}, status=status.HTTP_400_BAD_REQUEST)
+    format_fichier = request.data.get('type_fichier') or detecter_format(fichier.name)
+    if format_fichier not in FORMATS:
+        return Response({'detail': f"Format inconnu : {format_fichier}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    trop_gros = Response(
+        {'detail': f"Fichier limité à {settings.DPI_IMPORT_MAX_OCTETS} octets et {settings.DPI_IMPORT_MAX_LIGNES} lignes : "
+                   "utiliser la commande importer_patients pour les fichiers plus gros."},
+        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    )
+    if fichier.size > settings.DPI_IMPORT_MAX_OCTETS:
+        return trop_gros
+
+    texte = io.TextIOWrapper(fichier.file, encoding='utf-8-sig', newline='')
+    lignes = list(islice(lire_lignes(texte, format_fichier), settings.DPI_IMPORT_MAX_LIGNES + 1))
+    if len(lignes) > settings.DPI_IMPORT_MAX_LIGNES:
+        return trop_gros
+    rapport = importer_patients(lignes, workers=1)
+    return Response(rapport, status=status.HTTP_200_OK)
+
+
 @swagger_auto_schema(
     method='get',
     operation_description="Récupérer les informations détaillées d'un DPI en utilisant le NSS. Accessible aux patients et médecins.",
@@ -74,21 +138,33 @@ def creer_dpi(request):
     ],
     responses={
         200: DPIDetailSerializer,
+        304: "DPI non modifié depuis la version indiquée par If-None-Match / If-Modified-Since.",
         404: "DPI non trouvé pour cet utilisateur."
     }
 )
 @api_view(['GET'])
 @permission_classes([IsPatientOrMedecin])
 def consulter_dpi(request, nss):
+    try:
+        # Version du DPI lue par clé primaire : suffit pour répondre 304 sans sérialiser
+        version = DPI.visibles.filter(nss=nss).values_list('nss', 'updated_at').first()
+    except ValueError:
+        version = None
+    if version is None:
+        return Response({'detail': 'DPI non trouvé pour cet utilisateur.'}, status=status.HTTP_404_NOT_FOUND)
+    non_modifiee = reponse_non_modifiee(request, *version)
+    if non_modifiee is not None:
+        return non_modifiee
+
     try:
         # Récupérer le DPI pour l'utilisateur connecté en utilisant son ID via le token (request.user.id)
-        dpi = DPI.objects.all().get(nss=nss)
+        dpi = DPI.visibles.select_related('patient', 'medecin_traitant').get(nss=nss)
     except DPI.DoesNotExist:
         # Si aucun DPI n'est trouvé pour l'utilisateur, retourner une erreur
         return Response({'detail': 'DPI non trouvé pour cet utilisateur.'}, status=status.HTTP_404_NOT_FOUND)
     # Sérialisation et renvoi des données détaillées du DPI
     serializer = DPIDetailSerializer(dpi)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return ajouter_entetes_validation(Response(serializer.data, status=status.HTTP_200_OK), dpi.nss, dpi.updated_at)
 
 
 @swagger_auto_schema(
@@ -106,7 +182,7 @@ def consulter_dpi(request, nss):
 @permission_classes([IsMedecinOrInfirmier])
 def rechercher_dpi_par_nss(request, nss):
     try:
-        dpi = DPI.objects.select_related('patient').get(nss=nss)
+        dpi = DPI.visibles.select_related('patient').get(nss=nss)
     except DPI.DoesNotExist:
         return Response({'detail': 'DPI non trouvé avec ce NSS.'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -133,7 +209,7 @@ def modifier_dpi(request, dpi_id):
     """
     try:
         # Récupérer l'objet DPI en fonction de l'ID
-        dpi = DPI.objects.get(nss=dpi_id)
+        dpi = DPI.visibles.get(nss=dpi_id)
     except DPI.DoesNotExist:
         return Response({'detail': 'DPI non trouvé.'}, status=status.HTTP_404_NOT_FOUND)
     
@@ -164,14 +240,9 @@ def supprimer_dpi(request, dpi_id):
     Supprimer un DPI existant avec l'ID spécifié. 
     Cette vue est accessible uniquement aux médecins.
     """
-    try:
-        # Récupérer l'objet DPI en fonction de l'ID
-        dpi = DPI.objects.get(nss=dpi_id)
-    except DPI.DoesNotExist:
+    # Masquer le DPI et ses consultations ; les lignes sont purgées par lots par purger_suppressions
+    if not marquer_dpi(dpi_id):
         return Response({'detail': 'DPI non trouvé.'}, status=status.HTTP_404_NOT_FOUND)
-    
-    # Supprimer le DPI
-    dpi.delete()
     return Response({'detail': 'DPI supprimé avec succès.'}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -180,15 +251,24 @@ def supprimer_dpi(request, dpi_id):
     operation_description="Récupérer les informations détaillées du DPI d'un patient connecté via le token. Accessible uniquement aux patients.",
     responses={
         200: DPIDetailSerializer,
+        304: "DPI non modifié depuis la version indiquée par If-None-Match / If-Modified-Since.",
         404: "DPI non trouvé pour cet utilisateur."
     }
 )
 @api_view(['GET'])
 @permission_classes([IsPatient])
 def consulter_dpi_patient(request):
+    # Version du DPI lue par l'index unique sur patient : suffit pour répondre 304 sans sérialiser
+    version = DPI.visibles.filter(patient_id=request.user.id).values_list('nss', 'updated_at').first()
+    if version is None:
+        return Response({'detail': 'DPI non trouvé pour cet utilisateur.'}, status=status.HTTP_404_NOT_FOUND)
+    non_modifiee = reponse_non_modifiee(request, *version)
+    if non_modifiee is not None:
+        return non_modifiee
+
     # get the patient dpi with the token 
     try:
-        dpi = DPI.objects.all().select_related('patient').get(patient_id=request.user.id)
+        dpi = DPI.visibles.select_related('patient', 'medecin_traitant').get(patient_id=request.user.id)
     except DPI.DoesNotExist:
         return Response({'detail': 'DPI non trouvé pour cet utilisateur.'}, status=status.HTTP_404_NOT_FOUND)
     # Sérialisation et renvoi des données détaillées du DPI
@@ -196,4 +276,121 @@ def consulter_dpi_patient(request):
     nom = dpi.patient.nom
     response_data = serializer.data
     response_data['nom'] = nom
-    return Response(response_data, status=status.HTTP_200_OK)
+    return ajouter_entetes_validation(Response(response_data, status=status.HTTP_200_OK), dpi.nss, dpi.updated_at)
+
+
+def dossier_prefetches(sections):
+    """
+    Construit les Prefetch nécessaires aux sections demandées, pour charger
+    tout le dossier en un nombre de requêtes fixe (une par table).
+    """
+    prefetches = []
+    if 'soins' in sections:
+        prefetches.append(Prefetch('soins', queryset=Soin.objects.order_by('date', 'id_soin')))
+    if sections & {'consultations', 'ordonnances', 'images_radiologiques', 'analyses_biologiques'}:
+        prefetches.append(Prefetch('consultations', queryset=Consultation.visibles.select_related('medecin').order_by('date', 'id_consultation')))
+    if 'ordonnances' in sections:
+        prefetches.append('consultations__ordonnance__medicaments')
+    if 'images_radiologiques' in sections:
+        prefetches.append('consultations__images_radiologiques')
+    if 'analyses_biologiques' in sections:
+        prefetches.append(Prefetch('consultations__analyses_biologiques', queryset=AnalyseBiologique.objects.prefetch_related('parametres')))
+    return prefetches
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Récupérer en un seul appel le dossier complet d'un patient (DPI, soins, consultations, ordonnances, bilans). Accessible aux patients et médecins.",
+    manual_parameters=[
+        openapi.Parameter('nss', openapi.IN_PATH, description="Numéro de Sécurité Sociale du patient", type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('include', openapi.IN_QUERY, description=f"Sections à inclure, séparées par des virgules ({', '.join(DOSSIER_SECTIONS)}). Toutes par défaut.", type=openapi.TYPE_STRING, required=False),
+    ],
+    responses={
+        200: "Dossier du patient",
+        400: "Section inconnue.",
+        403: "Un patient ne peut consulter que son propre dossier.",
+        404: "DPI non trouvé."
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsPatientOrMedecin])
+def dossier_patient(request, nss):
+    """
+    Récupérer le dossier complet d'un patient en un seul aller-retour.
+    Le paramètre 'include' permet de ne demander que certaines sections.
+    """
+    # Les éléments vides (ex. '?include=dpi,') sont ignorés
+    include = {section.strip() for section in request.query_params.get('include', '').split(',') if section.strip()}
+    sections = include or set(DOSSIER_SECTIONS)
+    inconnues = sections - set(DOSSIER_SECTIONS)
+    if inconnues:
+        return Response({'detail': f"Section(s) inconnue(s) : {', '.join(sorted(inconnues))}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        dpi = DPI.visibles.select_related('patient', 'medecin_traitant').prefetch_related(*dossier_prefetches(sections)).get(nss=nss)
+    except (DPI.DoesNotExist, ValueError):
+        return Response({'detail': 'DPI non trouvé.'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.user.role == 'patient' and dpi.patient_id != request.user.id:
+        return Response({'detail': 'Un patient ne peut consulter que son propre dossier.'}, status=status.HTTP_403_FORBIDDEN)
+
+    consultations = dpi.consultations.all() if sections - {'dpi', 'soins'} else []
+    dossier = {}
+    if 'dpi' in sections:
+        dossier['dpi'] = DPIDetailSerializer(dpi).data
+    if 'soins' in sections:
+        dossier['soins'] = SoinSerializer(dpi.soins.all(), many=True).data
+    if 'consultations' in sections:
+        dossier['consultations'] = ConsultationSerializer(consultations, many=True).data
+    if 'ordonnances' in sections:
+        ordonnances = [c.ordonnance for c in consultations if hasattr(c, 'ordonnance')]
+        dossier['ordonnances'] = OrdonnanceDetailSerializer(ordonnances, many=True).data
+    if 'images_radiologiques' in sections:
+        images = [image for c in consultations for image in c.images_radiologiques.all()]
+        dossier['images_radiologiques'] = ImageRadiologiqueSerializer(images, many=True).data
+    if 'analyses_biologiques' in sections:
+        analyses = [analyse for c in consultations for analyse in c.analyses_biologiques.all()]
+        dossier['analyses_biologiques'] = AnalyseBiologiqueSerializer(analyses, many=True).data
+    return Response(dossier, status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Exporter le dossier complet d'un patient, envoyé en streaming : NDJSON (une ligne par enregistrement) ou ZIP d'un CSV par table. Accessible aux patients et médecins.",
+    manual_parameters=[
+        openapi.Parameter('nss', openapi.IN_PATH, description="Numéro de Sécurité Sociale du patient", type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('type_export', openapi.IN_QUERY, description="'ndjson' (par défaut) ou 'zip'", type=openapi.TYPE_STRING, required=False),
+    ],
+    responses={
+        200: "Dossier exporté (application/x-ndjson ou application/zip)",
+        400: "Type d'export inconnu.",
+        403: "Un patient ne peut exporter que son propre dossier.",
+        404: "DPI non trouvé."
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsPatientOrMedecin])
+def exporter_dossier(request, nss):
+    """
+    Export du dossier complet d'un patient. Les tables sont parcourues par lots de clés
+    primaires (pagination keyset, voir `export.lots`), la mémoire utilisée ne dépend donc pas de
+    la taille du dossier.
+    """
+    type_export = request.query_params.get('type_export', 'ndjson')
+    if type_export not in ('ndjson', 'zip'):
+        return Response({'detail': f"Type d'export inconnu : {type_export}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        dpi = DPI.visibles.only('nss', 'patient_id').get(nss=nss)
+    except (DPI.DoesNotExist, ValueError):
+        return Response({'detail': 'DPI non trouvé.'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.user.role == 'patient' and dpi.patient_id != request.user.id:
+        return Response({'detail': 'Un patient ne peut exporter que son propre dossier.'}, status=status.HTTP_403_FORBIDDEN)
+
+    if type_export == 'zip':
+        response = StreamingHttpResponse(generer_zip_csv(dpi.nss), content_type='application/zip')
+    else:
+        response = StreamingHttpResponse(generer_ndjson(dpi.nss), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="dossier_{dpi.nss}.{type_export}"'
+    return response
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User
+
+# Clé de l'annuaire complet (toutes spécialités confondues)
+TOUTES_SPECIALITES = 'toutes'
+
+
+def cle_annuaire(specialite=None):
+    return f'accounts:medecins:{specialite or TOUTES_SPECIALITES}'
+
+
+def cles_annuaire():
+    """
+    Toutes les clés de cache possibles de l'annuaire : une par spécialité plus l'annuaire complet.
+    """
+    return [cle_annuaire()] + [cle_annuaire(specialite) for specialite, _ in User.SPECIALITY_CHOICES]
+
+
+def lister_medecins(specialite=None):
+    """
+    Annuaire des médecins ({id, nom, specialite}, trié par id), éventuellement limité
+    à une spécialité. Lu depuis le cache, ou depuis la base puis mis en cache.
+    """
+    cle = cle_annuaire(specialite)
+    medecins = cache.get(cle)
+    if medecins is None:
+        queryset = User.objects.filter(role='medecin')
+        if specialite:
+            queryset = queryset.filter(specialite=specialite)
+        medecins = list(queryset.order_by('id').values('id', 'nom', 'specialite'))
+        cache.set(cle, medecins, settings.ANNUAIRE_MEDECINS_TIMEOUT)
+    return medecins
+
+
+def id_medecin_par_nom(nom):
+    """
+    Identifiant du médecin portant ce nom (le plus ancien en cas d'homonymes), ou None.
+    """
+    return next((medecin['id'] for medecin in lister_medecins() if medecin['nom'] == nom), None)
+
+
+def concerne_annuaire(user):
+    """
+    Indique si la modification de `user` peut changer l'annuaire : c'est un médecin,
+    ou il figure encore dans un annuaire en cache (il vient de changer de rôle).
+    """
+    if user.role == 'medecin':
+        return True
+    return any(medecin['id'] == user.id for medecins in cache.get_many(cles_annuaire()).values() for medecin in medecins)
+
+
+def invalider_annuaire():
+    cache.delete_many(cles_annuaire())
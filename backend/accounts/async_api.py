@@ -0,0 +1,75 @@
+from functools import wraps
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+
+from backend.renderers import RapideJSONRenderer
+from .authentication import JWTRoleAuthentication, cle_version_jetons, porte_les_claims, version_courante
+
+
+def reponse_json(data, status_code=status.HTTP_200_OK):
+    """
+    Réponse JSON rendue par le même renderer que les vues DRF, pour que les vues asynchrones
+    renvoient exactement le même contenu que leurs équivalents synchrones.
+    """
+    return HttpResponse(RapideJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+async def authentifier(request):
+    """
+    Authentifie la requête avec JWTRoleAuthentication. Un jeton avec les claims 'role'/'nom'/'ver'
+    est traité sans accès à la base quand la version de ses jetons est en cache ; sinon la base
+    est lue via sync_to_async. Le cache est lu avec aget : un cache réseau ne bloque pas la
+    boucle d'événements.
+    Retourne None si aucun jeton n'est fourni.
+    """
+    authentication = JWTRoleAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = authentication.get_validated_token(raw_token)
+    if porte_les_claims(validated_token):
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        version = await cache.aget(cle_version_jetons(user_id))
+        if version is None:
+            version = await sync_to_async(version_courante)(user_id)
+        return authentication.utilisateur_des_claims(validated_token, version)
+    return await sync_to_async(authentication.get_user)(validated_token)
+
+
+def async_api_view(permission_classes):
+    """
+    Équivalent de @api_view(['GET']) + @permission_classes pour une vue `async def` :
+    authentifie la requête, vérifie les permissions DRF existantes puis appelle la vue.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return reponse_json({'detail': f'Méthode "{request.method}" non autorisée.'}, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+            try:
+                request.user = await authentifier(request) or AnonymousUser()
+            except AuthenticationFailed as e:
+                return reponse_json(e.detail, status.HTTP_401_UNAUTHORIZED)
+
+            # Les permissions DRF ne lisent que request.user
+            drf_request = SimpleNamespace(user=request.user, method=request.method)
+            for permission_class in permission_classes:
+                if not permission_class().has_permission(drf_request, view):
+                    if not request.user.is_authenticated:
+                        return reponse_json({'detail': "Informations d'authentification non fournies."}, status.HTTP_401_UNAUTHORIZED)
+                    return reponse_json({'detail': "Vous n'avez pas la permission d'effectuer cette action."}, status.HTTP_403_FORBIDDEN)
+
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,101 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+# Claim portant la version des jetons de l'utilisateur au moment de l'émission
+CLAIM_VERSION = 'ver'
+# Version d'un utilisateur supprimé ou désactivé : aucun jeton ne correspond
+VERSION_REVOQUEE = 'revoque'
+
+
+def cle_cache_utilisateur(user_id):
+    return f'accounts:auth-user:{user_id}'
+
+
+def cle_version_jetons(user_id):
+    return f'accounts:token-version:{user_id}'
+
+
+def version_jetons(user):
+    """
+    Version des jetons d'un utilisateur : empreinte des champs dont dépendent ses droits
+    (rôle, nom, statut, mot de passe). Elle change, et révoque donc les jetons déjà émis,
+    quand l'un d'eux est modifié, et vaut VERSION_REVOQUEE s'il est supprimé ou désactivé.
+    """
+    if user is None or not user.is_active:
+        return VERSION_REVOQUEE
+    champs = (user.role, user.nom, user.is_staff, user.is_superuser, user.password)
+    return hashlib.sha256('\x1f'.join(str(champ) for champ in champs).encode()).hexdigest()[:16]
+
+
+def version_courante(user_id):
+    """
+    Version des jetons de l'utilisateur, lue dans le cache ; en son absence (premier accès,
+    cache vidé ou entrée expirée), calculée depuis la base puis mise en cache pour
+    AUTH_TOKEN_VERSION_TIMEOUT secondes.
+    """
+    cle = cle_version_jetons(user_id)
+    version = cache.get(cle)
+    if version is None:
+        version = version_jetons(get_user_model().objects.filter(pk=user_id).first())
+        # add : ne remplace pas une version posée entre-temps par les signaux
+        cache.add(cle, version, settings.AUTH_TOKEN_VERSION_TIMEOUT)
+    return version
+
+
+class JWTRoleAuthentication(JWTAuthentication):
+    """
+    Authentification JWT sans requête SQL.
+
+    Les jetons émis par `RoleRefreshToken` contiennent 'role', 'nom' et 'ver' : l'utilisateur
+    est alors un objet léger (TokenUser) construit à partir des claims, exposant
+    `id`, `role` et `nom` comme le modèle User. Le claim 'ver' est comparé à la version
+    courante de l'utilisateur, tenue dans le cache (voir `version_jetons` et accounts.signals) :
+    supprimer, désactiver ou modifier le rôle d'un utilisateur révoque ses jetons sans
+    requête SQL par appel. Avec un cache local au processus, les autres workers ne voient la
+    révocation qu'à l'expiration de la version (AUTH_TOKEN_VERSION_TIMEOUT).
+
+    Les jetons plus anciens, sans ces claims, chargent l'utilisateur depuis la base.
+    Si AUTH_USER_CACHE_TIMEOUT est défini (secondes), les claims de ces utilisateurs
+    sont mis en cache et invalidés à chaque modification du User.
+    """
+
+    def get_user(self, validated_token):
+        if porte_les_claims(validated_token):
+            return self.utilisateur_des_claims(validated_token, version_courante(validated_token[api_settings.USER_ID_CLAIM]))
+
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return super().get_user(validated_token)
+
+        cle = cle_cache_utilisateur(validated_token.get(api_settings.USER_ID_CLAIM))
+        claims = cache.get(cle)
+        if claims is None:
+            user = super().get_user(validated_token)
+            claims = {
+                api_settings.USER_ID_CLAIM: user.id,
+                'role': user.role,
+                'nom': user.nom,
+                'is_staff': user.is_staff,
+                'is_superuser': user.is_superuser,
+            }
+            cache.set(cle, claims, timeout)
+        return TokenUser(claims)
+
+    def utilisateur_des_claims(self, validated_token, version):
+        """
+        TokenUser construit à partir des claims, si le jeton est de la version `version`.
+        """
+        if validated_token[CLAIM_VERSION] != version:
+            raise AuthenticationFailed("Ce jeton a été révoqué.", code='token_revoked')
+        return TokenUser(validated_token)
+
+
+def porte_les_claims(validated_token):
+    return all(claim in validated_token for claim in ('role', CLAIM_VERSION, api_settings.USER_ID_CLAIM))
@@ -76,5 +76,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['nom', 'role', 'specialite']
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['role', 'nom'], name='user_role_nom_idx'),
+        ]
+
     def __str__(self):
         return self.nom
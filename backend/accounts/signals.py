@@ -0,0 +1,41 @@
+from functools import partial
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.cache import invalider_apres_commit
+
+from .annuaire import concerne_annuaire, invalider_annuaire
+from .authentication import cle_cache_utilisateur, cle_version_jetons
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalider_cache_utilisateur(sender, instance, **kwargs):
+    """
+    Supprime les claims mis en cache pour cet utilisateur (rôle, nom ou statut modifiés).
+    """
+    invalider_apres_commit(partial(cache.delete, cle_cache_utilisateur(instance.id)))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def revoquer_jetons(sender, instance, **kwargs):
+    """
+    Oublie la version des jetons de cet utilisateur : elle sera recalculée depuis la base au
+    prochain appel, ce qui révoque ses jetons si son rôle, son nom, son statut ou son mot de
+    passe ont changé, ou s'il a été supprimé.
+    """
+    invalider_apres_commit(partial(cache.delete, cle_version_jetons(instance.id)))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalider_annuaire_medecins(sender, instance, **kwargs):
+    """
+    Vide l'annuaire des médecins en cache quand un médecin est créé, modifié ou supprimé.
+    """
+    if concerne_annuaire(instance):
+        invalider_apres_commit(invalider_annuaire)
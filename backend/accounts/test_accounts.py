@@ -0,0 +1,234 @@
+import asyncio
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .models import User
+from .tokens import RoleRefreshToken
+
+
+@pytest.fixture
+def api_client():
+    """Provides an instance of the DRF APIClient for each test."""
+    return APIClient()
+
+
+@pytest.fixture
+def medecin_user(db):
+    """Create and return a user with the 'medecin' role."""
+    return User.objects.create_user(
+        email='medecin@example.com',
+        nom='MedecinUser',
+        password='password123',
+        role='medecin',
+        specialite='cardiologue'
+    )
+
+
+def compter_requetes(api_client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+class TestJWTRoleAuthentication:
+    """Test suite for the claims-based JWT authentication."""
+
+    def test_login_token_contains_role_and_nom(self, api_client, medecin_user):
+        response = api_client.post(reverse('login'), {'email': 'medecin@example.com', 'password': 'password123'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        token = AccessToken(response.data['access'])
+        assert token['role'] == 'medecin'
+        assert token['nom'] == 'MedecinUser'
+        assert token['user_id'] == medecin_user.id
+
+    def test_claims_token_does_not_load_user(self, api_client, medecin_user):
+        """With a claims token, get_medecins runs only its own query."""
+        login = api_client.post(reverse('login'), {'email': 'medecin@example.com', 'password': 'password123'}, format='json')
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+
+        assert compter_requetes(api_client, reverse('get_medecins')) == 1
+
+    @pytest.mark.parametrize('modification', ['role', 'desactivation', 'suppression'])
+    def test_token_revoked_when_user_changes(self, api_client, medecin_user, modification):
+        login = api_client.post(reverse('login'), {'email': 'medecin@example.com', 'password': 'password123'}, format='json')
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+        assert api_client.get(reverse('get_medecins')).status_code == status.HTTP_200_OK
+
+        if modification == 'suppression':
+            medecin_user.delete()
+        else:
+            medecin_user.role = 'patient' if modification == 'role' else medecin_user.role
+            medecin_user.is_active = modification != 'desactivation'
+            medecin_user.save()
+
+        response = api_client.get(reverse('get_medecins'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data['code'] == 'token_revoked'
+
+    def test_token_revoked_on_async_views(self, medecin_user):
+        from django.test import Client
+        from .tokens import RoleRefreshToken
+
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(medecin_user).access_token}')
+        # Authenticated: the view itself rejects the missing NSS
+        assert client.get(reverse('get_ordonnances_async')).status_code == status.HTTP_400_BAD_REQUEST
+
+        medecin_user.is_active = False
+        medecin_user.save()
+        cache.clear()
+
+        assert client.get(reverse('get_ordonnances_async')).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_async_views_read_the_cache_off_the_event_loop(self, medecin_user, monkeypatch):
+        from django.test import Client
+
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(medecin_user).access_token}')
+        lecture = cache.get
+        sur_la_boucle = []
+
+        def get(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                sur_la_boucle.append(args[0])
+            except RuntimeError:
+                pass
+            return lecture(*args, **kwargs)
+        monkeypatch.setattr(cache, 'get', get)
+
+        assert client.get(reverse('get_ordonnances_async')).status_code == status.HTTP_400_BAD_REQUEST
+        cache.clear()
+        assert client.get(reverse('get_ordonnances_async')).status_code == status.HTTP_400_BAD_REQUEST
+        assert sur_la_boucle == []
+
+    def test_token_version_recomputed_once_after_cache_flush(self, api_client, medecin_user):
+        login = api_client.post(reverse('login'), {'email': 'medecin@example.com', 'password': 'password123'}, format='json')
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+        cache.clear()
+
+        # The user is read once to recompute the token version, then it comes from the cache again
+        assert compter_requetes(api_client, reverse('get_medecins')) == 2
+        assert compter_requetes(api_client, reverse('get_medecins')) == 0
+
+    @override_settings(AUTH_TOKEN_VERSION_TIMEOUT=1)
+    def test_token_version_expires_without_shared_cache(self, api_client, medecin_user):
+        """A change invisible to this worker's cache (made by another worker) revokes the token once the version expires."""
+        cache.clear()
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(medecin_user).access_token}")
+        assert api_client.get(reverse('get_medecins')).status_code == status.HTTP_200_OK
+
+        # update() skips the signals, like an invalidation that stays in another worker's cache
+        User.objects.filter(pk=medecin_user.pk).update(is_active=False)
+        assert api_client.get(reverse('get_medecins')).status_code == status.HTTP_200_OK
+        time.sleep(1.1)
+
+        response = api_client.get(reverse('get_medecins'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data['code'] == 'token_revoked'
+
+    def test_legacy_token_loads_user(self, api_client, medecin_user):
+        """A token without role claim still works, with one extra query for the user."""
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(medecin_user).access_token}")
+
+        assert compter_requetes(api_client, reverse('get_medecins')) == 2
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+    def test_legacy_token_cached_and_invalidated(self, api_client, medecin_user):
+        cache.clear()
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(medecin_user).access_token}")
+
+        assert compter_requetes(api_client, reverse('get_medecins')) == 2
+        # Both the user claims and the physician directory now come from the cache
+        assert compter_requetes(api_client, reverse('get_medecins')) == 0
+
+        # Changing the role invalidates the cached claims
+        medecin_user.role = 'patient'
+        medecin_user.save()
+        response = api_client.get(reverse('get_medecins'))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestAnnuaireMedecins:
+    """Test suite for the cached physician directory."""
+
+    @pytest.fixture(autouse=True)
+    def vider_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
+    def test_liste_servie_depuis_le_cache(self, api_client, medecin_user, django_assert_num_queries):
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse('get_medecins')
+        assert api_client.get(url).data == [{'id': medecin_user.id, 'nom': 'MedecinUser', 'specialite': 'cardiologue'}]
+
+        with django_assert_num_queries(0):
+            response = api_client.get(url)
+        assert len(response.data) == 1
+
+    def test_filtre_specialite(self, api_client, medecin_user):
+        User.objects.create_user(email='pediatre@example.com', nom='Pediatre', password='x', role='medecin', specialite='pediatre')
+        api_client.force_authenticate(user=medecin_user)
+
+        response = api_client.get(reverse('get_medecins'), {'specialite': 'pediatre'})
+
+        assert [m['nom'] for m in response.data] == ['Pediatre']
+
+    def test_specialite_inconnue(self, api_client, medecin_user):
+        api_client.force_authenticate(user=medecin_user)
+
+        response = api_client.get(reverse('get_medecins'), {'specialite': 'inconnue'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_invalidation_par_les_signaux(self, api_client, medecin_user):
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse('get_medecins')
+        api_client.get(url)
+
+        autre = User.objects.create_user(email='autre@example.com', nom='Autre', password='x', role='medecin', specialite='other')
+        assert [m['nom'] for m in api_client.get(url).data] == ['MedecinUser', 'Autre']
+
+        # Un médecin qui change de rôle disparaît de l'annuaire
+        autre.role = 'administratif'
+        autre.save()
+        assert [m['nom'] for m in api_client.get(url).data] == ['MedecinUser']
+
+        medecin_user.nom = 'Dr Renomme'
+        medecin_user.save()
+        assert [m['nom'] for m in api_client.get(url).data] == ['Dr Renomme']
+
+        medecin_user.delete()
+        assert api_client.get(url).data == []
+
+    def test_invalidation_apres_commit(self, api_client, medecin_user, django_capture_on_commit_callbacks):
+        from .annuaire import cle_annuaire
+
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse('get_medecins')
+        with django_capture_on_commit_callbacks(execute=True):
+            medecin_user.nom = 'Dr Renomme'
+            medecin_user.save()
+            # A concurrent request caches the directory as it was before the commit
+            cache.set(cle_annuaire(), [{'id': medecin_user.id, 'nom': 'MedecinUser', 'specialite': 'cardiologue'}])
+
+        assert [m['nom'] for m in api_client.get(url).data] == ['Dr Renomme']
+
+    def test_resolution_du_medecin_traitant(self, api_client, medecin_user, django_assert_num_queries):
+        from .annuaire import id_medecin_par_nom
+
+        assert id_medecin_par_nom('MedecinUser') == medecin_user.id
+        with django_assert_num_queries(0):
+            assert id_medecin_par_nom('MedecinUser') == medecin_user.id
+            assert id_medecin_par_nom('Inconnu') is None
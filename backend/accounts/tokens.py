@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import CLAIM_VERSION, cle_version_jetons, version_jetons
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    Jeton de rafraîchissement qui embarque l'identifiant, le rôle, le nom de l'utilisateur et
+    la version de ses jetons. Le jeton d'accès dérivé recopie ces claims, ce qui permet à
+    `JWTRoleAuthentication` d'authentifier les requêtes sans lire la table User.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['nom'] = user.nom
+        token[CLAIM_VERSION] = version = version_jetons(user)
+        cache.add(cle_version_jetons(user.id), version, settings.AUTH_TOKEN_VERSION_TIMEOUT)
+        return token
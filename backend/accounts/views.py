@@ -2,13 +2,13 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import RoleRefreshToken
 from .serializers import UserSerializer
 from .models import User
+from .annuaire import lister_medecins
 from rest_framework.permissions import AllowAny
 from .permissions import IsMedecin, IsMedecinOrAdministratif
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from backend.docs import openapi, swagger_auto_schema
 
 
 @swagger_auto_schema(
@@ -66,7 +66,8 @@ def login(request):
 
         user = authenticate(request, username=email, password=password)
         if user is not None:
-            refresh = RefreshToken.for_user(user)
+            # Le jeton embarque le rôle et le nom : les requêtes suivantes ne relisent pas la table User
+            refresh = RoleRefreshToken.for_user(user)
 
             # Sérialisation des données utilisateur
             user_data = UserSerializer(user).data
@@ -99,13 +100,19 @@ def get_user(request, user_id):
     
 @swagger_auto_schema(
     method='get',
-    responses={200: "Liste des médecins"}
+    manual_parameters=[
+        openapi.Parameter('specialite', openapi.IN_QUERY, description="Limiter la liste à une spécialité", type=openapi.TYPE_STRING, required=False),
+    ],
+    responses={200: "Liste des médecins", 400: "Spécialité inconnue."}
 )
 @api_view(['GET'])
 @permission_classes([IsMedecinOrAdministratif]) 
 def get_medecins(request):
     
-    """Liste des médecins (Accès médecin & admin)."""
+    """Liste des médecins (Accès médecin & admin), servie depuis l'annuaire en cache."""
     
-    medecins = User.objects.filter(role='medecin').values('id', 'nom', 'specialite')
+    specialite = request.query_params.get('specialite')
+    if specialite and specialite not in dict(User.SPECIALITY_CHOICES):
+        return Response({'detail': f"Spécialité inconnue : {specialite}."}, status=status.HTTP_400_BAD_REQUEST)
+    medecins = lister_medecins(specialite)
     return Response(medecins, status=status.HTTP_200_OK)
@@ -0,0 +1,22 @@
+"""
+Versions asynchrones (async def + ORM asynchrone) des endpoints de lecture les plus sollicités.
+Elles reprennent les chemins des vues synchrones sous le préfixe /api/async/ et sont
+destinées au déploiement ASGI (voir backend/asgi.py).
+"""
+from django.urls import path
+
+from DPI import async_views as dpi_views
+from soins import async_views as soins_views
+from bilans import async_views as bilans_views
+from ordonnance import async_views as ordonnance_views
+
+urlpatterns = [
+    path('dpi/consulterPatient/', dpi_views.consulter_dpi_patient_async, name='consulter_dpi_patient_async'),
+    path('dpi/consulter/<str:nss>/', dpi_views.consulter_dpi_async, name='consulter_dpi_async'),
+    path('soins/dpi/<int:dpi_id>/', soins_views.get_soins_par_dpi_async, name='get_soins_par_dpi_async'),
+    path('bilans/images-radiologiques/', bilans_views.get_images_radiologiques_async, name='get_images_radiologiques_async'),
+    path('bilans/analyses-biologiques/', bilans_views.get_analyses_biologiques_async, name='get_analyses_biologiques_async'),
+    path('bilans/images-radiologiques/changements/', bilans_views.changements_images_radiologiques_async, name='changements_images_radiologiques_async'),
+    path('bilans/analyses-biologiques/changements/', bilans_views.changements_analyses_biologiques_async, name='changements_analyses_biologiques_async'),
+    path('ordonnances/', ordonnance_views.get_ordonnances_async, name='get_ordonnances_async'),
+]
@@ -0,0 +1,44 @@
+"""
+Invalidation du cache par défaut (CACHES['default']).
+
+L'annuaire des médecins, la version des jetons et celle du catalogue des médicaments sont
+mis en cache et invalidés par des signaux. Avec le cache en mémoire locale (LocMemCache, par
+défaut), chaque worker a son propre cache : une invalidation n'atteint que le processus qui
+a fait la modification. En production avec plusieurs workers, CACHE_BACKEND doit pointer
+vers un cache partagé ; `python manage.py check --deploy` le signale.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.db import transaction
+
+CACHES_LOCAUX = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def cache_partage():
+    """
+    Indique si le cache par défaut est partagé entre les processus.
+    """
+    return settings.CACHES['default']['BACKEND'] not in CACHES_LOCAUX
+
+
+def invalider_apres_commit(invalider):
+    """
+    Appelle `invalider` tout de suite, puis de nouveau après le commit de la transaction
+    courante : une requête concurrente a pu remettre en cache l'état d'avant le commit
+    entre la modification et sa validation.
+    """
+    invalider()
+    transaction.on_commit(invalider)
+
+
+@register(Tags.caches, deploy=True)
+def verifier_cache_partage(app_configs, **kwargs):
+    if cache_partage():
+        return []
+    return [Warning(
+        "Le cache par défaut est local au processus : les invalidations (annuaire, jetons, "
+        "catalogue des médicaments) n'atteignent pas les autres workers.",
+        hint="Définir CACHE_BACKEND et CACHE_LOCATION vers un cache partagé "
+             "(ex. django.core.cache.backends.redis.RedisCache).",
+        id='backend.W001',
+    )]
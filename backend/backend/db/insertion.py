@@ -0,0 +1,13 @@
+from django.db import connection
+
+
+def inserer_en_masse(model, objets):
+    """
+    Insère les objets en un seul INSERT quand la base renvoie les clés primaires
+    (SQLite, PostgreSQL, MariaDB) ; sinon (MySQL) un INSERT par objet pour récupérer les clés.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objets)
+    for objet in objets:
+        objet.save(force_insert=True)
+    return objets
@@ -0,0 +1,11 @@
+"""
+Backend MySQL de Django avec un pool de connexions borné par worker (voir backend.db.pool).
+Utilisé quand DB_POOL_SIZE est défini : ENGINE = 'backend.db.mysql'.
+"""
+from django.db.backends.mysql import base
+
+from backend.db.pool import PoolMixin
+
+
+class DatabaseWrapper(PoolMixin, base.DatabaseWrapper):
+    pass
@@ -0,0 +1,186 @@
+import threading
+import time
+from collections import Counter, deque
+
+from django.db.utils import OperationalError
+
+# Valeurs par défaut de OPTIONS['pool']
+POOL_MAX_SIZE = 10
+POOL_TIMEOUT = 10            # secondes d'attente maximale d'une connexion libre
+POOL_PING_AFTER = 30         # une connexion inutilisée depuis plus longtemps est vérifiée (ping)
+POOL_MAX_LIFETIME = 3600     # une connexion plus ancienne est recréée (inférieur au wait_timeout du serveur)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolConnexions:
+    """
+    Pool borné de connexions DB-API partagé par les threads d'un worker.
+
+    - au plus `max_size` connexions ouvertes ; au-delà, `prendre()` attend qu'une
+      connexion soit rendue, puis lève OperationalError après `timeout` secondes ;
+    - une connexion restée inutilisée plus de `ping_after` secondes est vérifiée avant
+      d'être prêtée, et remplacée si le serveur l'a fermée ;
+    - une connexion plus vieille que `max_lifetime` secondes est recréée.
+
+    `stats` compte les prêts (checkouts), attentes (waits), délais dépassés (timeouts),
+    connexions ouvertes (created), reconnexions après échec du ping (reconnects),
+    recyclages (recycled) et connexions rendues inutilisables (discarded).
+    """
+
+    def __init__(self, connecter, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+                 ping_after=POOL_PING_AFTER, max_lifetime=POOL_MAX_LIFETIME, verifier=None):
+        self.connecter = connecter
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.max_lifetime = max_lifetime
+        self.verifier = verifier or (lambda connexion: connexion.ping())
+        self.stats = Counter()
+        self._libres = deque()       # (connexion, date de création, date de dernier retour)
+        self._creation = {}          # id(connexion) -> date de création des connexions prêtées
+        self._ouvertes = 0
+        self._condition = threading.Condition()
+
+    def prendre(self):
+        echeance = time.monotonic() + self.timeout
+        with self._condition:
+            if not self._libres and self._ouvertes >= self.max_size:
+                self.stats['waits'] += 1
+            while not self._libres and self._ouvertes >= self.max_size:
+                restant = echeance - time.monotonic()
+                if restant <= 0:
+                    self.stats['timeouts'] += 1
+                    raise OperationalError(
+                        f"Aucune connexion libre dans le pool après {self.timeout} s ({self.max_size} connexions)."
+                    )
+                self._condition.wait(restant)
+            self.stats['checkouts'] += 1
+            if not self._libres:
+                self._ouvertes += 1
+                return self._ouvrir()
+            # LIFO : on réutilise la connexion la plus récemment rendue
+            connexion, creee, rendue = self._libres.pop()
+
+        maintenant = time.monotonic()
+        if maintenant - creee > self.max_lifetime:
+            self.stats['recycled'] += 1
+            self._fermer(connexion)
+            return self._ouvrir()
+        if maintenant - rendue > self.ping_after:
+            try:
+                self.verifier(connexion)
+            except Exception:
+                self.stats['reconnects'] += 1
+                self._fermer(connexion)
+                return self._ouvrir()
+        self._creation[id(connexion)] = creee
+        return connexion
+
+    def rendre(self, connexion, reutilisable=True):
+        creee = self._creation.pop(id(connexion), None)
+        if not reutilisable or creee is None:
+            self.stats['discarded'] += 1
+            self._fermer(connexion)
+            with self._condition:
+                self._ouvertes -= 1
+                self._condition.notify()
+            return
+        with self._condition:
+            self._libres.append((connexion, creee, time.monotonic()))
+            self._condition.notify()
+
+    def statistiques(self):
+        with self._condition:
+            return {
+                **self.stats,
+                'max_size': self.max_size,
+                'open': self._ouvertes,
+                'idle': len(self._libres),
+                'in_use': self._ouvertes - len(self._libres),
+            }
+
+    def fermer(self):
+        """
+        Ferme les connexions libres (les connexions prêtées seront fermées à leur retour).
+        """
+        with self._condition:
+            libres, self._libres = self._libres, deque()
+            self._ouvertes -= len(libres)
+        for connexion, _, _ in libres:
+            self._fermer(connexion)
+
+    def _ouvrir(self):
+        """
+        Ouvre une connexion pour une place déjà réservée dans `_ouvertes`.
+        """
+        try:
+            connexion = self.connecter()
+        except Exception:
+            with self._condition:
+                self._ouvertes -= 1
+                self._condition.notify()
+            raise
+        self.stats['created'] += 1
+        self._creation[id(connexion)] = time.monotonic()
+        return connexion
+
+    @staticmethod
+    def _fermer(connexion):
+        try:
+            connexion.close()
+        except Exception:
+            pass
+
+
+def pool_pour(alias, connecter, options):
+    """
+    Pool du worker courant pour l'alias de base `alias`, créé au premier appel.
+    """
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = PoolConnexions(
+                connecter,
+                max_size=options.get('max_size', POOL_MAX_SIZE),
+                timeout=options.get('timeout', POOL_TIMEOUT),
+                ping_after=options.get('ping_after', POOL_PING_AFTER),
+                max_lifetime=options.get('max_lifetime', POOL_MAX_LIFETIME),
+            )
+        return _pools[alias]
+
+
+def statistiques_pools():
+    """
+    Statistiques de chaque pool du worker courant, par alias de base.
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.statistiques() for alias, pool in pools.items()}
+
+
+class PoolMixin:
+    """
+    Mixin pour un DatabaseWrapper Django : les connexions sont empruntées au pool du
+    worker au lieu d'être ouvertes à chaque requête, et lui sont rendues à la fermeture.
+    Le pool est configuré par OPTIONS['pool'] (clés max_size, timeout, ping_after, max_lifetime).
+    """
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool') or {}
+        return pool_pour(self.alias, lambda: super(PoolMixin, self).get_new_connection(self.get_connection_params()), options)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        return self.pool.prendre()
+
+    def _close(self):
+        if self.connection is not None:
+            # Une connexion fermée en pleine transaction ou après une erreur n'est pas réutilisée
+            reutilisable = not self.in_atomic_block and self.autocommit and not self.errors_occurred
+            self.pool.rendre(self.connection, reutilisable)
@@ -0,0 +1,114 @@
+"""
+Documentation OpenAPI de l'API.
+
+drf_yasg n'est importé que si API_DOCS_ENABLED est vrai. Sinon, `swagger_auto_schema` et
+`openapi`, importés par les vues depuis ce module, sont remplacés par des équivalents
+inertes : les workers de production ne chargent ni drf_yasg ni ses dépendances.
+
+Le schéma est généré une fois (au build avec `generate_swagger`, ou au premier appel),
+puis servi tel quel depuis OPENAPI_SCHEMA_PATH avec un ETag.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+if settings.API_DOCS_ENABLED:
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+
+    INFOS_API = openapi.Info(
+        title="API Documentation",
+        default_version='v1',
+        description="Documentation de l'API de mon projet Django",
+        terms_of_service="https://www.example.com/terms/",
+        contact=openapi.Contact(email="contact@example.com"),
+        license=openapi.License(name="MIT License"),
+    )
+else:
+    class _OpenApiInerte:
+        """
+        Remplace le module drf_yasg.openapi : les constantes (IN_QUERY, TYPE_STRING...)
+        valent leur nom et les classes (Parameter, Schema...) ne construisent rien.
+        """
+
+        def __getattr__(self, nom):
+            if nom.isupper():
+                return nom.lower()
+            return lambda *args, **kwargs: None
+
+    openapi = _OpenApiInerte()
+
+    def swagger_auto_schema(*args, **kwargs):
+        return lambda view: view
+
+
+_schema = None
+_schema_lock = threading.Lock()
+
+
+def generer_schema():
+    """
+    Document OpenAPI (JSON) de toutes les vues, avec le générateur configuré pour drf_yasg.
+    """
+    from drf_yasg.app_settings import swagger_settings
+    from drf_yasg.codecs import OpenAPICodecJson
+
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(info=INFOS_API, url=swagger_settings.DEFAULT_API_URL)
+    return OpenAPICodecJson(validators=[]).encode(generator.get_schema(request=None, public=True))
+
+
+def ecrire_schema(contenu, chemin):
+    """
+    Écrit le schéma de façon atomique (fichier temporaire puis renommage), pour qu'un
+    autre worker ne lise jamais un fichier à moitié écrit.
+    """
+    descripteur, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin), suffix='.tmp')
+    try:
+        with os.fdopen(descripteur, 'wb') as fichier:
+            fichier.write(contenu)
+        os.replace(temporaire, chemin)
+    except OSError:
+        os.unlink(temporaire)
+        raise
+
+
+def schema_openapi():
+    """
+    (contenu, etag) du schéma, gardés en mémoire par le worker. Le fichier
+    OPENAPI_SCHEMA_PATH est lu s'il existe ; sinon le schéma est généré (si la
+    documentation est activée) et enregistré pour les autres workers.
+    En DEBUG, le schéma est regénéré à chaque démarrage pour suivre le code.
+    Retourne None si aucun schéma n'est disponible.
+    """
+    global _schema
+    with _schema_lock:
+        if _schema is None:
+            contenu = None
+            if not settings.DEBUG:
+                try:
+                    with open(settings.OPENAPI_SCHEMA_PATH, 'rb') as fichier:
+                        contenu = fichier.read()
+                except FileNotFoundError:
+                    pass
+            if contenu is None and settings.API_DOCS_ENABLED:
+                contenu = generer_schema()
+                try:
+                    ecrire_schema(contenu, settings.OPENAPI_SCHEMA_PATH)
+                except OSError:
+                    # Répertoire en lecture seule : le schéma reste servi depuis la mémoire
+                    pass
+            if contenu is not None:
+                _schema = (contenu, '"%s"' % hashlib.sha256(contenu).hexdigest()[:32])
+        return _schema
+
+
+def oublier_schema():
+    """
+    Vide le schéma gardé en mémoire ; il sera relu ou regénéré au prochain appel.
+    """
+    global _schema
+    with _schema_lock:
+        _schema = None
@@ -0,0 +1,243 @@
+"""
+Métriques par endpoint (latence, requêtes SQL, taille des réponses) au format texte
+de Prometheus, sans dépendance externe. Les compteurs sont propres à chaque worker.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .db.pool import statistiques_pools
+
+# Bornes (secondes) de l'histogramme de latence, celles des clients Prometheus officiels
+LATENCE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_PATH = '/metrics'
+
+
+class StatistiquesVue:
+    __slots__ = ('buckets', 'nombre', 'duree', 'requetes_sql', 'duree_sql', 'taille')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCE_BUCKETS) + 1)
+        self.nombre = 0
+        self.duree = 0.0
+        self.requetes_sql = 0
+        self.duree_sql = 0.0
+        self.taille = 0
+
+
+class Registre:
+    """
+    Agrège les observations par (nom de l'URL, méthode HTTP) et par code de réponse.
+    Une observation ne coûte qu'une prise de verrou et quelques additions.
+    """
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._vues = {}
+        self._reponses = {}
+
+    def observer(self, vue, methode, statut, duree, requetes_sql, duree_sql, taille):
+        with self._verrou:
+            stats = self._vues.get((vue, methode))
+            if stats is None:
+                stats = self._vues[(vue, methode)] = StatistiquesVue()
+            stats.buckets[bisect_left(LATENCE_BUCKETS, duree)] += 1
+            stats.nombre += 1
+            stats.duree += duree
+            stats.requetes_sql += requetes_sql
+            stats.duree_sql += duree_sql
+            stats.taille += taille
+            cle = (vue, methode, statut)
+            self._reponses[cle] = self._reponses.get(cle, 0) + 1
+
+    def reinitialiser(self):
+        with self._verrou:
+            self._vues.clear()
+            self._reponses.clear()
+
+    def exposer(self):
+        """
+        Texte au format d'exposition Prometheus (version 0.0.4).
+        """
+        with self._verrou:
+            vues = [(cle, list(s.buckets), s.nombre, s.duree, s.requetes_sql, s.duree_sql, s.taille)
+                    for cle, s in sorted(self._vues.items())]
+            reponses = sorted(self._reponses.items())
+
+        lignes = [
+            '# HELP http_request_duration_seconds Durée de traitement des requêtes par vue.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (vue, methode), buckets, nombre, duree, *_ in vues:
+            labels = f'view="{echapper(vue)}",method="{methode}"'
+            cumul = 0
+            for borne, compte in zip(LATENCE_BUCKETS, buckets):
+                cumul += compte
+                lignes.append(f'http_request_duration_seconds_bucket{{{labels},le="{borne}"}} {cumul}')
+            lignes.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {nombre}')
+            lignes.append(f'http_request_duration_seconds_sum{{{labels}}} {duree}')
+            lignes.append(f'http_request_duration_seconds_count{{{labels}}} {nombre}')
+
+        lignes += [
+            '# HELP http_responses_total Réponses par vue et code HTTP.',
+            '# TYPE http_responses_total counter',
+        ]
+        for (vue, methode, statut), compte in reponses:
+            lignes.append(f'http_responses_total{{view="{echapper(vue)}",method="{methode}",status="{statut}"}} {compte}')
+
+        series = [
+            ('django_db_queries_total', 'counter', 'Requêtes SQL exécutées par vue.', 4),
+            ('django_db_query_duration_seconds_total', 'counter', 'Temps passé en SQL par vue.', 5),
+            ('http_response_size_bytes_total', 'counter', 'Octets envoyés par vue (hors réponses en streaming).', 6),
+        ]
+        for nom, type_metrique, description, index in series:
+            lignes += [f'# HELP {nom} {description}', f'# TYPE {nom} {type_metrique}']
+            for ligne in vues:
+                (vue, methode) = ligne[0]
+                lignes.append(f'{nom}{{view="{echapper(vue)}",method="{methode}"}} {ligne[index]}')
+
+        lignes += exposer_pools()
+        return '\n'.join(lignes) + '\n'
+
+
+def exposer_pools():
+    """
+    Compteurs des pools de connexions du worker (voir backend.db.pool), un gauge par statistique.
+    """
+    lignes = []
+    pools = statistiques_pools()
+    statistiques = sorted({nom for stats in pools.values() for nom in stats})
+    for nom in statistiques:
+        lignes += [f'# HELP db_pool_{nom} Pool de connexions : {nom}.', f'# TYPE db_pool_{nom} gauge']
+        for alias, stats in sorted(pools.items()):
+            lignes.append(f'db_pool_{nom}{{alias="{echapper(alias)}"}} {stats.get(nom, 0)}')
+    return lignes
+
+
+def echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registre = Registre()
+
+
+class CompteurSQL:
+    """
+    Compte les requêtes SQL d'une requête HTTP et leur durée (voir `compter_sql`).
+    """
+    __slots__ = ('requetes', 'duree')
+
+    def __init__(self):
+        self.requetes = 0
+        self.duree = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.requetes += 1
+            self.duree += time.perf_counter() - debut
+
+
+# Compteur de la requête HTTP en cours. asgiref copie le contexte dans les threads de
+# sync_to_async : les requêtes SQL des vues asynchrones, exécutées sur les connexions de
+# ces threads, sont comptées dans le compteur de la requête qui les a lancées.
+compteur_courant = ContextVar('compteur_sql', default=None)
+
+
+def compter_sql(execute, sql, params, many, context):
+    """
+    Wrapper d'exécution permanent de chaque connexion : ajoute la requête au compteur de la
+    requête HTTP en cours, s'il y en a une.
+    """
+    compteur = compteur_courant.get()
+    if compteur is None:
+        return execute(sql, params, many, context)
+    return compteur(execute, sql, params, many, context)
+
+
+def installer_compteur(connexion):
+    if compter_sql not in connexion.execute_wrappers:
+        connexion.execute_wrappers.append(compter_sql)
+
+
+@receiver(connection_created)
+def installer_compteur_a_la_connexion(sender, connection, **kwargs):
+    """
+    Chaque thread a ses propres connexions (dont celles des threads de sync_to_async) :
+    le wrapper est installé à leur ouverture.
+    """
+    installer_compteur(connection)
+
+
+def nom_vue(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'non_resolue'
+    return match.url_name or match.view_name
+
+
+def taille_reponse(response):
+    if response.streaming:
+        return 0
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """
+    Mesure chaque requête (sauf /metrics) : latence, nombre et durée des requêtes SQL
+    sur toutes les bases, taille de la réponse ; agrégées par nom d'URL dans `registre`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Connexions déjà ouvertes avant le chargement du middleware
+        for connexion in connections.all(initialized_only=True):
+            installer_compteur(connexion)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == METRICS_PATH:
+            return self.get_response(request)
+
+        compteur = CompteurSQL()
+        jeton = compteur_courant.set(compteur)
+        debut = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            compteur_courant.reset(jeton)
+        self.observer(request, response, time.perf_counter() - debut, compteur)
+        return response
+
+    async def __acall__(self, request):
+        if request.path == METRICS_PATH:
+            return await self.get_response(request)
+
+        compteur = CompteurSQL()
+        jeton = compteur_courant.set(compteur)
+        debut = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            compteur_courant.reset(jeton)
+        self.observer(request, response, time.perf_counter() - debut, compteur)
+        return response
+
+    @staticmethod
+    def observer(request, response, duree, compteur):
+        registre.observer(nom_vue(request), request.method, response.status_code, duree,
+                          compteur.requetes, compteur.duree, taille_reponse(response))
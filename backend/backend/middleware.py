@@ -0,0 +1,87 @@
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from .cache import cache_partage
+from .routers import lecture_sur_replica, replicas
+
+METHODES_LECTURE = ('GET', 'HEAD', 'OPTIONS')
+
+
+def cle_ecriture_recente(request):
+    """
+    Clé de cache marquant qu'un client vient d'écrire. Le client est identifié par
+    son en-tête Authorization (haché), disponible avant l'authentification DRF.
+    Retourne None pour une requête anonyme.
+    """
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return 'routers:ecriture:' + hashlib.sha256(authorization.encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Autorise la lecture sur les réplicas pendant les requêtes GET/HEAD/OPTIONS.
+
+    Après une requête en écriture réussie, le même client est épinglé sur la base
+    principale pendant REPLICA_STICKY_SECONDS secondes, pour qu'il relise ses propres
+    écritures malgré le retard de réplication. L'épinglage est une clé du cache par défaut,
+    qui doit être partagé entre les workers : la requête suivante peut être servie par un
+    autre processus. Avec des réplicas et un cache local, le worker refuse de démarrer.
+
+    Limites : le client est identifié par son jeton, pas par son compte (un autre appareil
+    n'est pas épinglé), les requêtes anonymes ne le sont jamais, et REPLICA_STICKY_SECONDS
+    doit rester supérieur au retard de réplication.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if replicas() and not cache_partage():
+            raise ImproperlyConfigured(
+                "Les réplicas en lecture exigent un cache partagé (CACHE_BACKEND) pour épingler "
+                "sur la base principale les clients qui viennent d'écrire."
+            )
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+
+        cle = cle_ecriture_recente(request)
+        if request.method in METHODES_LECTURE:
+            token = lecture_sur_replica.set(not (cle and cache.get(cle)))
+            try:
+                return self.get_response(request)
+            finally:
+                lecture_sur_replica.reset(token)
+
+        response = self.get_response(request)
+        if cle and response.status_code < 400:
+            cache.set(cle, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+
+        cle = cle_ecriture_recente(request)
+        if request.method in METHODES_LECTURE:
+            token = lecture_sur_replica.set(not (cle and await cache.aget(cle)))
+            try:
+                return await self.get_response(request)
+            finally:
+                lecture_sur_replica.reset(token)
+
+        response = await self.get_response(request)
+        if cle and response.status_code < 400:
+            await cache.aset(cle, True, settings.REPLICA_STICKY_SECONDS)
+        return response
@@ -0,0 +1,26 @@
+"""
+Lecture des corps JSON avec orjson (voir backend.renderers). Sans orjson, le JSONParser
+standard de DRF est utilisé.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import orjson
+
+
+class RapideJSONParser(JSONParser):
+    """
+    JSONParser qui décode le corps de la requête avec orjson, en une seule lecture
+    (orjson n'accepte que l'UTF-8 : les autres encodages passent par DRF).
+    Comme avec STRICT_JSON, NaN et Infinity sont refusés.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
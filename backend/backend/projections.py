@@ -0,0 +1,86 @@
+"""
+Projections en lecture seule pour les listes : chaque liste déclare une fois ses champs de
+sortie, lus avec values_list() (ni instances de modèles, ni sérialisation champ par champ).
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+
+# Types dont la valeur lue en base diffère de celle renvoyée par le ModelSerializer
+# (date -> chaîne ISO 8601, Decimal -> chaîne...) : convertis par le champ DRF correspondant
+TYPES_CONVERTIS = (models.DateField, models.TimeField, models.DecimalField, models.DurationField, models.UUIDField)
+
+
+class Projection:
+    """
+    Colonnes d'une liste : `champs` contient des noms de champs, ou des couples
+    (clé de sortie, chemin ORM) pour lire une relation (ex. ('medecin', 'medecin__nom')).
+
+    Chaque ligne est lue comme un tuple par values_list() puis associée aux clés
+    déclarées ; les dictionnaires produits sont identiques à la sortie du
+    ModelSerializer équivalent (clé étrangère -> clé primaire, dates ISO 8601...).
+    """
+
+    def __init__(self, model, champs):
+        self.model = model
+        self.cles = tuple(champ if isinstance(champ, str) else champ[0] for champ in champs)
+        self.chemins = tuple(champ if isinstance(champ, str) else champ[1] for champ in champs)
+        self.conversions = tuple(
+            (index, conversion) for index, conversion in enumerate(map(self.conversion, self.chemins)) if conversion
+        )
+
+    @classmethod
+    def depuis_serializer(cls, serializer_class):
+        """
+        Projection des champs de la Meta d'un ModelSerializer simple (sans champ déclaré
+        explicitement, dont la représentation ne se déduit pas du modèle), `fields` ou
+        `exclude` compris.
+        """
+        meta = serializer_class.Meta
+        if serializer_class._declared_fields:
+            raise ValueError(f"{serializer_class.__name__} déclare des champs : décrire la projection explicitement.")
+        champs = getattr(meta, 'fields', serializers.ALL_FIELDS)
+        if champs == serializers.ALL_FIELDS:
+            exclus = set(getattr(meta, 'exclude', ()))
+            champs = [field.name for field in meta.model._meta.concrete_fields if field.name not in exclus]
+        return cls(meta.model, champs)
+
+    def conversion(self, chemin):
+        """
+        to_representation du champ DRF qui sérialise ce champ de modèle, ou None si la
+        valeur lue en base est déjà celle du ModelSerializer (texte, nombre, clé étrangère).
+        """
+        model, field = self.model, None
+        for nom in chemin.split('__'):
+            try:
+                field = model._meta.get_field(nom)
+            except FieldDoesNotExist:
+                return None  # annotation
+            model = field.related_model
+        if field.is_relation or not isinstance(field, TYPES_CONVERTIS):
+            return None
+        field_class, kwargs = serializers.ModelSerializer().build_standard_field(field.name, field)
+        return field_class(**kwargs).to_representation
+
+    def lignes(self, queryset):
+        return queryset.values_list(*self.chemins)
+
+    def enregistrement(self, ligne):
+        if self.conversions:
+            ligne = list(ligne)
+            for index, conversion in self.conversions:
+                if ligne[index] is not None:
+                    ligne[index] = conversion(ligne[index])
+        return dict(zip(self.cles, ligne))
+
+    def donnees(self, queryset):
+        """
+        Liste des enregistrements du queryset, prête à être renvoyée dans une Response.
+        """
+        return [self.enregistrement(ligne) for ligne in self.lignes(queryset)]
+
+    async def adonnees(self, queryset):
+        """
+        Équivalent de `donnees` pour les vues asynchrones (ORM asynchrone).
+        """
+        return [self.enregistrement(ligne) async for ligne in self.lignes(queryset)]
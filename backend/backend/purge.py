@@ -0,0 +1,159 @@
+"""
+Purge des DPI et consultations supprimés (voir backend.suppression).
+
+Le collecteur de suppression de Django charge en mémoire toutes les lignes en cascade et
+envoie un signal par objet : supprimer un DPI ancien bloquait un worker au-delà du délai
+de la passerelle. Ici, chaque table dépendante est vidée par lots de clés primaires avec
+un DELETE brut (une transaction courte par lot), des feuilles vers le DPI.
+
+La purge ne tourne pas dans les workers web : elle est lancée par
+`python manage.py purger_suppressions` (planifiée par cron), et sa progression est
+enregistrée dans la ligne unique de DPI.EtatPurge, lue par tous les workers.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from bilans.models import AnalyseBiologique, ImageRadiologique, ParametreAnalyse
+from consultations.models import Consultation
+from DPI.models import DPI, EtatPurge
+from medicaments.models import Medicament
+from ordonnance.models import Ordonnance
+from soins.models import Soin
+
+logger = logging.getLogger(__name__)
+
+# (modèle, champ `supprime_le` de la ligne supprimée dont il dépend), dans l'ordre des clés étrangères
+ETAPES = [
+    (Medicament, 'ordonnance__consultation__supprime_le'),
+    (Ordonnance, 'consultation__supprime_le'),
+    (ParametreAnalyse, 'analyse__consultation__supprime_le'),
+    (AnalyseBiologique, 'consultation__supprime_le'),
+    (ImageRadiologique, 'consultation__supprime_le'),
+    (Consultation, 'supprime_le'),
+    (Soin, 'dpi__supprime_le'),
+    (DPI, 'supprime_le'),
+]
+
+# Champs de DPI.EtatPurge renvoyés par `etat_purge`
+CHAMPS_ETAT = ('en_cours', 'debut', 'fin', 'etape', 'lots', 'lignes_supprimees', 'erreur', 'mis_a_jour')
+
+
+def marquer_dpi(nss):
+    """
+    Supprime un DPI et ses consultations pour l'API (deux UPDATE) ; ils sont purgés au
+    prochain passage de purger_suppressions. Retourne False si le DPI n'existe pas.
+    """
+    maintenant = timezone.now()
+    with transaction.atomic():
+        if not DPI.visibles.filter(nss=nss).update(supprime_le=maintenant):
+            return False
+        Consultation.visibles.filter(dpi_id=nss).update(supprime_le=maintenant)
+    return True
+
+
+def marquer_consultation(id_consultation):
+    """
+    Supprime une consultation pour l'API (un UPDATE) ; elle est purgée au prochain passage
+    de purger_suppressions. Retourne False si la consultation n'existe pas.
+    """
+    return bool(Consultation.visibles.filter(id_consultation=id_consultation).update(supprime_le=timezone.now()))
+
+
+def purger(taille_lot=None, pause=None, progression=None):
+    """
+    Supprime les lignes marquées avant le début de l'appel et toutes leurs dépendances,
+    par lots de `taille_lot` clés primaires séparés de `pause` secondes.
+    La progression est enregistrée dans DPI.EtatPurge après chaque lot, et
+    `progression(table, supprimees)` est appelée.
+    Retourne le nombre de lignes supprimées par table, ou None, sans rien supprimer, si une
+    autre purge est déjà en cours (voir `prendre_verrou`).
+    """
+    taille_lot = taille_lot or settings.PURGE_TAILLE_LOT
+    pause = settings.PURGE_PAUSE if pause is None else pause
+    limite = timezone.now()
+    supprimees = {}
+    lots = 0
+
+    if not prendre_verrou(limite):
+        return None
+    try:
+        # Consultations ajoutées à un DPI pendant sa suppression : purgées avec lui
+        Consultation.objects.filter(supprime_le__isnull=True, dpi__supprime_le__lte=limite).update(supprime_le=limite)
+
+        for model, chemin in ETAPES:
+            table = model._meta.db_table
+            lignes = model._base_manager.filter(**{f'{chemin}__lte': limite}).order_by().values_list('pk', flat=True)
+            while True:
+                cles = list(lignes[:taille_lot])
+                if not cles:
+                    break
+                supprimer_lot(model, cles)
+                supprimees[table] = supprimees.get(table, 0) + len(cles)
+                lots += 1
+                enregistrer_etat(etape=table, lots=lots, lignes_supprimees=supprimees)
+                if progression:
+                    progression(table, supprimees[table])
+                if len(cles) < taille_lot:
+                    break
+                time.sleep(pause)
+    except DatabaseError as erreur:
+        # Ex. une ligne ajoutée entre deux étapes : la purge reprendra au prochain appel
+        logger.exception("Purge des suppressions interrompue")
+        enregistrer_etat(en_cours=False, fin=timezone.now(), etape=None, erreur=str(erreur))
+        raise
+    enregistrer_etat(en_cours=False, fin=timezone.now(), etape=None)
+    return supprimees
+
+
+def supprimer_lot(model, cles):
+    """
+    DELETE brut des lignes `cles` de la table du modèle, sans collecteur ni signaux.
+    """
+    qn = connection.ops.quote_name
+    marqueurs = ', '.join(['%s'] * len(cles))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {qn(model._meta.db_table)} WHERE {qn(model._meta.pk.column)} IN ({marqueurs})', cles
+        )
+
+
+def prendre_verrou(debut):
+    """
+    Marque une purge en cours dans DPI.EtatPurge si aucune autre ne l'est : l'UPDATE
+    conditionnel est atomique en base, donc valable entre processus et serveurs. Une purge
+    sans progression depuis PURGE_VERROU_EXPIRATION secondes (commande tuée) est reprise.
+    Retourne False si une autre purge est en cours.
+    """
+    EtatPurge.objects.get_or_create(pk=1)
+    libre = Q(en_cours=False) | Q(mis_a_jour__lt=debut - timedelta(seconds=settings.PURGE_VERROU_EXPIRATION))
+    return bool(EtatPurge.objects.filter(libre, pk=1).update(
+        en_cours=True, debut=debut, fin=None, etape=None, lots=0, lignes_supprimees={}, erreur=None, mis_a_jour=debut,
+    ))
+
+
+def enregistrer_etat(**champs):
+    """
+    Met à jour la ligne unique de DPI.EtatPurge, créée par `prendre_verrou`.
+    """
+    EtatPurge.objects.filter(pk=1).update(mis_a_jour=timezone.now(), **champs)
+
+
+def etat_purge():
+    """
+    Progression de la dernière purge (en cours ou terminée), et lignes encore en attente.
+    `en_cours` reste vrai si la commande a été tuée pendant une purge, jusqu'à ce qu'une
+    autre la reprenne (après PURGE_VERROU_EXPIRATION secondes sans progression).
+    """
+    derniere = EtatPurge.objects.filter(pk=1).first() or EtatPurge()
+    etat = {champ: getattr(derniere, champ) for champ in CHAMPS_ETAT}
+    etat['en_attente'] = {
+        'dpi': DPI.objects.filter(supprime_le__isnull=False).count(),
+        'consultations': Consultation.objects.filter(supprime_le__isnull=False).count(),
+    }
+    return etat
@@ -0,0 +1,48 @@
+"""
+Rendu JSON des réponses DRF avec orjson, qui sérialise directement en bytes et gère
+nativement UUID et les sous-classes de dict/list/str (ReturnDict, ErrorDetail...).
+Sans orjson, le JSONRenderer standard de DRF est utilisé.
+"""
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Types inconnus d'orjson (Decimal, chaînes paresseuses, timedelta, QuerySet...) :
+# convertis comme le fait l'encodeur de DRF
+_encodeur = JSONEncoder()
+
+# Dates et heures sérialisées par orjson au format de l'encodeur de DRF : isoformat, avec les
+# microsecondes s'il y en a (comme DRF 3.15) et le suffixe 'Z' pour UTC
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def dumps(data):
+    """
+    JSON compact (bytes UTF-8) de `data`, avec orjson s'il est installé. Comme avec
+    json.dumps, les clés non textuelles (ex. numéros de lignes en erreur) deviennent des chaînes.
+    """
+    if orjson is None:
+        return JSONRenderer().render(data)
+    return orjson.dumps(data, default=_encodeur.default, option=OPTIONS)
+
+
+class RapideJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer qui délègue à orjson. Les demandes d'indentation (API navigable,
+    `Accept: application/json; indent=4`) et l'absence d'orjson passent par le rendu de DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        contenu = dumps(data)
+        # Comme DRF : U+2028 et U+2029 sont échappés pour pouvoir inclure la réponse dans du JavaScript
+        if b'\xe2\x80\xa8' in contenu or b'\xe2\x80\xa9' in contenu:
+            contenu = contenu.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return contenu
@@ -0,0 +1,47 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Positionné par ReplicaRoutingMiddleware : True pendant une requête en lecture seule
+# dont l'utilisateur n'a pas écrit récemment. Hors requête (commandes, shell, tests),
+# toutes les lectures restent sur la base principale.
+lecture_sur_replica = ContextVar('lecture_sur_replica', default=False)
+
+
+def replicas():
+    """
+    Alias des réplicas en lecture déclarés dans settings.DATABASE_REPLICAS.
+    """
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaRouter:
+    """
+    Envoie les écritures sur la base principale ('default') et, pendant les requêtes
+    en lecture seule, les lectures sur un réplica choisi au hasard.
+
+    Les lectures restent sur la base principale :
+    - hors d'une requête marquée par ReplicaRoutingMiddleware,
+    - dès qu'une écriture a eu lieu dans la requête en cours,
+    - dans un bloc transaction.atomic() ouvert sur la base principale.
+    """
+
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or not lecture_sur_replica.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        # Les lectures suivantes de la requête doivent voir cette écriture
+        lecture_sur_replica.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Les réplicas contiennent les mêmes données que la base principale
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replicas()
@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 from os import path
-from decouple import config
+from decouple import config, Csv
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,10 +50,15 @@ INSTALLED_APPS = [
     'ordonnance',
     'medicaments',
     'corsheaders',
-    'drf_yasg',
 ]
 
+# Documentation Swagger : désactiver en production pour ne pas charger drf_yasg dans les workers
+API_DOCS_ENABLED = config('API_DOCS_ENABLED', default=True, cast=bool)
+if API_DOCS_ENABLED:
+    INSTALLED_APPS.append('drf_yasg')
+
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,6 +67,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware', 
+    'backend.middleware.ReplicaRoutingMiddleware',
 
 ]
 
@@ -84,22 +90,56 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Connexions : avec DB_POOL_SIZE > 0, chaque worker emprunte ses connexions à un pool borné
+# (backend.db.pool) ; sinon Django garde une connexion persistante par thread pendant DB_CONN_MAX_AGE secondes.
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=0, cast=int)
+
+DB_OPTIONS = {}
+if DB_POOL_SIZE:
+    DB_OPTIONS['pool'] = {
+        'max_size': DB_POOL_SIZE,
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        'ping_after': config('DB_POOL_PING_AFTER', default=30, cast=int),
+        'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=3600, cast=int),
+    }
+
+# TLS : certificat d'autorité (ex. DigiCertGlobalRootCA.crt.pem fourni avec le projet), relatif à BASE_DIR
+DB_SSL_CA = config('DB_SSL_CA', default='')
+if DB_SSL_CA:
+    DB_OPTIONS['ssl'] = {'ca': str(BASE_DIR / DB_SSL_CA)}
+    DB_OPTIONS['ssl_mode'] = config('DB_SSL_MODE', default='VERIFY_CA')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'backend.db.mysql' if DB_POOL_SIZE else 'django.db.backends.mysql',
         'NAME': config('DB_NAME'),  # Remplace par le nom de ta base
         'USER': config('DB_USER'),      # Nom d'utilisateur MySQL
         'PASSWORD': config('DB_PASSWORD'),       # Mot de passe MySQL
         'HOST': config('DB_HOST'),                  # Adresse de l'hôte (localhost)
         'PORT': config('DB_PORT'),                       # Port MySQL par défaut
-         
+        # Avec le pool, la connexion est rendue au pool à la fin de chaque requête
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': DB_OPTIONS,
     }
 }
 
+# Réplicas en lecture : hôtes séparés par des virgules, mêmes identifiants que la base principale.
+# Chaque hôte devient un alias 'replica_<n>' ; en test, les réplicas pointent sur la base de test principale.
+for numero, host in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    DATABASES[f'replica_{numero}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica_')]
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+
+# Après une écriture, durée (secondes) pendant laquelle les lectures du même client restent sur la base principale
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+
 
 
 # Password validation
@@ -145,11 +185,21 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.JWTRoleAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Permission par défaut pour toutes les vues
     ],
+    # JSON rendu et lu avec orjson s'il est installé (sinon par le JSON standard de DRF)
+    'DEFAULT_RENDERER_CLASSES': [
+        'backend.renderers.RapideJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'backend.parsers.RapideJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 AUTH_USER_MODEL = 'accounts.User'
@@ -159,5 +209,62 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=3652),  
 }
 
+# Durée (secondes) du cache des utilisateurs authentifiés avec un ancien jeton sans claims 'role'/'nom'.
+# 0 : l'utilisateur est relu en base à chaque requête.
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=0, cast=int)
+
+# Durée (secondes) de vie de la version des jetons en cache (accounts.authentication) : les
+# signaux l'effacent à chaque modification du User, mais avec un cache local au processus cet
+# effacement n'atteint pas les autres workers, qui acceptent un jeton révoqué au plus ce délai.
+AUTH_TOKEN_VERSION_TIMEOUT = config('AUTH_TOKEN_VERSION_TIMEOUT', default=60, cast=int)
+
+# Cache partagé (annuaire des médecins, version des jetons, catalogue des médicaments).
+# Mémoire locale par défaut, ce qui ne convient qu'à un seul processus : en production avec
+# plusieurs workers, pointer CACHE_BACKEND/CACHE_LOCATION vers un cache partagé
+# (ex. django.core.cache.backends.redis.RedisCache), sans quoi une invalidation n'atteint
+# que le worker qui l'a faite (voir backend.cache, signalé par `manage.py check --deploy`).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='medidoc'),
+    }
+}
+
+# Jeton exigé par /metrics (Authorization: Bearer <token>) ; vide : accès libre (réseau interne)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Import de patients par l'API (POST /api/dpi/importer/) : taille maximale du fichier (octets)
+# et nombre maximal de lignes. Les mots de passe y sont hachés dans le processus du worker ;
+# les gros fichiers passent par `python manage.py importer_patients` (pool de processus).
+DPI_IMPORT_MAX_OCTETS = config('DPI_IMPORT_MAX_OCTETS', default=1024 * 1024, cast=int)
+DPI_IMPORT_MAX_LIGNES = config('DPI_IMPORT_MAX_LIGNES', default=200, cast=int)
+
+# Durée de vie (secondes) de l'annuaire des médecins, invalidé à chaque modification d'un médecin
+ANNUAIRE_MEDECINS_TIMEOUT = config('ANNUAIRE_MEDECINS_TIMEOUT', default=3600, cast=int)
+
+# Intervalle (secondes) entre deux vérifications de la version du catalogue des médicaments
+# par chaque worker : délai maximal avant qu'une modification faite ailleurs soit visible
+CATALOGUE_MEDICAMENTS_VERIFICATION = config('CATALOGUE_MEDICAMENTS_VERIFICATION', default=5, cast=int)
+
+# Flux de changements des bilans : ancienneté minimale (secondes) d'une modification avant
+# qu'elle soit servie, pour laisser aux transactions en cours le temps d'être validées
+FLUX_CHANGEMENTS_MARGE = config('FLUX_CHANGEMENTS_MARGE', default=5, cast=float)
+
+# Purge des DPI et consultations supprimés (backend.purge, commande purger_suppressions) :
+# lignes par DELETE, pause (secondes) entre deux lots, et délai (secondes) sans progression
+# après lequel une purge en cours est considérée comme abandonnée (commande tuée)
+PURGE_TAILLE_LOT = config('PURGE_TAILLE_LOT', default=500, cast=int)
+PURGE_PAUSE = config('PURGE_PAUSE', default=0.05, cast=float)
+PURGE_VERROU_EXPIRATION = config('PURGE_VERROU_EXPIRATION', default=600, cast=int)
+
+# Schéma OpenAPI précalculé (python manage.py generate_swagger openapi.json), servi par /swagger.json
+OPENAPI_SCHEMA_PATH = BASE_DIR / config('OPENAPI_SCHEMA_FILE', default='openapi.json')
+
+SWAGGER_SETTINGS = {
+    'DEFAULT_INFO': 'backend.docs.INFOS_API',
+    # L'interface Swagger charge le schéma précalculé au lieu de le faire regénérer
+    'SPEC_URL': 'schema-openapi',
+}
+
 CORS_ALLOW_ALL_ORIGINS = True
 ALLOWED_HOSTS = ['127.0.0.1', 'localhost', '0.0.0.0']
@@ -0,0 +1,24 @@
+"""
+Suppression différée des DPI et des consultations : la suppression marque la ligne
+(`supprime_le`) et prend effet immédiatement pour l'API, la purge des lignes et de leurs
+dépendances est faite par petits lots par la commande purger_suppressions (voir backend.purge).
+"""
+from django.db import models
+
+
+class VisiblesManager(models.Manager):
+    """
+    Manager `visibles` des modèles concernés, utilisé par les vues de l'API : exclut les
+    lignes marquées supprimées, ou rattachées à une ligne marquée supprimée, en attendant
+    leur purge. `objects` reste le manager par défaut, sans filtre : les validateurs
+    d'unicité voient les lignes en attente de purge, et les autres requêtes n'ont pas de
+    jointure en plus.
+    `chemins` : champs `supprime_le` à tester (ex. 'supprime_le', 'consultation__supprime_le').
+    """
+
+    def __init__(self, *chemins):
+        super().__init__()
+        self.chemins = chemins
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**{f'{chemin}__isnull': True for chemin in self.chemins})
@@ -0,0 +1,27 @@
+import pytest
+
+from .cache import invalider_apres_commit, verifier_cache_partage
+
+
+class TestCachePartage:
+    """Test suite for the shared cache helpers."""
+
+    def test_cache_local_signale(self, settings):
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+        assert [avertissement.id for avertissement in verifier_cache_partage(None)] == ['backend.W001']
+
+    def test_cache_partage_accepte(self, settings):
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+
+        assert verifier_cache_partage(None) == []
+
+    @pytest.mark.django_db
+    def test_invalidation_repetee_apres_commit(self, django_capture_on_commit_callbacks):
+        appels = []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            invalider_apres_commit(lambda: appels.append(len(appels)))
+            assert appels == [0]
+
+        assert appels == [0, 1]
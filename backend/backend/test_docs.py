@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from . import docs
+
+
+@pytest.fixture(autouse=True)
+def schema_oublie(settings, tmp_path):
+    settings.OPENAPI_SCHEMA_PATH = tmp_path / 'openapi.json'
+    docs.oublier_schema()
+    yield
+    docs.oublier_schema()
+
+
+class TestSchemaOpenAPI:
+    """Test suite for the precomputed OpenAPI schema."""
+
+    def test_schema_genere_une_fois_et_enregistre(self, settings, monkeypatch):
+        response = APIClient().get(reverse('schema-openapi'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/json'
+        assert response['ETag']
+        assert '/dpi/consulter/{nss}/' in json.loads(response.content)['paths']
+        assert settings.OPENAPI_SCHEMA_PATH.read_bytes() == response.content
+
+        monkeypatch.setattr(docs, 'generer_schema', lambda: pytest.fail("schéma regénéré"))
+        assert APIClient().get(reverse('schema-openapi')).content == response.content
+
+    def test_if_none_match_renvoie_304(self):
+        client = APIClient()
+        etag = client.get(reverse('schema-openapi'))['ETag']
+
+        response = client.get(reverse('schema-openapi'), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b''
+        assert response['ETag'] == etag
+
+    def test_fichier_precalcule_servi_tel_quel(self, settings, monkeypatch):
+        settings.OPENAPI_SCHEMA_PATH.write_bytes(b'{"swagger": "2.0", "paths": {}}')
+        monkeypatch.setattr(docs, 'generer_schema', lambda: pytest.fail("schéma regénéré"))
+
+        response = APIClient().get(reverse('schema-openapi'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b'{"swagger": "2.0", "paths": {}}'
+
+    def test_sans_fichier_ni_documentation_404(self, settings):
+        settings.API_DOCS_ENABLED = False
+
+        response = APIClient().get(reverse('schema-openapi'))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not settings.OPENAPI_SCHEMA_PATH.exists()
+
+    def test_interface_charge_le_schema_precalcule(self, monkeypatch):
+        monkeypatch.setattr(docs, 'generer_schema', lambda: pytest.fail("schéma généré pour la page"))
+
+        response = APIClient().get(reverse('schema-swagger-ui'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert reverse('schema-openapi') in response.content.decode()
+
+    def test_documentation_desactivee_sans_drf_yasg(self):
+        code = (
+            "import sys, django; django.setup(); "
+            "import backend.urls, DPI.views, bilans.views, consultations.views; "
+            "assert not any(m.startswith('drf_yasg') for m in sys.modules), 'drf_yasg importé'"
+        )
+        env = {**os.environ, 'API_DOCS_ENABLED': 'False', 'PYTHONPATH': os.pathsep.join(sys.path)}
+
+        resultat = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+
+        assert resultat.returncode == 0, resultat.stderr
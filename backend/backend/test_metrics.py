@@ -0,0 +1,85 @@
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.tokens import RoleRefreshToken
+from .metrics import registre
+
+
+@pytest.fixture(autouse=True)
+def registre_vide():
+    registre.reinitialiser()
+    yield
+    registre.reinitialiser()
+
+
+def valeur(texte, serie):
+    """Value of the sample whose name and labels are exactly `serie`."""
+    match = re.search(rf'^{re.escape(serie)} (\S+)$', texte, re.MULTILINE)
+    assert match, f"{serie} absent de:\n{texte}"
+    return float(match.group(1))
+
+
+@pytest.mark.django_db
+class TestMetriques:
+    """Test suite for the per-endpoint Prometheus metrics."""
+
+    def test_metriques_par_vue(self):
+        medecin = User.objects.create_user(email='m@example.com', nom='M', password='x', role='medecin', specialite='other')
+        client = APIClient()
+        client.force_authenticate(user=medecin)
+        for _ in range(3):
+            assert client.get(reverse('get_medecins')).status_code == status.HTTP_200_OK
+        client.get(reverse('consulter_dpi', kwargs={'nss': 1}))
+
+        response = client.get('/metrics')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        texte = response.content.decode()
+        labels = 'view="get_medecins",method="GET"'
+        assert valeur(texte, f'http_request_duration_seconds_count{{{labels}}}') == 3
+        assert valeur(texte, f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}') == 3
+        assert valeur(texte, f'django_db_queries_total{{{labels}}}') >= 1
+        assert valeur(texte, f'django_db_query_duration_seconds_total{{{labels}}}') > 0
+        assert valeur(texte, f'http_response_size_bytes_total{{{labels}}}') > 0
+        assert valeur(texte, 'http_responses_total{view="consulter_dpi",method="GET",status="404"}') == 1
+        # /metrics itself is not measured
+        assert 'view="metriques"' not in texte
+
+    def test_requetes_sql_comptees_sous_asgi(self):
+        """Sous ASGI, l'ORM tourne dans les threads de sync_to_async : leurs requêtes sont comptées."""
+        medecin = User.objects.create_user(email='m@example.com', nom='M', password='x', role='medecin', specialite='other')
+        jeton = RoleRefreshToken.for_user(medecin).access_token
+
+        response = async_to_sync(AsyncClient().get)(
+            reverse('get_soins_par_dpi_async', kwargs={'dpi_id': 1}), headers={'Authorization': f'Bearer {jeton}'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        texte = registre.exposer()
+        labels = 'view="get_soins_par_dpi_async",method="GET"'
+        assert valeur(texte, f'django_db_queries_total{{{labels}}}') >= 1
+        assert valeur(texte, f'django_db_query_duration_seconds_total{{{labels}}}') > 0
+
+    def test_histogramme_cumulatif(self):
+        registre.observer('vue', 'GET', 200, 0.003, 0, 0.0, 10)
+        registre.observer('vue', 'GET', 200, 0.2, 2, 0.01, 10)
+
+        texte = registre.exposer()
+
+        assert valeur(texte, 'http_request_duration_seconds_bucket{view="vue",method="GET",le="0.005"}') == 1
+        assert valeur(texte, 'http_request_duration_seconds_bucket{view="vue",method="GET",le="0.25"}') == 2
+        assert valeur(texte, 'django_db_queries_total{view="vue",method="GET"}') == 2
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_jeton_obligatoire(self):
+        client = APIClient()
+
+        assert client.get('/metrics').status_code == status.HTTP_401_UNAUTHORIZED
+        assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code == status.HTTP_200_OK
@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from django.db import connections
+from django.db.backends.sqlite3 import base as sqlite_base
+from django.db.utils import OperationalError
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .db import pool as pool_module
+from .db.pool import PoolConnexions, PoolMixin
+
+
+def nouveau_pool(**options):
+    return PoolConnexions(lambda: sqlite3.connect(':memory:', check_same_thread=False),
+                          verifier=lambda connexion: connexion.execute('SELECT 1'), **options)
+
+
+class TestPoolConnexions:
+    """Test suite for the bounded per-worker connection pool."""
+
+    def test_reutilisation(self):
+        pool = nouveau_pool()
+        connexion = pool.prendre()
+        pool.rendre(connexion)
+
+        assert pool.prendre() is connexion
+        assert pool.statistiques()['checkouts'] == 2
+        assert pool.statistiques()['created'] == 1
+        assert pool.statistiques()['in_use'] == 1
+
+    def test_pool_borne(self):
+        pool = nouveau_pool(max_size=1, timeout=0.05)
+        pool.prendre()
+
+        with pytest.raises(OperationalError):
+            pool.prendre()
+        assert pool.statistiques()['waits'] == 1
+        assert pool.statistiques()['timeouts'] == 1
+
+    def test_attente_d_une_connexion_rendue(self):
+        pool = nouveau_pool(max_size=1, timeout=5)
+        connexion = pool.prendre()
+        threading.Timer(0.05, pool.rendre, [connexion]).start()
+
+        assert pool.prendre() is connexion
+        assert pool.statistiques()['waits'] == 1
+        assert pool.statistiques()['created'] == 1
+
+    def test_reconnexion_apres_echec_du_ping(self):
+        pool = nouveau_pool(ping_after=0)
+        connexion = pool.prendre()
+        pool.rendre(connexion)
+        connexion.close()  # the server dropped the idle connection
+
+        nouvelle = pool.prendre()
+        assert nouvelle is not connexion
+        nouvelle.execute('SELECT 1')
+        assert pool.statistiques()['reconnects'] == 1
+        assert pool.statistiques()['open'] == 1
+
+    def test_recyclage(self):
+        pool = nouveau_pool(max_lifetime=0)
+        connexion = pool.prendre()
+        pool.rendre(connexion)
+        time.sleep(0.001)
+
+        assert pool.prendre() is not connexion
+        assert pool.statistiques()['recycled'] == 1
+
+    def test_connexion_inutilisable_fermee(self):
+        pool = nouveau_pool(max_size=1, timeout=0.05)
+        pool.rendre(pool.prendre(), reutilisable=False)
+
+        assert pool.statistiques()['open'] == 0
+        assert pool.statistiques()['discarded'] == 1
+        pool.prendre()
+
+
+class DatabaseWrapper(PoolMixin, sqlite_base.DatabaseWrapper):
+    pass
+
+
+@pytest.mark.django_db
+class TestPoolMixin:
+    """The Django wrapper borrows its connection from the pool and returns it on close."""
+
+    def test_connexion_rendue_au_pool(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(pool_module, '_pools', {})
+        settings_dict = {**connections['default'].settings_dict, 'NAME': str(tmp_path / 'pool.sqlite3'),
+                         'OPTIONS': {'pool': {'max_size': 2}}}
+        wrapper = DatabaseWrapper(settings_dict, alias='pool_test')
+
+        wrapper.ensure_connection()
+        brute = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        assert wrapper.connection is brute
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        wrapper.close()
+        assert pool_module.statistiques_pools()['pool_test'] == {
+            'checkouts': 2, 'created': 1, 'max_size': 2, 'open': 1, 'idle': 1, 'in_use': 0,
+        }
+
+
+@pytest.mark.django_db
+class TestEtatPoolConnexions:
+    """Test suite for the pool metrics endpoint."""
+
+    def test_statistiques_pour_un_administratif(self):
+        administratif = User.objects.create_user(email='admin@example.com', nom='Admin', password='x',
+                                                 role='administratif', specialite='other')
+        client = APIClient()
+        client.force_authenticate(user=administratif)
+
+        response = client.get(reverse('etat_pool_connexions'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response.data, dict)
@@ -0,0 +1,77 @@
+from datetime import date
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from consultations.models import Consultation
+from consultations.serializers import ConsultationDetailSerializer, ConsultationSerializer, PROJECTION_CONSULTATIONS
+from DPI.models import DPI
+from medicaments.models import Medicament
+from medicaments.serializers import MedicamentSerializer, PROJECTION_MEDICAMENTS
+from ordonnance.models import Ordonnance
+from soins.models import Soin
+from soins.serializers import SoinSerializer, PROJECTION_SOINS
+from .projections import Projection
+
+
+@pytest.fixture
+def dossier(db):
+    medecin = User.objects.create_user(email='m@example.com', nom='Dr M', password='x', role='medecin', specialite='other')
+    infirmier = User.objects.create_user(email='i@example.com', nom='I', password='x', role='infirmier', specialite='other')
+    patient = User.objects.create_user(email='p@example.com', nom='P', password='x', role='patient', specialite='other')
+    dpi = DPI.objects.create(nss='123123123', date_naissance='1970-01-01', telephone='0600000000', adresse='A',
+                             mutuelle='M', sexe='F', patient=patient, medecin_traitant=medecin)
+    for jour in (1, 2):
+        consultation = Consultation.objects.create(dpi=dpi, medecin=medecin, date=date(2024, 5, jour), resume=None if jour == 1 else 'RAS')
+        Soin.objects.create(dpi=dpi, infirmier=infirmier, date=date(2024, 5, jour), soins='Pansement', observations=None)
+        ordonnance = Ordonnance.objects.create(consultation=consultation)
+        Medicament.objects.create(ordonnance=ordonnance, nom='Paracétamol', dose='500mg', duree='5 jours')
+    return {'medecin': medecin, 'infirmier': infirmier, 'dpi': dpi}
+
+
+class TestProjection:
+    """Test suite for the values_list-based read projections."""
+
+    @pytest.mark.parametrize('projection, serializer_class, queryset', [
+        (PROJECTION_SOINS, SoinSerializer, lambda: Soin.objects.order_by('id_soin')),
+        (PROJECTION_CONSULTATIONS, ConsultationSerializer, lambda: Consultation.objects.order_by('id_consultation')),
+        (PROJECTION_MEDICAMENTS, MedicamentSerializer, lambda: Medicament.objects.order_by('id_medicament')),
+    ])
+    def test_memes_donnees_que_le_serializer(self, dossier, projection, serializer_class, queryset):
+        assert projection.donnees(queryset()) == serializer_class(queryset(), many=True).data
+
+    def test_une_seule_requete_sur_les_seules_colonnes(self, dossier, django_assert_num_queries):
+        with django_assert_num_queries(1) as requetes:
+            PROJECTION_SOINS.donnees(Soin.objects.all())
+        sql = requetes.captured_queries[0]['sql']
+        assert 'date_naissance' not in sql and 'infirmier_id' in sql
+
+    def test_champ_d_une_relation(self, dossier):
+        projection = Projection(Consultation, ['id_consultation', 'date', ('medecin', 'medecin__nom')])
+
+        donnees = projection.donnees(Consultation.objects.order_by('date'))
+
+        assert donnees[0] == {'id_consultation': donnees[0]['id_consultation'], 'date': '2024-05-01', 'medecin': 'Dr M'}
+
+    def test_champs_exclus(self):
+        assert 'supprime_le' not in PROJECTION_CONSULTATIONS.cles
+        assert set(PROJECTION_CONSULTATIONS.cles) == set(ConsultationSerializer().fields)
+
+    def test_serializer_avec_champs_declares_refuse(self):
+        with pytest.raises(ValueError):
+            Projection.depuis_serializer(ConsultationDetailSerializer)
+
+    def test_vues_de_liste(self, dossier):
+        client = APIClient()
+        client.force_authenticate(user=dossier['infirmier'])
+        response = client.get(reverse('get_soins_par_dpi', args=[dossier['dpi'].nss]))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == SoinSerializer(Soin.objects.all(), many=True).data
+
+        client.force_authenticate(user=dossier['medecin'])
+        response = client.get(reverse('get_all_consultations'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == ConsultationSerializer(Consultation.objects.all(), many=True).data
@@ -0,0 +1,206 @@
+import io
+from datetime import date, timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models.signals import post_delete
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from bilans.models import AnalyseBiologique, ImageRadiologique, ParametreAnalyse
+from consultations.models import Consultation
+from DPI.models import DPI, EtatPurge
+from medicaments.models import Medicament
+from ordonnance.models import Ordonnance
+from soins.models import Soin
+from . import purge
+from .purge import etat_purge, purger
+
+MODELES = [DPI, Consultation, Ordonnance, Medicament, AnalyseBiologique, ParametreAnalyse, ImageRadiologique, Soin]
+
+
+@pytest.fixture
+def personnel(db):
+    return {
+        role: User.objects.create_user(email=f'{role}@example.com', nom=role, password='x', role=role, specialite='other')
+        for role in ('medecin', 'infirmier', 'administratif')
+    }
+
+
+def creer_dossier(nss, personnel, consultations=3):
+    patient = User.objects.create_user(email=f'{nss}@example.com', nom='P', password='x', role='patient', specialite='other')
+    dpi = DPI.objects.create(nss=nss, date_naissance='1970-01-01', telephone='0600000000', adresse='A',
+                             mutuelle='M', sexe='F', patient=patient, medecin_traitant=personnel['medecin'])
+    for jour in range(1, consultations + 1):
+        consultation = Consultation.objects.create(dpi=dpi, medecin=personnel['medecin'], date=date(2024, 5, jour))
+        ordonnance = Ordonnance.objects.create(consultation=consultation)
+        Medicament.objects.create(ordonnance=ordonnance, nom='Paracétamol', dose='500mg', duree='5 jours')
+        Medicament.objects.create(ordonnance=ordonnance, nom='Ibuprofène', dose='400mg', duree='3 jours')
+        analyse = AnalyseBiologique.objects.create(consultation=consultation, type='Glycémie')
+        ParametreAnalyse.objects.create(analyse=analyse, parametre='glycemie', valeur=1.1)
+        ImageRadiologique.objects.create(consultation=consultation, type='IRM')
+        Soin.objects.create(dpi=dpi, infirmier=personnel['infirmier'], date=date(2024, 5, jour), soins='Pansement')
+    return dpi
+
+
+def compter():
+    return {model.__name__: model._base_manager.count() for model in MODELES}
+
+
+class TestSuppressionDifferee:
+    """Test suite for soft deletion of DPI and consultations and the chunked purge."""
+
+    def test_suppression_dpi_immediate_puis_purge(self, personnel, django_assert_max_num_queries,
+                                                  django_capture_on_commit_callbacks):
+        dpi = creer_dossier(111111111, personnel)
+        creer_dossier(222222222, personnel)
+        avant = compter()
+        client = APIClient()
+        client.force_authenticate(user=personnel['medecin'])
+
+        with django_assert_max_num_queries(4), django_capture_on_commit_callbacks(execute=True) as callbacks:
+            response = client.delete(reverse('supprimer_dpi', args=[dpi.nss]))
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        # Masqué immédiatement, sans rien supprimer : la purge est laissée à purger_suppressions
+        assert callbacks == [] and compter() == avant
+        assert not DPI.visibles.filter(nss=dpi.nss).exists() and DPI.objects.filter(nss=dpi.nss).exists()
+        for model in (Consultation, Ordonnance, AnalyseBiologique, ImageRadiologique):
+            assert model.visibles.count() == 3
+        assert not Soin.visibles.filter(dpi_id=dpi.nss).exists()
+        assert client.get(reverse('get_ordonnances'), {'nss': dpi.nss}).status_code == status.HTTP_404_NOT_FOUND
+        assert client.delete(reverse('supprimer_dpi', args=[dpi.nss])).status_code == status.HTTP_404_NOT_FOUND
+
+        supprimees = purger(taille_lot=2, pause=0)
+
+        assert supprimees == {
+            'medicaments_medicament': 6, 'ordonnance_ordonnance': 3, 'bilans_parametreanalyse': 3,
+            'bilans_analysebiologique': 3, 'bilans_imageradiologique': 3, 'consultations_consultation': 3,
+            'soins_soin': 3, 'DPI_dpi': 1,
+        }
+        # Seul le dossier de l'autre patient reste
+        assert compter() == {nom: nombre // 2 for nom, nombre in avant.items()}
+        assert DPI.visibles.filter(nss=222222222).exists()
+
+    def test_suppression_consultation(self, personnel):
+        dpi = creer_dossier(111111111, personnel)
+        consultation = Consultation.objects.order_by('date').first()
+        client = APIClient()
+        client.force_authenticate(user=personnel['medecin'])
+
+        response = client.delete(reverse('delete_consultation', args=[consultation.id_consultation]))
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        ordonnances = client.get(reverse('get_ordonnances'), {'nss': dpi.nss}).data
+        assert len(ordonnances) == 2 and consultation.id_consultation not in {o['consultation_id'] for o in ordonnances}
+        assert len(client.get(reverse('obtenir_medicaments')).data) == 4
+
+        purger(pause=0)
+
+        assert not Consultation.objects.filter(pk=consultation.pk).exists()
+        assert Medicament.objects.count() == 4 and ParametreAnalyse.objects.count() == 2
+        assert Soin.visibles.count() == 3 and DPI.visibles.filter(nss=dpi.nss).exists()
+
+    def test_purge_par_lots_sans_signaux(self, personnel, django_assert_max_num_queries):
+        creer_dossier(111111111, personnel, consultations=5)
+        purge.marquer_dpi(111111111)
+        supprimes = []
+        post_delete.connect(lambda sender, **kwargs: supprimes.append(sender), weak=False, dispatch_uid='test_purge')
+
+        try:
+            # Par lot : SELECT des clés, DELETE et UPDATE de la progression (DPI.EtatPurge)
+            with django_assert_max_num_queries(60) as requetes:
+                purger(taille_lot=3, pause=0)
+        finally:
+            post_delete.disconnect(dispatch_uid='test_purge')
+
+        deletes = [requete['sql'] for requete in requetes.captured_queries if requete['sql'].startswith('DELETE')]
+        # 10 médicaments (3 + 3 + 3 + 1), 5 lignes par table de consultation et de soins (3 + 2), 1 DPI
+        assert len(deletes) == 4 + 6 * 2 + 1
+        assert all(sql.rsplit('IN (', 1)[1].count(',') <= 2 for sql in deletes)
+        assert supprimes == []
+        assert not DPI.objects.exists()
+
+    def test_consultation_ajoutee_pendant_la_suppression(self, personnel):
+        dpi = creer_dossier(111111111, personnel, consultations=1)
+        purge.marquer_dpi(dpi.nss)
+        # Consultation créée par une requête concurrente, après le marquage du DPI
+        Consultation.objects.create(dpi=dpi, medecin=personnel['medecin'], date=date(2024, 6, 1))
+
+        purger(pause=0)
+
+        assert not DPI.objects.exists() and not Consultation.objects.exists()
+
+    def test_etat_purge(self, personnel):
+        creer_dossier(111111111, personnel, consultations=2)
+        purge.marquer_dpi(111111111)
+        client = APIClient()
+
+        client.force_authenticate(user=personnel['medecin'])
+        assert client.get(reverse('etat_purge')).status_code == status.HTTP_403_FORBIDDEN
+
+        client.force_authenticate(user=personnel['administratif'])
+        etat = client.get(reverse('etat_purge')).data
+        assert etat['en_attente'] == {'dpi': 1, 'consultations': 2}
+
+        purger(pause=0)
+
+        etat = client.get(reverse('etat_purge')).data
+        assert etat['en_attente'] == {'dpi': 0, 'consultations': 0}
+        assert not etat['en_cours'] and etat['erreur'] is None
+        assert etat['lignes_supprimees']['DPI_dpi'] == 1 and etat['lots'] == 8
+        # Enregistré en base : le même pour tous les workers
+        assert EtatPurge.objects.get().lignes_supprimees == etat['lignes_supprimees']
+
+    def test_etat_purge_erreur(self, personnel, monkeypatch):
+        creer_dossier(111111111, personnel, consultations=1)
+        purge.marquer_dpi(111111111)
+
+        def echec(model, cles):
+            raise DatabaseError('verrou')
+        monkeypatch.setattr(purge, 'supprimer_lot', echec)
+
+        with pytest.raises(DatabaseError):
+            purger(pause=0)
+
+        etat = etat_purge()
+        assert not etat['en_cours'] and etat['erreur'] == 'verrou'
+        assert etat['en_attente'] == {'dpi': 1, 'consultations': 1}
+
+    def test_commande(self, personnel):
+        creer_dossier(111111111, personnel, consultations=1)
+        purge.marquer_dpi(111111111)
+        sortie = io.StringIO()
+
+        call_command('purger_suppressions', taille_lot=10, pause=0, stdout=sortie)
+
+        assert 'En attente : 1 DPI, 1 consultations' in sortie.getvalue()
+        assert '9 lignes supprimées' in sortie.getvalue()
+        assert not DPI.objects.exists()
+
+    def test_purge_deja_en_cours(self, personnel):
+        creer_dossier(111111111, personnel, consultations=1)
+        purge.marquer_dpi(111111111)
+        # Une autre exécution de la commande (ex. cron qui se chevauche) purge en ce moment
+        EtatPurge.objects.create(pk=1, en_cours=True, debut=timezone.now(), mis_a_jour=timezone.now(), lots=3)
+        sortie = io.StringIO()
+
+        assert purger(pause=0) is None
+        call_command('purger_suppressions', pause=0, stdout=sortie)
+
+        assert 'déjà en cours' in sortie.getvalue()
+        assert DPI.objects.exists() and EtatPurge.objects.get().lots == 3
+
+    def test_purge_abandonnee_reprise(self, personnel, settings):
+        creer_dossier(111111111, personnel, consultations=1)
+        purge.marquer_dpi(111111111)
+        # Commande tuée pendant une purge : plus de progression depuis l'expiration du verrou
+        il_y_a = timezone.now() - timedelta(seconds=settings.PURGE_VERROU_EXPIRATION + 1)
+        EtatPurge.objects.create(pk=1, en_cours=True, debut=il_y_a, mis_a_jour=il_y_a)
+
+        assert purger(pause=0)['DPI_dpi'] == 1
+        assert not EtatPurge.objects.get().en_cours
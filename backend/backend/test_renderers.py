@@ -0,0 +1,94 @@
+import datetime
+import decimal
+import io
+import json
+import uuid
+import zoneinfo
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from accounts.models import User
+from . import parsers, renderers
+from .parsers import RapideJSONParser
+from .renderers import RapideJSONRenderer
+
+DONNEES = ReturnDict({
+    'date': datetime.date(2024, 3, 1),
+    'heure': datetime.datetime(2024, 3, 1, 8, 30, tzinfo=datetime.timezone.utc),
+    'modifie_le': datetime.datetime(2024, 3, 1, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    'local': datetime.datetime(2024, 3, 1, 8, 30, 15, 987654),
+    'debut': datetime.time(8, 30, 15, 500999),
+    'paris': datetime.datetime(2024, 7, 1, 10, 0, 0, 250, tzinfo=zoneinfo.ZoneInfo('Europe/Paris')),
+    'utc_zoneinfo': datetime.datetime(2024, 7, 1, 10, 0, tzinfo=zoneinfo.ZoneInfo('UTC')),
+    'valeur': decimal.Decimal('1.25'),
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'duree': datetime.timedelta(minutes=5),
+    'lignes': {2: ['NSS invalide']},
+    'resume': 'Fièvre\u2028persistante',
+}, serializer=None)
+
+
+class TestRapideJSON:
+    """Test suite for the orjson-backed renderer and parser."""
+
+    def test_meme_contenu_que_le_renderer_drf(self):
+        rapide = RapideJSONRenderer().render(DONNEES)
+
+        assert json.loads(rapide) == json.loads(JSONRenderer().render(DONNEES))
+        assert json.loads(rapide)['heure'] == '2024-03-01T08:30:00Z'
+        assert json.loads(rapide)['valeur'] == 1.25
+        assert b'\\u2028' in rapide
+
+    def test_meme_octets_que_le_renderer_drf(self):
+        """Mêmes octets que DRF, y compris pour les datetimes avec microsecondes, naïves, avec fuseau et les heures."""
+        assert RapideJSONRenderer().render(DONNEES) == JSONRenderer().render(DONNEES)
+
+    def test_dates_serialisees_par_orjson(self, monkeypatch):
+        """Les dates ne passent pas par le `default` Python de l'encodeur de DRF."""
+        appels = []
+        monkeypatch.setattr(renderers, '_encodeur', type('Espion', (), {'default': lambda self, objet: appels.append(objet)})())
+
+        renderers.dumps({cle: DONNEES[cle] for cle in ('date', 'heure', 'modifie_le', 'local', 'debut', 'paris')})
+
+        assert appels == []
+
+    def test_indentation_et_none_comme_drf(self):
+        renderer = RapideJSONRenderer()
+
+        assert renderer.render(None) == b''
+        indente = renderer.render({'a': 1}, 'application/json; indent=4')
+        assert indente == JSONRenderer().render({'a': 1}, 'application/json; indent=4')
+
+    def test_parser(self):
+        assert RapideJSONParser().parse(io.BytesIO('{"nom": "Zoé", "n": [1, 2.5]}'.encode())) == {'nom': 'Zoé', 'n': [1, 2.5]}
+        with pytest.raises(ParseError):
+            RapideJSONParser().parse(io.BytesIO(b'{"nom": '))
+        with pytest.raises(ParseError):
+            RapideJSONParser().parse(io.BytesIO(b'{"valeur": NaN}'))
+
+    def test_repli_sans_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+
+        assert RapideJSONRenderer().render(DONNEES) == JSONRenderer().render(DONNEES)
+        assert RapideJSONParser().parse(io.BytesIO(b'{"a": 1}')) == JSONParser().parse(io.BytesIO(b'{"a": 1}'))
+
+    @pytest.mark.django_db
+    def test_configure_pour_les_vues(self):
+        User.objects.create_user(email='m@example.com', nom='M', password='secret', role='medecin', specialite='other')
+        client = APIClient()
+
+        response = client.post(reverse('login'), '{"email": "m@example.com", "password": "secret"}', content_type='application/json')
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response.accepted_renderer, RapideJSONRenderer)
+
+        response = client.post(reverse('login'), '{"email": ', content_type='application/json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()['detail'].startswith('JSON parse error')
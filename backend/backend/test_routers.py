@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, override_settings
+
+from accounts.models import User
+from .middleware import ReplicaRoutingMiddleware
+from .routers import ReplicaRouter, lecture_sur_replica
+
+
+@pytest.fixture(autouse=True)
+def replica(tmp_path):
+    """Declare one replica alias (no query is run against it) with a cache shared between processes."""
+    caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)}}
+    with override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_STICKY_SECONDS=60, CACHES=caches):
+        yield
+
+
+def base_lue(middleware_class=ReplicaRoutingMiddleware):
+    """Middleware whose view returns the alias the router picks for a read."""
+    return middleware_class(lambda request: HttpResponse(router.db_for_read(User)))
+
+
+class TestReplicaRouter:
+    """Test suite for the read-replica router."""
+
+    def test_lectures_hors_requete_sur_la_base_principale(self):
+        assert ReplicaRouter().db_for_read(User) == 'default'
+
+    def test_lecture_sur_replica_puis_epinglage_apres_ecriture(self):
+        token = lecture_sur_replica.set(True)
+        try:
+            assert ReplicaRouter().db_for_read(User) == 'replica_1'
+            assert ReplicaRouter().db_for_write(User) == 'default'
+            assert ReplicaRouter().db_for_read(User) == 'default'
+        finally:
+            lecture_sur_replica.reset(token)
+
+    def test_pas_de_migration_sur_les_replicas(self):
+        assert ReplicaRouter().allow_migrate('default', 'accounts') is True
+        assert ReplicaRouter().allow_migrate('replica_1', 'accounts') is False
+
+    def test_sans_replica(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            token = lecture_sur_replica.set(True)
+            try:
+                assert ReplicaRouter().db_for_read(User) == 'default'
+            finally:
+                lecture_sur_replica.reset(token)
+
+
+class TestReplicaRoutingMiddleware:
+    """Test suite for read-your-writes pinning."""
+
+    def test_get_lit_sur_le_replica(self):
+        response = base_lue()(RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer a'))
+
+        assert response.content == b'replica_1'
+
+    def test_ecriture_lit_sur_la_base_principale(self):
+        response = base_lue()(RequestFactory().post('/', HTTP_AUTHORIZATION='Bearer a'))
+
+        assert response.content == b'default'
+
+    def test_lecture_de_ses_propres_ecritures(self):
+        middleware = base_lue()
+        middleware(RequestFactory().post('/', HTTP_AUTHORIZATION='Bearer a'))
+
+        assert middleware(RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer a')).content == b'default'
+        # Other clients keep reading from the replica
+        assert middleware(RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer b')).content == b'replica_1'
+
+        cache.clear()  # the stickiness window has elapsed
+        assert middleware(RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer a')).content == b'replica_1'
+
+    def test_ecriture_refusee_sans_epinglage(self):
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse(status=400))
+        middleware(RequestFactory().post('/', HTTP_AUTHORIZATION='Bearer a'))
+
+        assert base_lue()(RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer a')).content == b'replica_1'
+
+    def test_cache_partage_exige(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            with pytest.raises(ImproperlyConfigured):
+                base_lue()
+
+    def test_middleware_asynchrone(self):
+        async def vue(request):
+            return HttpResponse(router.db_for_read(User))
+
+        middleware = ReplicaRoutingMiddleware(vue)
+        asyncio.run(middleware(RequestFactory().post('/', HTTP_AUTHORIZATION='Bearer a')))
+
+        assert asyncio.run(middleware(RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer a'))).content == b'default'
+        assert asyncio.run(middleware(RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer b'))).content == b'replica_1'
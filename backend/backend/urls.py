@@ -14,28 +14,13 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path,include,re_path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from . import views
 
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="API Documentation",
-        default_version='v1',
-        description="Documentation de l'API de mon projet Django",
-        terms_of_service="https://www.example.com/terms/",
-        contact=openapi.Contact(email="contact@example.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],  # Permet à tout le monde d'accéder à la documentation
-)
-
 urlpatterns = [
-    re_path(r'^swagger/$', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('admin/', admin.site.urls),
     path('api/accounts/', include('accounts.urls')),
     path('api/dpi/', include('DPI.urls')),
@@ -43,4 +28,26 @@ urlpatterns = [
     path('api/bilans/', include('bilans.urls')),
     path('api/consultations/', include('consultations.urls')),
     path('api/ordonnances/', include('ordonnance.urls')),
+    path('api/medicaments/', include('medicaments.urls')),
+    path('api/async/', include('backend.async_urls')),
+    path('api/db-pool/', views.etat_pool_connexions, name='etat_pool_connexions'),
+    path('api/purge/', views.etat_purge, name='etat_purge'),
+    path('metrics', views.metriques, name='metriques'),
+    path('swagger.json', views.schema_openapi, name='schema-openapi'),
 ]
+
+if settings.API_DOCS_ENABLED:
+    from rest_framework import permissions
+    from drf_yasg.renderers import SwaggerUIRenderer
+    from drf_yasg.views import get_schema_view
+
+    from .docs import INFOS_API
+
+    schema_view = get_schema_view(
+        INFOS_API,
+        public=True,
+        permission_classes=[permissions.AllowAny],  # Permet à tout le monde d'accéder à la documentation
+    )
+
+    # Page de l'interface seulement : le schéma lui-même est servi, précalculé, par /swagger.json
+    urlpatterns.insert(0, re_path(r'^swagger/$', schema_view.as_view(renderer_classes=[SwaggerUIRenderer]), name='schema-swagger-ui'))
@@ -0,0 +1,75 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotFound
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework import status
+
+from DPI.permissions import IsAdministratif
+from .db.pool import statistiques_pools
+from .docs import schema_openapi as charger_schema_openapi, swagger_auto_schema
+from .metrics import registre
+from .purge import etat_purge as lire_etat_purge
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Statistiques du pool de connexions du worker qui répond (checkouts, waits, reconnects...). Accessible aux administratifs.",
+    responses={200: "Statistiques par alias de base de données"}
+)
+@api_view(['GET'])
+@permission_classes([IsAdministratif])
+def etat_pool_connexions(request):
+    """
+    Statistiques des pools de connexions du worker courant, pour dimensionner le nombre
+    de workers par rapport à la limite de connexions du serveur MySQL.
+    """
+    return Response(statistiques_pools(), status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Progression de la dernière purge des DPI et consultations supprimés et lignes en attente. Accessible aux administratifs.",
+    responses={200: "État de la purge"}
+)
+@api_view(['GET'])
+@permission_classes([IsAdministratif])
+def etat_purge(request):
+    """
+    Dernière purge de purger_suppressions (en cours ou terminée, lignes supprimées par table)
+    et nombre de DPI et de consultations supprimés pas encore purgés.
+    """
+    return Response(lire_etat_purge(), status=status.HTTP_200_OK)
+
+
+def metriques(request):
+    """
+    Métriques du worker au format texte de Prometheus. Vue Django simple (sans DRF) pour
+    rester légère ; si METRICS_TOKEN est défini, l'en-tête 'Authorization: Bearer <token>' est exigé.
+    """
+    if settings.METRICS_TOKEN:
+        attendu = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), attendu):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(registre.exposer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_safe
+def schema_openapi(request):
+    """
+    Schéma OpenAPI précalculé (voir backend.docs), avec un ETag : un client qui l'a déjà
+    reçoit une réponse 304 sans corps.
+    """
+    schema = charger_schema_openapi()
+    if schema is None:
+        return HttpResponseNotFound()
+    contenu, etag = schema
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(contenu, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from rest_framework import status
+
+from accounts.async_api import async_api_view, reponse_json
+from DPI.models import DPI
+from DPI.permissions import IsPatientOrMedecinOrInfirmierOrRadiologue
+from .models import ImageRadiologique, AnalyseBiologique
+from .permissions import IsLaborantinOrMedecin
+from .serializers import ImageRadiologiqueSerializer, AnalyseBiologiqueSerializer, CustomImageRadiologiqueSerializer
+from .querysets import optimiser_queryset
+from .pagination import lire_date
+from .changements import lire_parametres_flux, changements_depuis, page_de_changements, LONG_POLL_INTERVAL
+from .views import NSS_EXIGE, filtrer_flux, nss_exige
+
+
+async def lister_bilans_patient(request, model, serializer_class):
+    """
+    Bilans d'un patient (NSS requis), éventuellement filtrés sur la date de consultation.
+    Le queryset est chargé en entier (relations comprises) avant la sérialisation,
+    qui ne fait donc aucun accès synchrone à la base.
+    """
+    nss = request.GET.get('nss')
+
+    if not nss:
+        return reponse_json({'detail': 'Le champ NSS est obligatoire.'}, status.HTTP_400_BAD_REQUEST)
+    try:
+        date = lire_date(request.GET, 'date')
+    except ValueError as erreur:
+        return reponse_json({'detail': str(erreur)}, status.HTTP_400_BAD_REQUEST)
+
+    if not await DPI.visibles.filter(nss=nss).aexists():
+        return reponse_json({'detail': 'DPI non trouvé avec ce NSS.'}, status.HTTP_404_NOT_FOUND)
+
+    bilans = optimiser_queryset(model.visibles.filter(consultation__dpi=nss), serializer_class)
+    if date:
+        bilans = bilans.filter(consultation__date__gt=date)
+
+    bilans = [bilan async for bilan in bilans]
+    return reponse_json(serializer_class(bilans, many=True).data)
+
+
+@async_api_view([IsPatientOrMedecinOrInfirmierOrRadiologue])
+async def get_images_radiologiques_async(request):
+    """
+    Version asynchrone de get_images_radiologiques.
+    """
+    return await lister_bilans_patient(request, ImageRadiologique, ImageRadiologiqueSerializer)
+
+
+@async_api_view([IsPatientOrMedecinOrInfirmierOrRadiologue])
+async def get_analyses_biologiques_async(request):
+    """
+    Version asynchrone de get_analyses_biologiques.
+    """
+    return await lister_bilans_patient(request, AnalyseBiologique, AnalyseBiologiqueSerializer)
+
+
+async def flux_de_changements(request, queryset, serializer_class, pk_field):
+    """
+    Version asynchrone de views.flux_de_changements : l'attente du long-poll
+    (asyncio.sleep) ne bloque pas de worker.
+    """
+    try:
+        since, limit, wait = lire_parametres_flux(request.GET)
+    except ValueError:
+        return reponse_json({'detail': "Paramètres 'since', 'limit' ou 'wait' invalides."}, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        queryset = filtrer_flux(queryset, serializer_class, request.GET)
+    except ValueError as erreur:
+        return reponse_json({'detail': str(erreur)}, status.HTTP_400_BAD_REQUEST)
+    echeance = time.monotonic() + wait
+    while True:
+        objets = [objet async for objet in changements_depuis(queryset, pk_field, since, limit)]
+        restant = echeance - time.monotonic()
+        if objets or restant <= 0:
+            break
+        await asyncio.sleep(min(LONG_POLL_INTERVAL, restant))
+
+    objets, since, has_more = page_de_changements(objets, pk_field, since, limit)
+    return reponse_json({'results': serializer_class(objets, many=True).data, 'since': since, 'has_more': has_more})
+
+
+@async_api_view([IsPatientOrMedecinOrInfirmierOrRadiologue])
+async def changements_images_radiologiques_async(request):
+    """
+    Version asynchrone de changements_images_radiologiques.
+    """
+    return await flux_de_changements(request, ImageRadiologique.visibles.all(), CustomImageRadiologiqueSerializer, 'id_image_radiologique')
+
+
+@async_api_view([IsLaborantinOrMedecin])
+async def changements_analyses_biologiques_async(request):
+    """
+    Version asynchrone de changements_analyses_biologiques.
+    """
+    if nss_exige(request.user, request.GET):
+        return reponse_json({'detail': NSS_EXIGE}, status.HTTP_400_BAD_REQUEST)
+    return await flux_de_changements(request, AnalyseBiologique.visibles.all(), AnalyseBiologiqueSerializer, 'id_analyse_biologique')
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone as dj_timezone
+
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# Durée maximale (en secondes) d'une attente en long-poll, et intervalle entre deux vérifications.
+# Les vues synchrones gardent un thread du worker WSGI pendant l'attente : elles sont limitées à
+# LONG_POLL_MAX_SYNCHRONE, le long-poll se fait avec les vues asynchrones.
+LONG_POLL_MAX = 25
+LONG_POLL_MAX_SYNCHRONE = 1
+LONG_POLL_INTERVAL = 1.0
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encoder_watermark(objet, pk_field):
+    """
+    Watermark d'un bilan : '<updated_at en microsecondes depuis 1970>-<clé primaire>'.
+    La clé primaire départage les bilans modifiés à la même microseconde.
+    """
+    microsecondes = (objet.updated_at - EPOCH) // timedelta(microseconds=1)
+    return f"{microsecondes}-{getattr(objet, pk_field)}"
+
+
+def decoder_watermark(since):
+    """
+    Retourne (updated_at, clé primaire) pour un watermark produit par `encoder_watermark`.
+    Lève ValueError si le watermark est mal formé.
+    """
+    microsecondes, pk = since.split('-')
+    return EPOCH + timedelta(microseconds=int(microsecondes)), int(pk)
+
+
+def lire_parametres_flux(params, wait_max=LONG_POLL_MAX):
+    """
+    Lit les paramètres du flux : 'since' (watermark), 'limit' et 'wait' (secondes de long-poll,
+    ramenées à `wait_max`). Lève ValueError si l'un d'eux est invalide.
+    """
+    since = params.get('since') or None
+    if since:
+        decoder_watermark(since)
+    limit = int(params.get('limit') or DEFAULT_PAGE_SIZE)
+    wait = float(params.get('wait') or 0)
+    if limit < 1 or wait < 0:
+        raise ValueError("Les paramètres 'limit' et 'wait' doivent être positifs.")
+    return since, min(limit, MAX_PAGE_SIZE), min(wait, wait_max)
+
+
+def changements_depuis(queryset, pk_field, since, limit):
+    """
+    Bilans modifiés après le watermark `since` (tous si None), dans l'ordre (updated_at, pk).
+    Lit une ligne de plus que `limit` pour savoir s'il reste des changements à récupérer.
+
+    `updated_at` est fixé à l'enregistrement de la ligne, pas au commit de sa transaction :
+    une ligne encore non validée peut porter une date antérieure à celle d'une ligne déjà
+    servie, et passerait sous le watermark. Les lignes modifiées depuis moins de
+    FLUX_CHANGEMENTS_MARGE secondes ne sont donc pas encore renvoyées.
+    """
+    limite = dj_timezone.now() - timedelta(seconds=settings.FLUX_CHANGEMENTS_MARGE)
+    queryset = queryset.filter(updated_at__lte=limite).order_by('updated_at', pk_field)
+    if since:
+        updated_at, pk = decoder_watermark(since)
+        queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, **{f'{pk_field}__gt': pk}))
+    return queryset[:limit + 1]
+
+
+def page_de_changements(objets, pk_field, since, limit):
+    """
+    Découpe le résultat de `changements_depuis` : retourne (objets, nouveau watermark, has_more).
+    Sans changement, le watermark reçu est renvoyé tel quel.
+    """
+    has_more = len(objets) > limit
+    objets = objets[:limit]
+    if objets:
+        since = encoder_watermark(objets[-1], pk_field)
+    return objets, since, has_more
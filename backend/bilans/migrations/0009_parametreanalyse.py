@@ -0,0 +1,71 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copier_parametres(apps, schema_editor):
+    """
+    Découpe les chaînes 'param1#param2' / 'val1#val2' de chaque analyse
+    en lignes ParametreAnalyse typées. Une valeur non numérique est enregistrée à NULL.
+    """
+    AnalyseBiologique = apps.get_model('bilans', 'AnalyseBiologique')
+    ParametreAnalyse = apps.get_model('bilans', 'ParametreAnalyse')
+
+    lot = []
+    analyses = AnalyseBiologique.objects.exclude(parametre_analyse__isnull=True).exclude(parametre_analyse='')
+    for analyse in analyses.only('pk', 'parametre_analyse', 'valeur').iterator(chunk_size=1000):
+        parametres = analyse.parametre_analyse.split('#')
+        valeurs = analyse.valeur.split('#') if analyse.valeur else []
+        for parametre, valeur in zip(parametres, valeurs):
+            try:
+                valeur = float(valeur) if valeur else None
+            except ValueError:
+                valeur = None
+            lot.append(ParametreAnalyse(analyse_id=analyse.pk, parametre=parametre, valeur=valeur))
+        if len(lot) >= 1000:
+            ParametreAnalyse.objects.bulk_create(lot)
+            lot = []
+    if lot:
+        ParametreAnalyse.objects.bulk_create(lot)
+
+
+def restaurer_parametres(apps, schema_editor):
+    """
+    Opération inverse : reconstruit les chaînes séparées par '#'.
+    """
+    AnalyseBiologique = apps.get_model('bilans', 'AnalyseBiologique')
+    ParametreAnalyse = apps.get_model('bilans', 'ParametreAnalyse')
+
+    par_analyse = {}
+    for parametre in ParametreAnalyse.objects.order_by('analyse_id', 'pk').iterator(chunk_size=1000):
+        par_analyse.setdefault(parametre.analyse_id, []).append(parametre)
+    for analyse_id, parametres in par_analyse.items():
+        AnalyseBiologique.objects.filter(pk=analyse_id).update(
+            parametre_analyse='#'.join(p.parametre for p in parametres),
+            valeur='#'.join('' if p.valeur is None else str(p.valeur) for p in parametres),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bilans', '0008_alter_analysebiologique_valeur'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParametreAnalyse',
+            fields=[
+                ('id_parametre_analyse', models.AutoField(primary_key=True, serialize=False)),
+                ('parametre', models.CharField(max_length=100)),
+                ('valeur', models.FloatField(null=True)),
+                ('analyse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parametres', to='bilans.analysebiologique')),
+            ],
+            options={
+                'ordering': ['id_parametre_analyse'],
+                'indexes': [models.Index(fields=['parametre', 'valeur'], name='bilans_param_valeur_idx')],
+            },
+        ),
+        migrations.RunPython(copier_parametres, restaurer_parametres),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bilans', '0009_parametreanalyse'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='analysebiologique',
+            name='parametre_analyse',
+        ),
+        migrations.RemoveField(
+            model_name='analysebiologique',
+            name='valeur',
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bilans', '0010_remove_analysebiologique_parametre_analyse_and_more'),
+        ('consultations', '0002_alter_consultation_resume'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysebiologique',
+            index=models.Index(fields=['statut', 'id_analyse_biologique'], name='analyse_statut_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imageradiologique',
+            index=models.Index(fields=['statut', 'id_image_radiologique'], name='image_statut_id_idx'),
+        ),
+    ]
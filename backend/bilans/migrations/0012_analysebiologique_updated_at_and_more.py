@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bilans', '0011_analysebiologique_analyse_statut_id_idx_and_more'),
+        ('consultations', '0003_consultation_consultation_dpi_date_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysebiologique',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='imageradiologique',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='analysebiologique',
+            index=models.Index(fields=['updated_at', 'id_analyse_biologique'], name='analyse_maj_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='imageradiologique',
+            index=models.Index(fields=['updated_at', 'id_image_radiologique'], name='image_maj_id_idx'),
+        ),
+    ]
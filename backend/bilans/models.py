@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from consultations.models import Consultation
+from backend.suppression import VisiblesManager
 
 # Create your models here.
 
@@ -12,11 +13,11 @@ class AnalyseBiologique(models.Model):
 
     id_analyse_biologique = models.AutoField(primary_key=True)
     type = models.CharField(max_length=45)
-    parametre_analyse = models.CharField(max_length=100,null=True)
-    valeur = models.CharField(max_length=100,null=True)
     unite = models.CharField(max_length=10,null=True)
     laborantin = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, limit_choices_to={'role': 'laborantin'},null=True,related_name='analyses_biologiques')
     statut = models.CharField(max_length=15, choices=STATUS_CHOICES, default='pas_terminé')
+    # Date de dernière modification, utilisée comme watermark du flux de changements
+    updated_at = models.DateTimeField(auto_now=True)
 
     consultation = models.ForeignKey(
         Consultation, 
@@ -24,9 +25,43 @@ class AnalyseBiologique(models.Model):
         related_name='analyses_biologiques'
     )
 
+    objects = models.Manager()
+    visibles = VisiblesManager('consultation__supprime_le')  # Bilans des consultations non supprimées
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['statut', 'id_analyse_biologique'], name='analyse_statut_id_idx'),
+            models.Index(fields=['updated_at', 'id_analyse_biologique'], name='analyse_maj_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Analyse {self.type}"
+
+
+class ParametreAnalyse(models.Model):
+    """
+    Paramètre mesuré d'une analyse biologique (ex. glycémie = 1.26).
+    La valeur est numérique et indexée avec le nom du paramètre pour les recherches par plage.
+    """
+    id_parametre_analyse = models.AutoField(primary_key=True)
+    parametre = models.CharField(max_length=100)
+    valeur = models.FloatField(null=True)
+
+    analyse = models.ForeignKey(
+        AnalyseBiologique,
+        on_delete=models.CASCADE,
+        related_name='parametres'
+    )
+
+    class Meta:
+        ordering = ['id_parametre_analyse']
+        indexes = [
+            models.Index(fields=['parametre', 'valeur'], name='bilans_param_valeur_idx'),
+        ]
+
     def __str__(self):
-        return f"Analyse {self.type} - {self.parametre_analyse}"
-    
+        return f"{self.parametre} = {self.valeur}"
+
 
 
 class ImageRadiologique(models.Model):
@@ -40,6 +75,8 @@ class ImageRadiologique(models.Model):
     compte_rendu = models.TextField(null=True)
     radiologue = models.ForeignKey(get_user_model(), on_delete=models.CASCADE, limit_choices_to={'role': 'radiologue'},null=True,related_name='images_radiologiques')
     statut = models.CharField(max_length=15, choices=STATUS_CHOICES, default='pas_terminé')
+    # Date de dernière modification, utilisée comme watermark du flux de changements
+    updated_at = models.DateTimeField(auto_now=True)
 
     consultation = models.ForeignKey(
         Consultation, 
@@ -47,6 +84,15 @@ class ImageRadiologique(models.Model):
         related_name='images_radiologiques'
     )
 
+    objects = models.Manager()
+    visibles = VisiblesManager('consultation__supprime_le')  # Bilans des consultations non supprimées
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['statut', 'id_image_radiologique'], name='image_statut_id_idx'),
+            models.Index(fields=['updated_at', 'id_image_radiologique'], name='image_maj_id_idx'),
+        ]
+
     def __str__(self):
         return f"Image {self.type} - {self.date}"
  
\ No newline at end of file
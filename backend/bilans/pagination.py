@@ -0,0 +1,149 @@
+import json
+from datetime import date
+
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import ParametreAnalyse
+
+# Taille de page par défaut et maximale pour la pagination par curseur
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Nombre de lignes lues en base par lot en mode streaming
+STREAM_CHUNK_SIZE = 500
+
+
+def lire_date(params, nom):
+    """
+    Lit le paramètre de date `nom` (AAAA-MM-JJ) ; retourne None s'il est absent.
+    Lève ValueError si la date n'est pas valide.
+    """
+    valeur = params.get(nom)
+    if not valeur:
+        return None
+    try:
+        return date.fromisoformat(valeur)
+    except ValueError:
+        raise ValueError(f"Le paramètre '{nom}' doit être une date au format AAAA-MM-JJ.")
+
+
+def filtrer_bilans(queryset, params):
+    """
+    Applique en SQL les filtres 'statut', 'type', 'date' (consultations après cette date)
+    et 'date_fin' (consultations jusqu'à cette date incluse).
+    Lève ValueError si 'date' ou 'date_fin' n'est pas une date valide.
+    """
+    statut = params.get('statut')
+    type_bilan = params.get('type')
+    date_debut = lire_date(params, 'date')
+    date_fin = lire_date(params, 'date_fin')
+
+    if statut:
+        queryset = queryset.filter(statut=statut)
+    if type_bilan:
+        queryset = queryset.filter(type=type_bilan)
+    if date_debut:
+        queryset = queryset.filter(consultation__date__gt=date_debut)
+    if date_fin:
+        queryset = queryset.filter(consultation__date__lte=date_fin)
+    return queryset
+
+
+def filtrer_parametres(queryset, params):
+    """
+    Filtre les analyses biologiques sur la valeur d'un paramètre mesuré :
+    'parametre' (nom du paramètre), 'valeur_min' et 'valeur_max' (bornes incluses).
+    Lève ValueError si une borne n'est pas numérique.
+    """
+    parametre = params.get('parametre')
+    if not parametre:
+        return queryset
+
+    mesures = ParametreAnalyse.objects.filter(analyse=OuterRef('pk'), parametre=parametre)
+    if params.get('valeur_min'):
+        mesures = mesures.filter(valeur__gte=float(params['valeur_min']))
+    if params.get('valeur_max'):
+        mesures = mesures.filter(valeur__lte=float(params['valeur_max']))
+    return queryset.filter(Exists(mesures))
+
+
+def demande_pagination(params):
+    """
+    Indique si le client a demandé une page (paramètre 'cursor' ou 'limit').
+    """
+    return 'cursor' in params or 'limit' in params
+
+
+def demande_streaming(params):
+    """
+    Indique si le client a demandé une réponse JSON en streaming (?stream=1).
+    """
+    return params.get('stream', '').lower() in ('1', 'true', 'oui')
+
+
+def paginer_par_curseur(queryset, pk_field, params):
+    """
+    Pagination par curseur (keyset) sur la clé primaire `pk_field`.
+    Retourne la liste des objets de la page et le curseur de la page suivante (ou None).
+    Lève ValueError si 'cursor' ou 'limit' ne sont pas des entiers valides.
+    """
+    cursor = params.get('cursor')
+    limit = int(params.get('limit') or DEFAULT_PAGE_SIZE)
+    if limit < 1:
+        raise ValueError("Le paramètre 'limit' doit être positif.")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    queryset = queryset.order_by(pk_field)
+    if cursor:
+        queryset = queryset.filter(**{f'{pk_field}__gt': int(cursor)})
+
+    # On lit une ligne de plus pour savoir s'il existe une page suivante
+    objets = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(objets) > limit:
+        objets = objets[:limit]
+        next_cursor = getattr(objets[-1], pk_field)
+    return objets, next_cursor
+
+
+def lots_par_curseur(queryset, pk_field, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Parcourt le queryset par ordre de `pk_field` et génère des listes d'au plus `chunk_size`
+    objets, une requête par lot (keyset : `pk_field` > dernière clé lue, via `paginer_par_curseur`).
+    Contrairement à .iterator(), qui avec mysqlclient charge tout le résultat côté client,
+    seul le lot courant est en mémoire.
+    """
+    params = {'limit': chunk_size}
+    while True:
+        objets, next_cursor = paginer_par_curseur(queryset, pk_field, params)
+        if objets:
+            yield objets
+        if next_cursor is None:
+            return
+        params['cursor'] = next_cursor
+
+
+def reponse_streaming(queryset, serializer_class, pk_field, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Construit une réponse JSON (tableau) envoyée par morceaux : le queryset est lu et
+    sérialisé par lots (voir `lots_par_curseur`), la mémoire reste donc constante.
+    """
+    def generer():
+        yield '['
+        premier = True
+        for lot in lots_par_curseur(queryset, pk_field, chunk_size):
+            yield _serialiser_lot(lot, serializer_class, premier)
+            premier = False
+        yield ']'
+
+    return StreamingHttpResponse(generer(), content_type='application/json')
+
+
+def _serialiser_lot(lot, serializer_class, premier):
+    contenu = ','.join(
+        json.dumps(item, cls=JSONEncoder, ensure_ascii=False)
+        for item in serializer_class(lot, many=True).data
+    )
+    return contenu if premier else ',' + contenu
@@ -12,4 +12,10 @@ class IsLaborantin(permissions.BasePermission):
     
     def has_permission(self, request, view):
         # Vérifie si l'utilisateur a un rôle "patient" ou "medecin"
-        return request.user.is_authenticated and request.user.role in ['laborantin']     
\ No newline at end of file
+        return request.user.is_authenticated and request.user.role in ['laborantin']
+
+class IsLaborantinOrMedecin(permissions.BasePermission):
+
+    def has_permission(self, request, view):
+        # Laborantins, et médecins qui attendent les résultats d'un patient (flux des analyses)
+        return request.user.is_authenticated and request.user.role in ['laborantin', 'medecin']
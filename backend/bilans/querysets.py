@@ -0,0 +1,32 @@
+class QuerysetOptimiseMixin:
+    """
+    Mixin pour les serializers des bilans : chaque serializer déclare dans sa Meta
+    les relations qu'il lit (select_related / prefetch_related) et les colonnes
+    nécessaires (only). Les vues appellent `optimiser_queryset` pour charger
+    exactement ces données en un nombre de requêtes indépendant du nombre de lignes.
+    """
+
+    @classmethod
+    def optimiser_queryset(cls, queryset):
+        meta = cls.Meta
+        select_related = getattr(meta, 'select_related', ())
+        prefetch_related = getattr(meta, 'prefetch_related', ())
+        only = getattr(meta, 'only', ())
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if only:
+            queryset = queryset.only(*only)
+        return queryset
+
+
+def optimiser_queryset(queryset, serializer_class):
+    """
+    Applique les besoins déclarés par `serializer_class` au queryset,
+    sans effet si le serializer ne les déclare pas.
+    """
+    if issubclass(serializer_class, QuerysetOptimiseMixin):
+        return serializer_class.optimiser_queryset(queryset)
+    return queryset
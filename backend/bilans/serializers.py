@@ -1,7 +1,8 @@
 from rest_framework import serializers
-from .models import AnalyseBiologique, ImageRadiologique
+from .models import AnalyseBiologique, ImageRadiologique, ParametreAnalyse
+from .querysets import QuerysetOptimiseMixin
 
-class ImageRadiologiqueSerializer(serializers.ModelSerializer):
+class ImageRadiologiqueSerializer(QuerysetOptimiseMixin, serializers.ModelSerializer):
     nss = serializers.CharField(source='consultation.dpi_id', read_only=True)
     date = serializers.DateField(source='consultation.date', read_only=True)
     
@@ -9,39 +10,38 @@ class ImageRadiologiqueSerializer(serializers.ModelSerializer):
         model = ImageRadiologique
         radiologue = serializers.StringRelatedField()
         fields = ['id_image_radiologique', 'type', 'url', 'compte_rendu', 'statut', 'nss', 'date','consultation_id']
+        select_related = ['consultation']
+        only = ['id_image_radiologique', 'type', 'url', 'compte_rendu', 'statut', 'updated_at', 'consultation__dpi', 'consultation__date']
 
 
-class AnalyseBiologiqueSerializer(serializers.ModelSerializer):
-    parametres = serializers.SerializerMethodField()
+class ParametreAnalyseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ParametreAnalyse
+        fields = ['parametre', 'valeur']
+
+
+class AnalyseBiologiqueSerializer(QuerysetOptimiseMixin, serializers.ModelSerializer):
+    parametres = ParametreAnalyseSerializer(many=True, read_only=True)
     nss = serializers.CharField(source='consultation.dpi_id', read_only=True)
     date = serializers.DateField(source='consultation.date', read_only=True)
 
     class Meta:
         model = AnalyseBiologique
         fields = ['id_analyse_biologique', 'type', 'parametres', 'statut', 'nss', 'date','consultation_id']
-
-    def get_parametres(self, obj):
-        """
-        Convertit les champs parametre_analyse et valeur en une liste de dictionnaires.
-        """
-        parametres = obj.parametre_analyse.split('#') if obj.parametre_analyse else []
-        valeurs = obj.valeur.split('#') if obj.valeur else []
-        
-        # Associer chaque paramètre avec sa valeur
-        parametres_valeurs = [
-            {"parametre": param, "valeur": float(val) if val else None}
-            for param, val in zip(parametres, valeurs)
-        ]
-        return parametres_valeurs
+        select_related = ['consultation']
+        prefetch_related = ['parametres']
+        only = ['id_analyse_biologique', 'type', 'statut', 'updated_at', 'consultation__dpi', 'consultation__date']
 
 
 # Custom Serializer for ImageRadiologique
-class CustomImageRadiologiqueSerializer(serializers.ModelSerializer):
+class CustomImageRadiologiqueSerializer(QuerysetOptimiseMixin, serializers.ModelSerializer):
     nss = serializers.CharField(source='consultation.dpi_id', read_only=True)
     date = serializers.DateField(source='consultation.date', read_only=True)
     class Meta:
         model = ImageRadiologique
         fields = ['id_image_radiologique', 'type', 'url', 'compte_rendu', 'radiologue_id', 'statut', 'nss', 'date','consultation_id']
+        select_related = ['consultation']
+        only = ['id_image_radiologique', 'type', 'url', 'compte_rendu', 'radiologue', 'statut', 'updated_at', 'consultation__dpi', 'consultation__date']
     
 
 class ImageRadiologiqueUpdateSerializer(serializers.ModelSerializer):
@@ -51,6 +51,8 @@ class ImageRadiologiqueUpdateSerializer(serializers.ModelSerializer):
 
 
 class AnalyseBiologiqueUpdateSerializer(serializers.ModelSerializer):
+    parametres = ParametreAnalyseSerializer(many=True, read_only=True)
+
     class Meta:
         model = AnalyseBiologique
-        fields = ['parametre_analyse', 'valeur', 'laborantin', 'statut']
\ No newline at end of file
+        fields = ['parametres', 'laborantin', 'statut']
\ No newline at end of file
@@ -0,0 +1,455 @@
+import json
+import time
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from DPI.models import DPI
+from accounts.tokens import RoleRefreshToken
+from consultations.models import Consultation
+from .models import AnalyseBiologique, ImageRadiologique, ParametreAnalyse
+from .pagination import lots_par_curseur
+
+User = get_user_model()
+
+
+@pytest.fixture
+def api_client():
+    """Provides an instance of the DRF APIClient for each test."""
+    return APIClient()
+
+
+@pytest.fixture
+def radiologue_user(db):
+    """Create and return a user with the 'radiologue' role."""
+    return User.objects.create_user(
+        email='radiologue@example.com',
+        nom='RadiologueUser',
+        password='password123',
+        role='radiologue',
+        specialite='other'
+    )
+
+
+@pytest.fixture
+def laborantin_user(db):
+    """Create and return a user with the 'laborantin' role."""
+    return User.objects.create_user(
+        email='laborantin@example.com',
+        nom='LaborantinUser',
+        password='password123',
+        role='laborantin',
+        specialite='other'
+    )
+
+
+@pytest.fixture
+def consultation(db):
+    """Create and return a consultation attached to a new DPI."""
+    patient = User.objects.create_user(
+        email='patient@example.com',
+        nom='PatientUser',
+        password='password123',
+        role='patient',
+        specialite='other'
+    )
+    medecin = User.objects.create_user(
+        email='medecin@example.com',
+        nom='MedecinUser',
+        password='password123',
+        role='medecin',
+        specialite='other'
+    )
+    dpi = DPI.objects.create(
+        nss='123456789',
+        date_naissance='1990-01-01',
+        telephone='0606060606',
+        adresse='Patient Address',
+        mutuelle='TestMutuelle',
+        sexe='M',
+        patient=patient,
+    )
+    return Consultation.objects.create(date='2024-01-01', dpi=dpi, medecin=medecin)
+
+
+@pytest.mark.django_db
+class TestGetRadiologueImages:
+    """Test suite for the getRadiologueImages view."""
+
+    def test_liste_complete(self, api_client, radiologue_user, consultation):
+        """Sans paramètre, la liste complète est renvoyée comme avant."""
+        for i in range(3):
+            ImageRadiologique.objects.create(type=f'IRM{i}', consultation=consultation)
+
+        api_client.force_authenticate(user=radiologue_user)
+        response = api_client.get(reverse('get_all_images_radiologiques'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 3
+
+    def test_pagination_par_curseur(self, api_client, radiologue_user, consultation):
+        """Les pages s'enchaînent via next_cursor sans doublon."""
+        images = [ImageRadiologique.objects.create(type='IRM', consultation=consultation) for _ in range(5)]
+
+        api_client.force_authenticate(user=radiologue_user)
+        url = reverse('get_all_images_radiologiques')
+        page1 = api_client.get(url, {'limit': 2}).data
+        page2 = api_client.get(url, {'limit': 2, 'cursor': page1['next_cursor']}).data
+        page3 = api_client.get(url, {'limit': 2, 'cursor': page2['next_cursor']}).data
+
+        ids = [item['id_image_radiologique'] for page in (page1, page2, page3) for item in page['results']]
+        assert ids == [image.id_image_radiologique for image in images]
+        assert page3['next_cursor'] is None
+
+    def test_pagination_parametre_invalide(self, api_client, radiologue_user):
+        api_client.force_authenticate(user=radiologue_user)
+        response = api_client.get(reverse('get_all_images_radiologiques'), {'limit': 'abc'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.parametrize('params', [{'date': 'abc'}, {'date_fin': '2020-13-45'}])
+    def test_filtre_date_invalide(self, api_client, radiologue_user, params):
+        api_client.force_authenticate(user=radiologue_user)
+        response = api_client.get(reverse('get_all_images_radiologiques'), params)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_filtre_statut(self, api_client, radiologue_user, consultation):
+        ImageRadiologique.objects.create(type='IRM', consultation=consultation, statut='terminé')
+        ImageRadiologique.objects.create(type='IRM', consultation=consultation)
+
+        api_client.force_authenticate(user=radiologue_user)
+        response = api_client.get(reverse('get_all_images_radiologiques'), {'statut': 'pas_terminé'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['statut'] for item in response.data] == ['pas_terminé']
+
+
+@pytest.mark.django_db
+class TestGetAllAnalysesBiologiques:
+    """Test suite for the getAllAnalysesBiologiques view."""
+
+    def test_streaming(self, api_client, laborantin_user, consultation):
+        """Le mode streaming renvoie un tableau JSON identique à la liste complète."""
+        for i in range(3):
+            AnalyseBiologique.objects.create(type=f'Bilan{i}', consultation=consultation)
+
+        api_client.force_authenticate(user=laborantin_user)
+        url = reverse('get_all_analyses_biologiques')
+        response = api_client.get(url, {'stream': '1'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        data = json.loads(b''.join(response.streaming_content))
+        assert [item['type'] for item in data] == ['Bilan0', 'Bilan1', 'Bilan2']
+
+    def test_streaming_par_lots_keyset(self, consultation, django_assert_num_queries):
+        """Chaque lot est une requête bornée sur la clé primaire, sans curseur serveur."""
+        analyses = [AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation) for _ in range(5)]
+
+        with django_assert_num_queries(3) as requetes:
+            lots = list(lots_par_curseur(AnalyseBiologique.objects.all(), 'id_analyse_biologique', chunk_size=2))
+
+        assert [[a.id_analyse_biologique for a in lot] for lot in lots] == [
+            [a.id_analyse_biologique for a in analyses[i:i + 2]] for i in (0, 2, 4)
+        ]
+        assert all('LIMIT 3' in requete['sql'] for requete in requetes.captured_queries)
+
+    def test_filtre_type(self, api_client, laborantin_user, consultation):
+        AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation)
+        AnalyseBiologique.objects.create(type='NFS', consultation=consultation)
+
+        api_client.force_authenticate(user=laborantin_user)
+        response = api_client.get(reverse('get_all_analyses_biologiques'), {'type': 'NFS', 'limit': 10})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['type'] for item in response.data['results']] == ['NFS']
+
+    def test_filtre_plage_de_valeurs(self, api_client, laborantin_user, consultation):
+        """Les analyses sont filtrées en SQL sur la valeur d'un paramètre."""
+        for valeur in (0.9, 1.3, 2.0):
+            analyse = AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation)
+            ParametreAnalyse.objects.create(analyse=analyse, parametre='glycemie', valeur=valeur)
+            ParametreAnalyse.objects.create(analyse=analyse, parametre='hba1c', valeur=5.0)
+
+        api_client.force_authenticate(user=laborantin_user)
+        response = api_client.get(
+            reverse('get_all_analyses_biologiques'),
+            {'parametre': 'glycemie', 'valeur_min': '1.26', 'valeur_max': '1.5'}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 1
+        assert response.data[0]['parametres'] == [
+            {'parametre': 'glycemie', 'valeur': 1.3},
+            {'parametre': 'hba1c', 'valeur': 5.0},
+        ]
+
+
+@pytest.mark.django_db
+class TestRemplirAnalyseBiologique:
+    """Test suite for the remplir_analyse_biologique view."""
+
+    def test_remplir_success(self, api_client, laborantin_user, consultation):
+        analyse = AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation)
+
+        api_client.force_authenticate(user=laborantin_user)
+        data = {
+            'id_analyse_biologique': analyse.id_analyse_biologique,
+            'parametres': [
+                {'parametre': 'glycemie', 'valeur': '1.26'},
+                {'parametre': 'hba1c', 'valeur': 6},
+            ],
+        }
+        response = api_client.put(reverse('remplir-analyse-biologique'), data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        analyse.refresh_from_db()
+        assert analyse.statut == 'terminé'
+        assert list(analyse.parametres.values_list('parametre', 'valeur')) == [('glycemie', 1.26), ('hba1c', 6.0)]
+
+    def test_remplir_valeur_non_numerique(self, api_client, laborantin_user, consultation):
+        analyse = AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation)
+
+        api_client.force_authenticate(user=laborantin_user)
+        data = {
+            'id_analyse_biologique': analyse.id_analyse_biologique,
+            'parametres': [{'parametre': 'glycemie', 'valeur': 'élevée'}],
+        }
+        response = api_client.put(reverse('remplir-analyse-biologique'), data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not ParametreAnalyse.objects.exists()
+
+
+@pytest.mark.django_db
+class TestNombreDeRequetes:
+    """
+    Le nombre de requêtes SQL des listes de bilans ne doit pas dépendre du nombre de lignes.
+    """
+
+    @pytest.mark.parametrize('url_name, params', [
+        ('get_all_images_radiologiques', {}),
+        ('get_all_images_radiologiques', {'limit': 50}),
+        ('get_all_images_radiologiques', {'stream': '1'}),
+        ('get_all_analyses_biologiques', {}),
+        ('get_all_analyses_biologiques', {'limit': 50}),
+        ('get_all_analyses_biologiques', {'stream': '1'}),
+        ('get_images_radiologiques', {'nss': '123456789'}),
+        ('get_analyse_biologiques', {'nss': '123456789'}),
+    ])
+    def test_pas_de_requetes_n_plus_1(self, api_client, radiologue_user, laborantin_user, consultation, url_name, params):
+        user = laborantin_user if 'analyses' in url_name else radiologue_user
+        if url_name in ('get_images_radiologiques', 'get_analyse_biologiques'):
+            user = User.objects.create_user(
+                email='medecin2@example.com', nom='Medecin2', password='password123', role='medecin', specialite='other'
+            )
+        api_client.force_authenticate(user=user)
+
+        def compter_requetes():
+            with CaptureQueriesContext(connection) as ctx:
+                response = api_client.get(reverse(url_name), params)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            assert response.status_code == status.HTTP_200_OK
+            return len(ctx.captured_queries)
+
+        def ajouter_bilans(n):
+            for _ in range(n):
+                ImageRadiologique.objects.create(type='IRM', consultation=consultation)
+                analyse = AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation)
+                ParametreAnalyse.objects.create(analyse=analyse, parametre='glycemie', valeur=1.1)
+
+        ajouter_bilans(1)
+        avec_une_ligne = compter_requetes()
+        ajouter_bilans(10)
+        assert compter_requetes() == avec_une_ligne
+
+
+@pytest.mark.django_db
+class TestBilansAsync:
+    """Les vues asynchrones renvoient les mêmes données que les vues synchrones."""
+
+    @pytest.mark.parametrize('url_name', ['analyses_biologiques', 'images_radiologiques'])
+    def test_meme_contenu_que_la_vue_synchrone(self, api_client, radiologue_user, consultation, url_name):
+        analyse = AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation)
+        ParametreAnalyse.objects.create(analyse=analyse, parametre='glycemie', valeur=1.1)
+        ImageRadiologique.objects.create(type='IRM', consultation=consultation)
+        params = {'nss': '123456789'}
+
+        api_client.force_authenticate(user=radiologue_user)
+        sync_name = 'get_analyse_biologiques' if url_name == 'analyses_biologiques' else 'get_images_radiologiques'
+        synchrone = api_client.get(reverse(sync_name), params)
+
+        token = RoleRefreshToken.for_user(radiologue_user).access_token
+        response = Client(HTTP_AUTHORIZATION=f'Bearer {token}').get(reverse(f'get_{url_name}_async'), params)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == synchrone.json()
+
+    def test_nss_obligatoire(self, radiologue_user):
+        token = RoleRefreshToken.for_user(radiologue_user).access_token
+        response = Client(HTTP_AUTHORIZATION=f'Bearer {token}').get(reverse('get_images_radiologiques_async'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_role_interdit(self, laborantin_user):
+        token = RoleRefreshToken.for_user(laborantin_user).access_token
+        response = Client(HTTP_AUTHORIZATION=f'Bearer {token}').get(reverse('get_images_radiologiques_async'), {'nss': '1'})
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestFluxDeChangements:
+    """Flux incrémental des bilans : watermark 'since', pagination et long-poll."""
+
+    @pytest.fixture(autouse=True)
+    def sans_marge(self, settings):
+        settings.FLUX_CHANGEMENTS_MARGE = 0
+
+
+    def test_seuls_les_changements_sont_renvoyes(self, api_client, laborantin_user, consultation):
+        analyses = [AnalyseBiologique.objects.create(type=f'Analyse {i}', consultation=consultation) for i in range(3)]
+        api_client.force_authenticate(user=laborantin_user)
+        url = reverse('changements_analyses_biologiques')
+
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert [a['id_analyse_biologique'] for a in response.data['results']] == [a.id_analyse_biologique for a in analyses]
+        assert response.data['has_more'] is False
+        since = response.data['since']
+
+        response = api_client.get(url, {'since': since})
+        assert response.data['results'] == []
+        assert response.data['since'] == since
+
+        api_client.put(reverse('remplir-analyse-biologique'), {
+            'id_analyse_biologique': analyses[1].id_analyse_biologique,
+            'parametres': [{'parametre': 'glycemie', 'valeur': '1.1'}],
+        }, format='json')
+
+        response = api_client.get(url, {'since': since})
+        assert [a['id_analyse_biologique'] for a in response.data['results']] == [analyses[1].id_analyse_biologique]
+        assert response.data['results'][0]['statut'] == 'terminé'
+        assert response.data['since'] != since
+
+    def test_pagination_du_flux(self, api_client, radiologue_user, consultation):
+        images = [ImageRadiologique.objects.create(type='IRM', consultation=consultation) for _ in range(5)]
+        api_client.force_authenticate(user=radiologue_user)
+        url = reverse('changements_images_radiologiques')
+
+        recues, since = [], None
+        while True:
+            params = {'limit': 2, **({'since': since} if since else {})}
+            response = api_client.get(url, params)
+            recues += [i['id_image_radiologique'] for i in response.data['results']]
+            since = response.data['since']
+            if not response.data['has_more']:
+                break
+
+        assert recues == [image.id_image_radiologique for image in images]
+
+    @pytest.mark.parametrize('params', [{'since': 'abc'}, {'limit': 0}, {'wait': -1}, {'date': '2024-02-30'}])
+    def test_parametres_invalides(self, api_client, radiologue_user, params):
+        api_client.force_authenticate(user=radiologue_user)
+        response = api_client.get(reverse('changements_images_radiologiques'), params)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_long_poll_sans_changement(self, api_client, radiologue_user, consultation):
+        ImageRadiologique.objects.create(type='IRM', consultation=consultation)
+        api_client.force_authenticate(user=radiologue_user)
+        url = reverse('changements_images_radiologiques')
+        since = api_client.get(url).data['since']
+
+        response = api_client.get(url, {'since': since, 'wait': 0.2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'results': [], 'since': since, 'has_more': False}
+
+    def test_modifications_recentes_retenues(self, api_client, laborantin_user, consultation, settings):
+        """Une modification plus récente que la marge n'est pas encore servie, et le watermark n'avance pas."""
+        settings.FLUX_CHANGEMENTS_MARGE = 60
+        AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation)
+        api_client.force_authenticate(user=laborantin_user)
+
+        response = api_client.get(reverse('changements_analyses_biologiques'))
+
+        assert response.data == {'results': [], 'since': None, 'has_more': False}
+
+    def test_long_poll_synchrone_plafonne(self, api_client, radiologue_user, consultation):
+        ImageRadiologique.objects.create(type='IRM', consultation=consultation)
+        api_client.force_authenticate(user=radiologue_user)
+        url = reverse('changements_images_radiologiques')
+        since = api_client.get(url).data['since']
+
+        debut = time.monotonic()
+        response = api_client.get(url, {'since': since, 'wait': 25})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert time.monotonic() - debut < 5
+
+    def test_flux_des_analyses_pour_un_medecin(self, api_client, laborantin_user, consultation):
+        """Le médecin attend le passage à 'terminé' des analyses d'un patient, sans relire toute la liste."""
+        autre = DPI.objects.create(nss='987654321', date_naissance='1990-01-01', telephone='0606060606', adresse='A',
+                                   mutuelle='M', sexe='F', patient=User.objects.create_user(
+                                       email='autre@example.com', nom='Autre', password='x', role='patient', specialite='other'))
+        analyse = AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation)
+        AnalyseBiologique.objects.create(type='Glycémie', consultation=Consultation.objects.create(
+            date='2024-01-02', dpi=autre, medecin=consultation.medecin))
+        api_client.force_authenticate(user=consultation.medecin)
+        url = reverse('changements_analyses_biologiques')
+        since = api_client.get(url, {'nss': '123456789'}).data['since']
+
+        api_client.force_authenticate(user=laborantin_user)
+        api_client.put(reverse('remplir-analyse-biologique'), {
+            'id_analyse_biologique': analyse.id_analyse_biologique,
+            'parametres': [{'parametre': 'glycemie', 'valeur': '1.1'}],
+        }, format='json')
+
+        api_client.force_authenticate(user=consultation.medecin)
+        response = api_client.get(url, {'nss': '123456789', 'since': since})
+        assert response.status_code == status.HTTP_200_OK
+        assert [(a['id_analyse_biologique'], a['statut']) for a in response.data['results']] == [(analyse.id_analyse_biologique, 'terminé')]
+
+        token = RoleRefreshToken.for_user(consultation.medecin).access_token
+        asynchrone = Client(HTTP_AUTHORIZATION=f'Bearer {token}').get(
+            reverse('changements_analyses_biologiques_async'), {'nss': '123456789', 'since': since})
+        assert asynchrone.json() == response.json()
+
+    def test_flux_des_analyses_nss_obligatoire_pour_un_medecin(self, api_client, consultation):
+        api_client.force_authenticate(user=consultation.medecin)
+        token = RoleRefreshToken.for_user(consultation.medecin).access_token
+
+        assert api_client.get(reverse('changements_analyses_biologiques')).status_code == status.HTTP_400_BAD_REQUEST
+        assert Client(HTTP_AUTHORIZATION=f'Bearer {token}').get(
+            reverse('changements_analyses_biologiques_async')).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_flux_des_analyses_interdit_aux_patients(self, api_client, consultation):
+        patient = User.objects.get(email='patient@example.com')
+        api_client.force_authenticate(user=patient)
+        token = RoleRefreshToken.for_user(patient).access_token
+
+        assert api_client.get(reverse('changements_analyses_biologiques')).status_code == status.HTTP_403_FORBIDDEN
+        assert Client(HTTP_AUTHORIZATION=f'Bearer {token}').get(
+            reverse('changements_analyses_biologiques_async')).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_flux_asynchrone(self, api_client, laborantin_user, consultation):
+        AnalyseBiologique.objects.create(type='Glycémie', consultation=consultation)
+        api_client.force_authenticate(user=laborantin_user)
+        synchrone = api_client.get(reverse('changements_analyses_biologiques'), {'nss': '123456789'})
+
+        token = RoleRefreshToken.for_user(laborantin_user).access_token
+        response = Client(HTTP_AUTHORIZATION=f'Bearer {token}').get(
+            reverse('changements_analyses_biologiques_async'), {'nss': '123456789'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == synchrone.json()
+        assert len(response.json()['results']) == 1
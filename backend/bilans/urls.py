@@ -6,6 +6,8 @@ urlpatterns = [
     path('analyses-biologiques/all/', views.getAllAnalysesBiologiques, name='get_all_analyses_biologiques'),
     path('images-radiologiques/', views.get_images_radiologiques, name='get_images_radiologiques'),
     path('analyses-biologiques/', views.get_analyses_biologiques, name='get_analyse_biologiques'),
+    path('images-radiologiques/changements/', views.changements_images_radiologiques, name='changements_images_radiologiques'),
+    path('analyses-biologiques/changements/', views.changements_analyses_biologiques, name='changements_analyses_biologiques'),
 
     path('remplir-image-radiologique/', views.remplir_image_radiologique, name='remplir_image_radiologique'),
     path('remplir-analyse-biologique/', views.remplir_analyse_biologique, name='remplir-analyse-biologique'),
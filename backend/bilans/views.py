@@ -1,18 +1,22 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
-from .models import  ImageRadiologique, AnalyseBiologique
+from .models import  ImageRadiologique, AnalyseBiologique, ParametreAnalyse
 from DPI.models import DPI
 from .serializers import ImageRadiologiqueSerializer, AnalyseBiologiqueSerializer,CustomImageRadiologiqueSerializer
 from DPI.permissions import IsPatientOrMedecinOrInfirmierOrRadiologue
 from .serializers import ImageRadiologiqueSerializer, AnalyseBiologiqueSerializer
 from DPI.permissions import IsPatientOrMedecin
-from .permissions import IsRadiologue, IsLaborantin
+from .permissions import IsRadiologue, IsLaborantin, IsLaborantinOrMedecin
 from .serializers import ImageRadiologiqueUpdateSerializer
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from .serializers import AnalyseBiologiqueUpdateSerializer
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from .querysets import optimiser_queryset
+from .pagination import lire_date, filtrer_bilans, filtrer_parametres, demande_pagination, demande_streaming, paginer_par_curseur, reponse_streaming, MAX_PAGE_SIZE
+from .changements import lire_parametres_flux, changements_depuis, page_de_changements, LONG_POLL_MAX, LONG_POLL_MAX_SYNCHRONE, LONG_POLL_INTERVAL
+import time
+from backend.docs import openapi, swagger_auto_schema
 
 @swagger_auto_schema(
     method='get',
@@ -29,19 +33,22 @@ def get_images_radiologiques(request):
     Récupère les images radiologiques d'un patient (NSS requis).
     """
     nss = request.query_params.get('nss')
-    date = request.query_params.get('date')
 
     if not nss:
         return Response({'detail': 'Le champ NSS est obligatoire.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date = lire_date(request.query_params, 'date')
+    except ValueError as erreur:
+        return Response({'detail': str(erreur)}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
         # Récupérer le DPI
-        dpi = DPI.objects.get(nss=nss)
+        dpi = DPI.visibles.get(nss=nss)
     except DPI.DoesNotExist:
         return Response({'detail': 'DPI non trouvé avec ce NSS.'}, status=status.HTTP_404_NOT_FOUND)
 
     # Filtrer les images radiologiques par DPI et éventuellement par date de consultation
-    images = ImageRadiologique.objects.filter(consultation__dpi=dpi).select_related('consultation')
+    images = optimiser_queryset(ImageRadiologique.visibles.filter(consultation__dpi=dpi), ImageRadiologiqueSerializer)
 
     if date:
         images = images.filter(consultation__date__gt=date)
@@ -66,19 +73,22 @@ def get_analyses_biologiques(request):
     Récupère les analyses biologiques d'un patient (NSS requis).
     """
     nss = request.query_params.get('nss')
-    date = request.query_params.get('date')
 
     if not nss:
         return Response({'detail': 'Le champ NSS est obligatoire.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        date = lire_date(request.query_params, 'date')
+    except ValueError as erreur:
+        return Response({'detail': str(erreur)}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
         # Récupérer le DPI
-        dpi = DPI.objects.get(nss=nss)
+        dpi = DPI.visibles.get(nss=nss)
     except DPI.DoesNotExist:
         return Response({'detail': 'DPI non trouvé avec ce NSS.'}, status=status.HTTP_404_NOT_FOUND)
 
     # Filtrer les analyses biologiques par DPI et éventuellement par date de consultation
-    analyses = AnalyseBiologique.objects.filter(consultation__dpi=dpi).select_related('consultation')
+    analyses = optimiser_queryset(AnalyseBiologique.visibles.filter(consultation__dpi=dpi), AnalyseBiologiqueSerializer)
 
     if date:
         analyses = analyses.filter(consultation__date__gt=date)
@@ -87,9 +97,50 @@ def get_analyses_biologiques(request):
     serializer = AnalyseBiologiqueSerializer(analyses, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
+liste_bilans_parameters = [
+    openapi.Parameter('statut', openapi.IN_QUERY, description="Filtrer par statut ('terminé' ou 'pas_terminé')", type=openapi.TYPE_STRING, required=False),
+    openapi.Parameter('type', openapi.IN_QUERY, description="Filtrer par type de bilan", type=openapi.TYPE_STRING, required=False),
+    openapi.Parameter('date', openapi.IN_QUERY, description="Consultations après cette date (format YYYY-MM-DD)", type=openapi.TYPE_STRING, required=False),
+    openapi.Parameter('date_fin', openapi.IN_QUERY, description="Consultations jusqu'à cette date incluse (format YYYY-MM-DD)", type=openapi.TYPE_STRING, required=False),
+    openapi.Parameter('cursor', openapi.IN_QUERY, description="Curseur renvoyé par la page précédente (active la pagination)", type=openapi.TYPE_INTEGER, required=False),
+    openapi.Parameter('limit', openapi.IN_QUERY, description=f"Taille de page (active la pagination, max {MAX_PAGE_SIZE})", type=openapi.TYPE_INTEGER, required=False),
+    openapi.Parameter('stream', openapi.IN_QUERY, description="Envoyer la liste complète en streaming JSON (1/true)", type=openapi.TYPE_BOOLEAN, required=False),
+]
+
+
+def lister_bilans(request, queryset, serializer_class, pk_field):
+    """
+    Liste des bilans filtrée en SQL, puis selon les paramètres :
+    - pagination par curseur sur `pk_field` si 'cursor' ou 'limit' est fourni,
+    - réponse JSON en streaming si 'stream' est fourni,
+    - sinon la liste complète (comportement historique).
+    """
+    params = request.query_params
+    try:
+        queryset = optimiser_queryset(filtrer_bilans(queryset, params), serializer_class)
+    except ValueError as erreur:
+        return Response({'detail': str(erreur)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if demande_pagination(params):
+        try:
+            objets, next_cursor = paginer_par_curseur(queryset, pk_field, params)
+        except ValueError:
+            return Response({'detail': "Les paramètres 'cursor' et 'limit' doivent être des entiers positifs."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = serializer_class(objets, many=True)
+        return Response({'results': serializer.data, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
+
+    queryset = queryset.order_by(pk_field)
+    if demande_streaming(params):
+        return reponse_streaming(queryset, serializer_class, pk_field)
+
+    serializer = serializer_class(queryset, many=True)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 @swagger_auto_schema(
     method='get',
-    responses={200: CustomImageRadiologiqueSerializer(many=True)}
+    manual_parameters=liste_bilans_parameters,
+    responses={200: CustomImageRadiologiqueSerializer(many=True), 400: "Paramètres de pagination invalides"}
 )
 @api_view(['GET'])
 @permission_classes([IsPatientOrMedecinOrInfirmierOrRadiologue])
@@ -97,14 +148,17 @@ def getRadiologueImages(request):
     """
     Récupère toutes les images radiologiques disponibles pour un radiologue.
     """
-    user_id = request.user.id
-    images = ImageRadiologique.objects.all()
-    serializer = CustomImageRadiologiqueSerializer(images, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    images = ImageRadiologique.visibles.all()
+    return lister_bilans(request, images, CustomImageRadiologiqueSerializer, 'id_image_radiologique')
 
 @swagger_auto_schema(
     method='get',
-    responses={200: AnalyseBiologiqueSerializer(many=True)}
+    manual_parameters=liste_bilans_parameters + [
+        openapi.Parameter('parametre', openapi.IN_QUERY, description="Nom du paramètre mesuré (ex. glycemie)", type=openapi.TYPE_STRING, required=False),
+        openapi.Parameter('valeur_min', openapi.IN_QUERY, description="Valeur minimale (incluse) du paramètre", type=openapi.TYPE_NUMBER, required=False),
+        openapi.Parameter('valeur_max', openapi.IN_QUERY, description="Valeur maximale (incluse) du paramètre", type=openapi.TYPE_NUMBER, required=False),
+    ],
+    responses={200: AnalyseBiologiqueSerializer(many=True), 400: "Paramètres de pagination ou de filtre invalides"}
 )
 @api_view(['GET'])
 @permission_classes([IsLaborantin])
@@ -112,10 +166,111 @@ def getAllAnalysesBiologiques(request):
     """
     Récupère toutes les analyses biologiques disponibles pour un laborantin.
     """
-    user_id = request.user.id
-    analyses = AnalyseBiologique.objects.all()
-    serializer = AnalyseBiologiqueSerializer(analyses, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    try:
+        analyses = filtrer_parametres(AnalyseBiologique.visibles.all(), request.query_params)
+    except ValueError:
+        return Response({'detail': "Les paramètres 'valeur_min' et 'valeur_max' doivent être numériques."}, status=status.HTTP_400_BAD_REQUEST)
+    return lister_bilans(request, analyses, AnalyseBiologiqueSerializer, 'id_analyse_biologique')
+
+
+flux_parameters = [
+    openapi.Parameter('since', openapi.IN_QUERY, description="Watermark renvoyé par l'appel précédent (absent : depuis le début)", type=openapi.TYPE_STRING, required=False),
+    openapi.Parameter('limit', openapi.IN_QUERY, description=f"Nombre maximal de changements renvoyés (max {MAX_PAGE_SIZE})", type=openapi.TYPE_INTEGER, required=False),
+    openapi.Parameter('wait', openapi.IN_QUERY, description=f"Long-poll : secondes d'attente s'il n'y a aucun changement (max {LONG_POLL_MAX_SYNCHRONE} ; jusqu'à {LONG_POLL_MAX} avec /api/async/)", type=openapi.TYPE_NUMBER, required=False),
+    openapi.Parameter('nss', openapi.IN_QUERY, description="Limiter le flux aux bilans d'un patient", type=openapi.TYPE_STRING, required=False),
+    openapi.Parameter('statut', openapi.IN_QUERY, description="Filtrer par statut ('terminé' ou 'pas_terminé')", type=openapi.TYPE_STRING, required=False),
+    openapi.Parameter('type', openapi.IN_QUERY, description="Filtrer par type de bilan", type=openapi.TYPE_STRING, required=False),
+]
+
+flux_response = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+        'since': openapi.Schema(type=openapi.TYPE_STRING, description="Watermark à renvoyer au prochain appel"),
+        'has_more': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="D'autres changements sont disponibles immédiatement"),
+    },
+)
+
+
+def filtrer_flux(queryset, serializer_class, params):
+    """
+    Filtres du flux de changements ('nss', 'statut', 'type') et chargement optimisé des relations.
+    Lève ValueError si un filtre de date est invalide.
+    """
+    queryset = optimiser_queryset(filtrer_bilans(queryset, params), serializer_class)
+    if params.get('nss'):
+        queryset = queryset.filter(consultation__dpi=params['nss'])
+    return queryset
+
+
+NSS_EXIGE = "Le paramètre 'nss' est obligatoire pour un médecin."
+
+
+def nss_exige(user, params):
+    """
+    Les médecins ne lisent le flux des analyses que pour un patient : 'nss' leur est obligatoire.
+    """
+    return user.role == 'medecin' and not params.get('nss')
+
+
+def flux_de_changements(request, queryset, serializer_class, pk_field):
+    """
+    Bilans créés ou modifiés depuis le watermark 'since'. Avec 'wait', la requête reste
+    ouverte jusqu'à l'arrivée d'un changement ou l'expiration du délai, limité ici à
+    LONG_POLL_MAX_SYNCHRONE : l'attente occupe un thread du worker (voir async_views).
+    """
+    params = request.query_params
+    try:
+        since, limit, wait = lire_parametres_flux(params, LONG_POLL_MAX_SYNCHRONE)
+    except ValueError:
+        return Response({'detail': "Paramètres 'since', 'limit' ou 'wait' invalides."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        queryset = filtrer_flux(queryset, serializer_class, params)
+    except ValueError as erreur:
+        return Response({'detail': str(erreur)}, status=status.HTTP_400_BAD_REQUEST)
+    echeance = time.monotonic() + wait
+    while True:
+        objets = list(changements_depuis(queryset, pk_field, since, limit))
+        restant = echeance - time.monotonic()
+        if objets or restant <= 0:
+            break
+        time.sleep(min(LONG_POLL_INTERVAL, restant))
+
+    objets, since, has_more = page_de_changements(objets, pk_field, since, limit)
+    serializer = serializer_class(objets, many=True)
+    return Response({'results': serializer.data, 'since': since, 'has_more': has_more}, status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=flux_parameters,
+    responses={200: flux_response, 400: "Paramètres invalides"}
+)
+@api_view(['GET'])
+@permission_classes([IsPatientOrMedecinOrInfirmierOrRadiologue])
+def changements_images_radiologiques(request):
+    """
+    Flux des images radiologiques créées ou modifiées depuis le watermark 'since'.
+    """
+    return flux_de_changements(request, ImageRadiologique.visibles.all(), CustomImageRadiologiqueSerializer, 'id_image_radiologique')
+
+
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=flux_parameters,
+    responses={200: flux_response, 400: "Paramètres invalides, ou 'nss' absent pour un médecin"}
+)
+@api_view(['GET'])
+@permission_classes([IsLaborantinOrMedecin])
+def changements_analyses_biologiques(request):
+    """
+    Flux des analyses biologiques créées ou modifiées (ex. passage au statut 'terminé')
+    depuis le watermark 'since'. Les médecins le lisent pour un patient ('nss').
+    """
+    if nss_exige(request.user, request.query_params):
+        return Response({'detail': NSS_EXIGE}, status=status.HTTP_400_BAD_REQUEST)
+    return flux_de_changements(request, AnalyseBiologique.visibles.all(), AnalyseBiologiqueSerializer, 'id_analyse_biologique')
 
 
 @swagger_auto_schema(
@@ -144,7 +299,7 @@ def remplir_image_radiologique(request):
         image_id = data.get('id_image_radiologique')
         # Vérifier si l'image existe
         try:
-            image = ImageRadiologique.objects.get(id_image_radiologique=image_id)
+            image = ImageRadiologique.visibles.get(id_image_radiologique=image_id)
         except ImageRadiologique.DoesNotExist:
             return Response({"detail": "Image radiologique introuvable."}, status=status.HTTP_404_NOT_FOUND)
         # Mettre à jour les champs manquants
@@ -197,7 +352,7 @@ def remplir_analyse_biologique(request):
             return Response({"detail": "L'ID de l'analyse biologique est obligatoire."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Vérifier si l'analyse existe
-        analyse = get_object_or_404(AnalyseBiologique, id_analyse_biologique=analyse_id)
+        analyse = get_object_or_404(AnalyseBiologique.visibles, id_analyse_biologique=analyse_id)
 
         # Récupérer les paramètres et valeurs envoyés
         parametres = data.get("parametres", [])
@@ -205,20 +360,31 @@ def remplir_analyse_biologique(request):
         if not parametres:
             return Response({"detail": "Les paramètres sont obligatoires."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Convertir les paramètres et valeurs en chaînes séparées par '#'
-        parametre_analyse = '#'.join([item['parametre'] for item in parametres])
-        valeur = '#'.join([str(item['valeur']) for item in parametres])
+        # Convertir chaque valeur en nombre (une valeur vide est enregistrée à NULL)
+        try:
+            mesures = [
+                ParametreAnalyse(
+                    analyse=analyse,
+                    parametre=item['parametre'],
+                    valeur=float(item['valeur']) if item.get('valeur') not in (None, '') else None,
+                )
+                for item in parametres
+            ]
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return Response({"detail": "Chaque paramètre doit avoir un nom 'parametre' et une 'valeur' numérique."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Mettre à jour l'analyse biologique
         serializer = AnalyseBiologiqueUpdateSerializer(analyse, data={
-            "parametre_analyse": parametre_analyse,
-            "valeur": valeur,
             "laborantin": request.user.id,  # Extraire l'ID du laborantin depuis le token utilisateur
             "statut": "terminé"  # Changer le statut à "terminé"
         }, partial=True)
 
         if serializer.is_valid():
-            serializer.save()
+            # Remplacer les paramètres existants en une seule transaction
+            with transaction.atomic():
+                analyse.parametres.all().delete()
+                ParametreAnalyse.objects.bulk_create(mesures)
+                serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
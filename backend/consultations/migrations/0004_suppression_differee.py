@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0003_consultation_consultation_dpi_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultation',
+            name='supprime_le',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from DPI.models import DPI 
+from backend.suppression import VisiblesManager
 
 class Consultation(models.Model):
     """
@@ -9,6 +10,8 @@ class Consultation(models.Model):
     id_consultation = models.AutoField(primary_key=True)
     date = models.DateField()
     resume = models.TextField(blank=True, null=True)
+    # Date de suppression : la consultation est masquée immédiatement, puis purgée par lots (backend.purge)
+    supprime_le = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
 
     # Relations
     dpi = models.ForeignKey(DPI, on_delete=models.CASCADE, related_name='consultations') 
@@ -19,5 +22,13 @@ class Consultation(models.Model):
         related_name='consultations'
     )
 
+    objects = models.Manager()  # Y compris celles en attente de purge
+    visibles = VisiblesManager('supprime_le')  # Consultations non supprimées, pour l'API
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dpi', 'date'], name='consultation_dpi_date_idx'),
+        ]
+
     def __str__(self):
         return f"Consultation {self.id_consultation} pour DPI {self.dpi.id} par médecin {self.medecin.username}"
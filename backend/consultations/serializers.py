@@ -1,34 +1,64 @@
 from rest_framework import serializers
+from backend.projections import Projection
 from .models import Consultation
 from bilans.models import AnalyseBiologique, ImageRadiologique
+from medicaments.serializers import MedicamentSerializer
 
 class AnalyseBiologiqueSerializer(serializers.ModelSerializer):
     class Meta:
         model = AnalyseBiologique
-        fields = ['id', 'type', 'status']  # Include the fields you want to expose
+        fields = ['id_analyse_biologique', 'type', 'statut']  # Include the fields you want to expose
+        ref_name = 'AnalyseBiologiqueResume'  # Distinct de bilans.serializers.AnalyseBiologiqueSerializer dans le schéma OpenAPI
 
 
 class ImageRadiologiqueSerializer(serializers.ModelSerializer):
     class Meta:
         model = ImageRadiologique
-        fields = ['id', 'type', 'status']  # Include the fields you want to expose
+        fields = ['id_image_radiologique', 'type', 'statut']  # Include the fields you want to expose
+        ref_name = 'ImageRadiologiqueResume'  # Distinct de bilans.serializers.ImageRadiologiqueSerializer dans le schéma OpenAPI
 
 
 class ConsultationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Consultation
-        fields = '__all__'  # Inclut tous les champs du modèle
+        exclude = ['supprime_le']  # Tous les champs du modèle, sauf la marque de suppression interne
         extra_kwargs = {
             'resume': {'required': False}  # Ce champ n'est plus obligatoire
         }
 
 
+# Mêmes données que ConsultationSerializer, lues sans instancier les consultations
+PROJECTION_CONSULTATIONS = Projection.depuis_serializer(ConsultationSerializer)
+
+
 class ConsultationDetailSerializer(serializers.ModelSerializer):
     medecin = serializers.CharField(source='medecin.nom', read_only=True)
     dpi = serializers.CharField(source='dpi.nss', read_only=True)
-    analyses_biologiques = AnalyseBiologiqueSerializer(many=True, read_only=True, source='analysebiologique_set')
-    images_radiologiques = ImageRadiologiqueSerializer(many=True, read_only=True, source='imageradiologique_set')
+    analyses_biologiques = AnalyseBiologiqueSerializer(many=True, read_only=True)
+    images_radiologiques = ImageRadiologiqueSerializer(many=True, read_only=True)
 
     class Meta:
         model = Consultation
-        fields = ['id_consultation', 'date', 'resume', 'dpi', 'medecin', 'analyses_biologiques', 'images_radiologiques']
\ No newline at end of file
+        fields = ['id_consultation', 'date', 'resume', 'dpi', 'medecin', 'analyses_biologiques', 'images_radiologiques']
+
+
+class BilanDemandeSerializer(serializers.Serializer):
+    type = serializers.CharField(max_length=45)
+
+
+class OrdonnanceLotSerializer(serializers.Serializer):
+    medicaments = MedicamentSerializer(many=True, required=False)
+
+
+class ConsultationLotSerializer(serializers.Serializer):
+    """
+    Validation d'une consultation d'un lot importé (creerConsultationsEnLot).
+    Les DPI et médecins référencés sont vérifiés par la vue, en une requête pour tout le lot.
+    """
+    date = serializers.DateField(required=False)
+    resume = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    dpi = serializers.IntegerField()
+    medecin = serializers.IntegerField(required=False)
+    ordonnance = OrdonnanceLotSerializer(required=False)
+    analyses_biologiques = BilanDemandeSerializer(many=True, required=False)
+    images_radiologiques = BilanDemandeSerializer(many=True, required=False)
@@ -94,6 +94,7 @@ class TestGetAllConsultations:
 
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data) >= 1
+        assert "supprime_le" not in response.data[0]
 
     def test_get_all_consultations_as_patient_forbidden(self, api_client, patient_user):
         """
@@ -218,7 +219,7 @@ class TestDeleteConsultation:
         url = reverse("delete_consultation", kwargs={"id_consultation": consultation_instance.id_consultation})
         response = api_client.delete(url)
         assert response.status_code == status.HTTP_204_NO_CONTENT
-        assert not Consultation.objects.filter(id_consultation=consultation_instance.id_consultation).exists()
+        assert not Consultation.visibles.filter(id_consultation=consultation_instance.id_consultation).exists()
 
     def test_delete_consultation_not_found(self, api_client, medecin_user):
         """
@@ -453,3 +454,116 @@ class TestCreerConsultationAvecBilan:
 
             except Exception as e:
                 return Response({"detail": f"Une erreur s'est produite: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@pytest.mark.django_db
+class TestGetConsultationByPatient:
+    def test_get_consultation_by_patient_with_bilans(self, api_client, medecin_user, consultation_instance):
+        """
+        The patient history nests the bilans of each consultation.
+        """
+        AnalyseBiologique.objects.create(type="Glycémie", consultation=consultation_instance)
+        ImageRadiologique.objects.create(type="IRM", consultation=consultation_instance)
+
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("getConsultationByPatient", kwargs={"id_dpi": consultation_instance.dpi_id})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[0]["medecin"] == medecin_user.nom
+        assert response.data[0]["analyses_biologiques"][0]["type"] == "Glycémie"
+        assert response.data[0]["images_radiologiques"][0]["statut"] == "pas_terminé"
+
+    def test_get_consultation_by_patient_constant_query_count(
+        self, api_client, medecin_user, dpi_instance, django_assert_num_queries
+    ):
+        """
+        Consultations (with medecin and DPI), analyses and images: three queries,
+        whatever the number of consultations.
+        """
+        for _ in range(200):
+            consultation = Consultation.objects.create(date='2024-01-01', dpi=dpi_instance, medecin=medecin_user)
+            AnalyseBiologique.objects.create(type="Glycémie", consultation=consultation)
+            ImageRadiologique.objects.create(type="IRM", consultation=consultation)
+
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("getConsultationByPatient", kwargs={"id_dpi": dpi_instance.nss})
+        with django_assert_num_queries(3):
+            response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 200
+
+    def test_get_consultation_by_patient_not_found(self, api_client, medecin_user):
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("getConsultationByPatient", kwargs={"id_dpi": 999999999})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestCreerConsultationsEnLot:
+    def test_creer_consultations_en_lot_success(self, api_client, medecin_user, dpi_instance):
+        """
+        A medecin can import many consultations with their ordonnances and bilans at once.
+        """
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("creerConsultationsEnLot")
+        data = {
+            "consultations": [
+                {
+                    "date": "2024-03-0%d" % (i + 1),
+                    "resume": "Imported consultation %d" % i,
+                    "dpi": dpi_instance.nss,
+                    "ordonnance": {"medicaments": [{"nom": "Paracétamol", "dose": "1g", "duree": "5 jours"}]},
+                    "analyses_biologiques": [{"type": "Glycémie"}],
+                    "images_radiologiques": [{"type": "IRM"}, {"type": "Radio"}],
+                }
+                for i in range(3)
+            ]
+        }
+
+        response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED, response.data
+        assert response.data["crees"] == 3
+        assert Consultation.objects.filter(dpi=dpi_instance).count() == 3
+        assert Ordonnance.objects.filter(consultation__dpi=dpi_instance).count() == 3
+        assert Medicament.objects.filter(ordonnance__consultation__dpi=dpi_instance).count() == 3
+        assert AnalyseBiologique.objects.count() == 3
+        assert ImageRadiologique.objects.count() == 6
+
+    def test_creer_consultations_en_lot_dpi_inconnu(self, api_client, medecin_user, dpi_instance):
+        """
+        One unknown DPI rejects the whole batch and nothing is written.
+        """
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("creerConsultationsEnLot")
+        data = {"consultations": [{"dpi": dpi_instance.nss}, {"dpi": 999999999}]}
+
+        response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "1" in {str(index) for index in response.data["errors"]}
+        assert not Consultation.objects.exists()
+
+
+@pytest.mark.django_db
+class TestCreerConsultationAtomique:
+    def test_ordonnance_invalide_annule_la_consultation(self, api_client, medecin_user, dpi_instance):
+        """
+        If a medicament cannot be written, the consultation is not left behind.
+        """
+        api_client.force_authenticate(user=medecin_user)
+        url = reverse("creerConsultationAvecOrdonnace")
+        data = {
+            "resume": "Broken ordonnance",
+            "dpi": dpi_instance.nss,
+            "ordonnance": {"medicaments": [{"dose": "500mg", "duree": "5 days"}]},  # nom manquant
+        }
+
+        response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert not Consultation.objects.exists()
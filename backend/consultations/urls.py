@@ -9,6 +9,7 @@ urlpatterns = [
     path('<int:id_consultation>/modifier/', views.update_consultation, name='update_consultation'), # Mise à jour
     path('<int:id_consultation>/supprimer/', views.delete_consultation, name='delete_consultation'), # Suppression
     path('creerConsultationAvecOrdonnance/', views.creerConsultationAvecOrdonnance, name='creerConsultationAvecOrdonnace'),
-    path('creerConsultationAvecBilan/', views.creerConsultationAvecBilan, name='creerConsultationAvecBilan')
+    path('creerConsultationAvecBilan/', views.creerConsultationAvecBilan, name='creerConsultationAvecBilan'),
+    path('creerConsultationsEnLot/', views.creerConsultationsEnLot, name='creerConsultationsEnLot'),
 
 ]
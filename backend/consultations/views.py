@@ -5,12 +5,63 @@ from rest_framework.permissions import IsAuthenticated
 from .models import Consultation
 from bilans.models import AnalyseBiologique, ImageRadiologique
 from ordonnance.models import Ordonnance
-from medicaments.models import Medicament
-from .serializers import ConsultationSerializer, ConsultationDetailSerializer
+from medicaments.models import Medicament, duree_traitement
+from medicaments.catalogue import associer_catalogue
+from .serializers import ConsultationSerializer, ConsultationDetailSerializer, ConsultationLotSerializer, PROJECTION_CONSULTATIONS
 from .permissions import IsMedecin,IsPatientOrMedecin
 from datetime import datetime
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from django.db import transaction
+from django.db.models import Prefetch
+from django.contrib.auth import get_user_model
+from DPI.models import DPI
+from backend.docs import openapi, swagger_auto_schema
+from backend.db.insertion import inserer_en_masse
+from backend.purge import marquer_consultation
+
+# Nombre maximal de consultations acceptées par appel à creerConsultationsEnLot
+TAILLE_MAX_LOT = 1000
+
+
+def creer_ordonnances(consultations_et_ordonnances):
+    """
+    Crée une ordonnance par consultation, puis tous leurs médicaments en un seul INSERT,
+    rattachés au catalogue d'après leur nom.
+    `consultations_et_ordonnances` : liste de (consultation, données de l'ordonnance).
+    """
+    ordonnances = inserer_en_masse(Ordonnance, [
+        Ordonnance(consultation=consultation) for consultation, _ in consultations_et_ordonnances
+    ])
+    Medicament.objects.bulk_create(associer_catalogue([
+        Medicament(
+            nom=medicament_data.get("nom"),  # Nom du médicament
+            dose=medicament_data.get("dose"),  # Dose prescrite
+            duree=medicament_data.get("duree"),  # Durée de la prescription
+            duree_traitement=duree_traitement(medicament_data.get("duree")),
+            ordonnance=ordonnance  # Lier le médicament à l'ordonnance créée
+        )
+        for ordonnance, (_, ordonnance_data) in zip(ordonnances, consultations_et_ordonnances)
+        for medicament_data in ordonnance_data.get("medicaments", [])
+    ]))
+    return ordonnances
+
+
+def creer_bilans(consultations_et_bilans):
+    """
+    Crée les analyses biologiques puis les images radiologiques demandées (un INSERT par table).
+    `consultations_et_bilans` : liste de (consultation, données contenant
+    'analyses_biologiques' et/ou 'images_radiologiques').
+    """
+    AnalyseBiologique.objects.bulk_create([
+        AnalyseBiologique(type=analyse_data.get("type"), consultation=consultation)
+        for consultation, data in consultations_et_bilans
+        for analyse_data in data.get("analyses_biologiques", [])
+    ])
+    ImageRadiologique.objects.bulk_create([
+        ImageRadiologique(type=image_data.get("type"), consultation=consultation)
+        for consultation, data in consultations_et_bilans
+        for image_data in data.get("images_radiologiques", [])
+    ])
+
 
 @swagger_auto_schema(
     method='get',
@@ -23,9 +74,9 @@ def get_all_consultations(request):
     Récupérer toutes les consultations.
     Accessible uniquement aux médecins.
     """
-    consultations = Consultation.objects.all()
-    serializer = ConsultationSerializer(consultations, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # Lues colonne par colonne, sans instancier les consultations (mêmes données que ConsultationSerializer)
+    consultations = PROJECTION_CONSULTATIONS.donnees(Consultation.visibles.all())
+    return Response(consultations, status=status.HTTP_200_OK)
 
 
 @swagger_auto_schema(
@@ -40,7 +91,7 @@ def get_consultation_by_id(request, id_consultation):
     Accessible uniquement aux médecins.
     """
     try:
-        consultation = Consultation.objects.get(id_consultation=id_consultation)
+        consultation = Consultation.visibles.get(id_consultation=id_consultation)
     except Consultation.DoesNotExist:
         return Response({'detail': 'Consultation non trouvée.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -84,7 +135,7 @@ def update_consultation(request, id_consultation):
     Accessible uniquement aux médecins.
     """
     try:
-        consultation = Consultation.objects.get(id_consultation=id_consultation)
+        consultation = Consultation.visibles.get(id_consultation=id_consultation)
     except Consultation.DoesNotExist:
         return Response({'detail': 'Consultation non trouvée.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -105,12 +156,9 @@ def delete_consultation(request, id_consultation):
     Supprimer une consultation par son ID.
     Accessible uniquement aux médecins.
     """
-    try:
-        consultation = Consultation.objects.get(id_consultation=id_consultation)
-    except Consultation.DoesNotExist:
+    # Masquer la consultation ; elle et ses ordonnances et bilans sont purgés par lots par purger_suppressions
+    if not marquer_consultation(id_consultation):
         return Response({'detail': 'Consultation non trouvée.'}, status=status.HTTP_404_NOT_FOUND)
-
-    consultation.delete()
     return Response({'detail': 'Consultation supprimée avec succès.'}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -147,23 +195,13 @@ def creerConsultationAvecOrdonnance(request):
         if not consultation_serializer.is_valid():
             return Response(consultation_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        consultation = consultation_serializer.save()
+        # Tout est créé dans une seule transaction : en cas d'erreur, rien n'est enregistré
+        with transaction.atomic():
+            consultation = consultation_serializer.save()
 
-        # 2. Créer l'ordonnance (une seule ordonnance ici)
-        ordonnance_data = data.get("ordonnance", {})  # Notez qu'il s'agit désormais d'un dictionnaire, pas d'une liste
-        ordonnance = Ordonnance.objects.create(
-            consultation=consultation,
-        )
-
-        # 3. Associer les médicaments à l'ordonnance
-        medicaments_data = ordonnance_data.get("medicaments", [])
-        for medicament_data in medicaments_data:
-            Medicament.objects.create(
-                nom=medicament_data.get("nom"),  # Nom du médicament
-                dose=medicament_data.get("dose"),  # Dose prescrite
-                duree=medicament_data.get("duree"),  # Durée de la prescription
-                ordonnance=ordonnance  # Lier le médicament à l'ordonnance créée
-            )
+            # 2. Créer l'ordonnance (une seule ordonnance ici) et ses médicaments en un seul INSERT
+            ordonnance_data = data.get("ordonnance", {})  # Notez qu'il s'agit désormais d'un dictionnaire, pas d'une liste
+            creer_ordonnances([(consultation, ordonnance_data)])
 
         return Response(consultation_serializer.data, status=status.HTTP_201_CREATED)
 
@@ -196,32 +234,106 @@ def creerConsultationAvecBilan(request):
         if not consultation_serializer.is_valid():
             return Response(consultation_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        consultation = consultation_serializer.save()
+        # Tout est créé dans une seule transaction : en cas d'erreur, rien n'est enregistré
+        with transaction.atomic():
+            consultation = consultation_serializer.save()
 
-        # 2. Créer les demandes d'analyses biologiques
-        analyses_data = data.get("analyses_biologiques", [])
-        for analyse_data in analyses_data:
-            AnalyseBiologique.objects.create(
-                type=analyse_data.get("type"),
-                consultation=consultation
-            )
-
-        # 3. Créer les demandes d'images radiologiques
-        images_data = data.get("images_radiologiques", [])
-        for image_data in images_data:
-            ImageRadiologique.objects.create(
-                type=image_data.get("type"),
-                consultation=consultation
-            )
+            # 2. et 3. Créer les demandes d'analyses biologiques et d'images radiologiques (un INSERT par table)
+            creer_bilans([(consultation, data)])
 
         return Response(consultation_serializer.data, status=status.HTTP_201_CREATED)
 
     except Exception as e:
         return Response({"detail": f"Une erreur s'est produite: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
 
+@swagger_auto_schema(
+    method='post',
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['consultations'],
+        properties={
+            'consultations': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Items(type=openapi.TYPE_OBJECT, properties={
+                    'date': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, description="Date de la consultation (aujourd'hui par défaut)"),
+                    'resume': openapi.Schema(type=openapi.TYPE_STRING),
+                    'dpi': openapi.Schema(type=openapi.TYPE_INTEGER, description="NSS du patient"),
+                    'medecin': openapi.Schema(type=openapi.TYPE_INTEGER, description="ID du médecin (médecin connecté par défaut)"),
+                    'ordonnance': openapi.Schema(type=openapi.TYPE_OBJECT),
+                    'analyses_biologiques': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+                    'images_radiologiques': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Items(type=openapi.TYPE_OBJECT)),
+                })
+            ),
+        },
+    ),
+    responses={201: "Consultations créées", 400: "Données invalides", 500: "Erreur interne"}
+)
+@api_view(['POST'])
+@permission_classes([IsMedecin])
+def creerConsultationsEnLot(request):
+    """
+    Créer en une seule requête un lot de consultations, avec leurs ordonnances et bilans
+    (import nocturne des consultations externes). Le lot est validé en entier puis
+    enregistré dans une seule transaction : soit tout est créé, soit rien.
+    Accessible uniquement aux médecins.
+    """
+    consultations_data = request.data.get("consultations") if isinstance(request.data, dict) else None
+    if not isinstance(consultations_data, list) or not consultations_data:
+        return Response({"detail": "Le champ 'consultations' doit être une liste non vide."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(consultations_data) > TAILLE_MAX_LOT:
+        return Response({"detail": f"Un lot ne peut pas dépasser {TAILLE_MAX_LOT} consultations."}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = ConsultationLotSerializer(data=consultations_data, many=True)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    lot = serializer.validated_data
+
+    # Vérifier les DPI et les médecins référencés avec une requête chacun
+    nss_demandes = {item["dpi"] for item in lot}
+    nss_existants = set(DPI.visibles.filter(nss__in=nss_demandes).values_list("nss", flat=True))
+    medecins_demandes = {item.get("medecin", request.user.id) for item in lot}
+    medecins_existants = set(
+        get_user_model().objects.filter(id__in=medecins_demandes, role="medecin").values_list("id", flat=True)
+    )
+    erreurs = {}
+    for index, item in enumerate(lot):
+        medecin_id = item.get("medecin", request.user.id)
+        if item["dpi"] not in nss_existants:
+            erreurs[index] = {"dpi": f"DPI {item['dpi']} introuvable."}
+        elif medecin_id not in medecins_existants:
+            erreurs[index] = {"medecin": f"Médecin {medecin_id} introuvable."}
+    if erreurs:
+        return Response({"detail": "Certaines consultations sont invalides.", "errors": erreurs}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        aujourd_hui = datetime.now().date()
+        with transaction.atomic():
+            consultations = inserer_en_masse(Consultation, [
+                Consultation(
+                    date=item.get("date") or aujourd_hui,
+                    resume=item.get("resume"),
+                    dpi_id=item["dpi"],
+                    medecin_id=item.get("medecin", request.user.id),
+                )
+                for item in lot
+            ])
+            creer_ordonnances([
+                (consultation, item["ordonnance"])
+                for consultation, item in zip(consultations, lot) if "ordonnance" in item
+            ])
+            creer_bilans(list(zip(consultations, lot)))
+
+        return Response(
+            {"crees": len(consultations), "consultations": [consultation.id_consultation for consultation in consultations]},
+            status=status.HTTP_201_CREATED
+        )
+
+    except Exception as e:
+        return Response({"detail": f"Une erreur s'est produite: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @swagger_auto_schema(
     method='get',
-    responses={204: "Consultations trouve", 404: "Consultations non trouvée pour ce patient"}
+    responses={200: ConsultationDetailSerializer(many=True), 404: "Consultations non trouvée pour ce patient"}
 )
 @api_view(['GET'])
 @permission_classes([IsPatientOrMedecin])
@@ -231,9 +343,18 @@ def getConsultationByPatient(request, id_dpi):
     Accessible aux médecins et aux patients.
     """
     try:
-        # Retrieve all consultations for the given patient ID (dpi_id)
-        consultations = Consultation.objects.filter(dpi_id=id_dpi)
-        if not consultations.exists():
+        # Retrieve all consultations for the given patient ID (dpi_id),
+        # with the medecin, the DPI and the bilans loaded in a fixed number of queries
+        consultations = list(
+            Consultation.visibles.filter(dpi_id=id_dpi)
+            .select_related('medecin', 'dpi')
+            .prefetch_related(
+                Prefetch('analyses_biologiques', queryset=AnalyseBiologique.objects.only('id_analyse_biologique', 'type', 'statut', 'consultation')),
+                Prefetch('images_radiologiques', queryset=ImageRadiologique.objects.only('id_image_radiologique', 'type', 'statut', 'consultation')),
+            )
+            .order_by('date', 'id_consultation')
+        )
+        if not consultations:
             return Response({'detail': 'Aucune consultation trouvée pour ce patient.'}, status=status.HTTP_404_NOT_FOUND)
         
         # Use ConsultationDetailSerializer if detailed information is required, otherwise ConsultationSerializer
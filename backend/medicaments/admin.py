@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import MedicamentCatalogue
+
+
+@admin.register(MedicamentCatalogue)
+class MedicamentCatalogueAdmin(admin.ModelAdmin):
+    list_display = ('nom',)
+    search_fields = ('nom',)
@@ -0,0 +1,118 @@
+"""
+Index en mémoire du catalogue des médicaments pour l'autocomplétion : chaque worker garde
+les noms normalisés dans une liste triée et répond aux recherches par préfixe par
+dichotomie (bisect), sans requête SQL.
+
+L'index est chargé au premier appel puis rechargé après une modification du catalogue :
+immédiatement dans le worker qui l'a faite, et au plus tard après
+CATALOGUE_MEDICAMENTS_VERIFICATION secondes dans les autres (numéro de version partagé
+dans le cache). Les autres workers ne voient la nouvelle version qu'avec un cache partagé
+(voir backend.cache) : avec LocMemCache, seul le worker qui a fait la modification recharge.
+"""
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import MedicamentCatalogue, normaliser_nom
+
+CLE_VERSION = 'medicaments:catalogue:version'
+
+
+class IndexCatalogue:
+    """
+    Liste triée des clés de recherche : le nom normalisé de chaque médicament et chacune
+    de ses fins à partir d'un mot ('amoxicilline acide clavulanique' est aussi trouvé
+    par 'clav'). Une recherche est une dichotomie suivie d'un parcours des seules clés
+    qui commencent par le texte cherché.
+    """
+
+    def __init__(self, medicaments):
+        self.par_id = {}
+        self.par_nom = {}
+        cles = []
+        for id_catalogue, nom in medicaments:
+            normalise = normaliser_nom(nom)
+            self.par_id[id_catalogue] = nom
+            self.par_nom[normalise] = id_catalogue
+            mots = normalise.split()
+            cles += [(' '.join(mots[i:]), i, nom, id_catalogue) for i in range(len(mots))]
+        cles.sort()
+        self.cles = [cle[0] for cle in cles]
+        self.entrees = [cle[1:] for cle in cles]
+
+    def __len__(self):
+        return len(self.par_id)
+
+    def rechercher(self, texte, limite=10):
+        """
+        Médicaments dont le nom, ou un mot du nom, commence par `texte` (sans tenir compte
+        des accents ni de la casse) : [{'id', 'nom'}], les correspondances sur le début du
+        nom d'abord, chaque groupe par ordre alphabétique.
+        """
+        prefixe = normaliser_nom(texte)
+        if not prefixe:
+            return []
+        trouves = {}  # id -> (0 si le nom commence par le préfixe, sinon 1 ; clé ; nom)
+        debuts = 0
+        for index in range(bisect_left(self.cles, prefixe), len(self.cles)):
+            cle = self.cles[index]
+            if not cle.startswith(prefixe) or debuts >= limite:
+                break
+            position, nom, id_catalogue = self.entrees[index]
+            if position == 0:
+                trouves[id_catalogue] = (0, cle, nom)
+                debuts += 1
+            else:
+                trouves.setdefault(id_catalogue, (1, cle, nom))
+        meilleurs = sorted(trouves.items(), key=lambda trouve: trouve[1][:2])[:limite]
+        return [{'id': id_catalogue, 'nom': nom} for id_catalogue, (_, _, nom) in meilleurs]
+
+
+_index = None
+_version = None
+_verifie_a = 0.0
+_lock = threading.Lock()
+
+
+def index_catalogue():
+    """
+    Index du worker, (re)chargé s'il est absent ou si la version partagée a changé.
+    """
+    global _index, _version, _verifie_a
+    maintenant = time.monotonic()
+    if _index is not None and maintenant - _verifie_a < settings.CATALOGUE_MEDICAMENTS_VERIFICATION:
+        return _index
+    with _lock:
+        version = cache.get(CLE_VERSION)
+        if _index is None or version != _version:
+            # Version lue avant les lignes : une modification pendant le chargement provoquera un nouveau chargement
+            _index = IndexCatalogue(MedicamentCatalogue.objects.values_list('id_catalogue', 'nom').iterator())
+            _version = version
+        _verifie_a = maintenant
+        return _index
+
+
+def invalider_catalogue():
+    """
+    Publie une nouvelle version du catalogue et vide l'index du worker courant.
+    """
+    global _index
+    cache.set(CLE_VERSION, uuid.uuid4().hex, None)
+    with _lock:
+        _index = None
+
+
+def associer_catalogue(medicaments):
+    """
+    Rattache au catalogue les lignes d'ordonnance qui n'y sont pas encore liées, d'après
+    leur nom (aux accents et à la casse près), sans requête SQL.
+    """
+    index = index_catalogue()
+    for medicament in medicaments:
+        if medicament.catalogue_id is None and medicament.nom:
+            medicament.catalogue_id = index.par_nom.get(normaliser_nom(medicament.nom))
+    return medicaments
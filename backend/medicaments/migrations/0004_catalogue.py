@@ -0,0 +1,58 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:40
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def normaliser_nom(nom):
+    # Copie de medicaments.models.normaliser_nom, figée pour cette migration
+    decompose = unicodedata.normalize('NFKD', nom)
+    return ' '.join(''.join(c for c in decompose if not unicodedata.combining(c)).casefold().split())
+
+
+def remplir_catalogue(apps, schema_editor):
+    """
+    Crée une entrée de catalogue par nom déjà prescrit (les graphies d'un même nom sont
+    regroupées, la plus fréquente est retenue) et y rattache les lignes d'ordonnance.
+    """
+    Medicament = apps.get_model('medicaments', 'Medicament')
+    MedicamentCatalogue = apps.get_model('medicaments', 'MedicamentCatalogue')
+
+    graphies = {}  # nom normalisé -> {graphie: nombre de prescriptions}
+    for ligne in Medicament.objects.values('nom').annotate(nombre=models.Count('pk')).iterator():
+        normalise = normaliser_nom(ligne['nom'])
+        if normalise:
+            graphies.setdefault(normalise, {})[ligne['nom']] = ligne['nombre']
+
+    MedicamentCatalogue.objects.bulk_create([
+        MedicamentCatalogue(nom=max(noms, key=lambda nom: (noms[nom], nom)).strip(), nom_normalise=normalise)
+        for normalise, noms in graphies.items()
+    ], batch_size=1000)
+    for entree in MedicamentCatalogue.objects.iterator():
+        Medicament.objects.filter(nom__in=list(graphies[entree.nom_normalise])).update(catalogue=entree)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medicaments', '0003_alter_medicament_nom'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicamentCatalogue',
+            fields=[
+                ('id_catalogue', models.AutoField(primary_key=True, serialize=False)),
+                ('nom', models.CharField(max_length=255, unique=True)),
+                ('nom_normalise', models.CharField(editable=False, max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='medicament',
+            name='catalogue',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='prescriptions', to='medicaments.medicamentcatalogue'),
+        ),
+        migrations.RunPython(remplir_catalogue, migrations.RunPython.noop),
+    ]
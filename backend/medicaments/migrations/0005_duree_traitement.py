@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:46
+
+import re
+import unicodedata
+from datetime import timedelta
+
+from django.db import migrations, models
+
+# Copie de medicaments.models.duree_traitement, figée pour cette migration
+UNITES_DUREE = {
+    '': 1, 'j': 1, 'jour': 1, 'jours': 1, 'd': 1, 'day': 1, 'days': 1,
+    'sem': 7, 'semaine': 7, 'semaines': 7, 'w': 7, 'week': 7, 'weeks': 7,
+    'mois': 30, 'month': 30, 'months': 30,
+}
+DUREE_RE = re.compile(r'^\s*(\d+)\s*([a-z]*)\.?\s*$')
+
+
+def duree_traitement(duree):
+    decompose = unicodedata.normalize('NFKD', duree or '')
+    normalise = ' '.join(''.join(c for c in decompose if not unicodedata.combining(c)).casefold().split())
+    correspondance = DUREE_RE.match(normalise)
+    if not correspondance or correspondance.group(2) not in UNITES_DUREE:
+        return None
+    nombre, unite = correspondance.groups()
+    return timedelta(days=int(nombre) * UNITES_DUREE[unite])
+
+
+def interpreter_durees(apps, schema_editor):
+    """
+    Renseigne duree_traitement des prescriptions existantes : une mise à jour par valeur
+    distincte de `duree` (quelques dizaines en pratique).
+    """
+    Medicament = apps.get_model('medicaments', 'Medicament')
+    for duree in Medicament.objects.values_list('duree', flat=True).distinct().order_by().iterator():
+        traitement = duree_traitement(duree)
+        if traitement is not None:
+            Medicament.objects.filter(duree=duree).update(duree_traitement=traitement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medicaments', '0004_catalogue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicament',
+            name='duree_traitement',
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(interpreter_durees, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,57 @@
+import re
+import unicodedata
+from datetime import timedelta
+
 from django.db import models
 from ordonnance.models import Ordonnance
 
+
+def normaliser_nom(nom):
+    """
+    Forme de comparaison d'un nom de médicament : sans accents, en minuscules,
+    espaces multiples réduits ('  Paracétamol 500 ' -> 'paracetamol 500').
+    """
+    decompose = unicodedata.normalize('NFKD', nom)
+    return ' '.join(''.join(c for c in decompose if not unicodedata.combining(c)).casefold().split())
+
+
+# Nombre de jours par unité de durée acceptée dans `Medicament.duree` (jours par défaut)
+UNITES_DUREE = {
+    '': 1, 'j': 1, 'jour': 1, 'jours': 1, 'd': 1, 'day': 1, 'days': 1,
+    'sem': 7, 'semaine': 7, 'semaines': 7, 'w': 7, 'week': 7, 'weeks': 7,
+    'mois': 30, 'month': 30, 'months': 30,
+}
+DUREE_RE = re.compile(r'^\s*(\d+)\s*([a-z]*)\.?\s*$')
+
+
+def duree_traitement(duree):
+    """
+    Durée d'une prescription saisie en texte libre ('5 jours', '2 semaines', '10j', '1 month'...),
+    ou None si elle n'est pas reconnue.
+    """
+    correspondance = DUREE_RE.match(normaliser_nom(duree or ''))
+    if not correspondance or correspondance.group(2) not in UNITES_DUREE:
+        return None
+    nombre, unite = correspondance.groups()
+    return timedelta(days=int(nombre) * UNITES_DUREE[unite])
+
+
+class MedicamentCatalogue(models.Model):
+    """
+    Médicament du catalogue (référentiel normalisé auquel se rattachent les lignes d'ordonnance).
+    """
+    id_catalogue = models.AutoField(primary_key=True)
+    nom = models.CharField(max_length=255, unique=True)
+    nom_normalise = models.CharField(max_length=255, unique=True, editable=False)  # Deux graphies d'un même nom sont refusées
+
+    def save(self, *args, **kwargs):
+        self.nom_normalise = normaliser_nom(self.nom)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.nom
+
+
 class Medicament(models.Model):
     """
     Modèle pour les médicaments.
@@ -9,8 +60,16 @@ class Medicament(models.Model):
     nom = models.CharField(max_length=255)  # Nom du médicament
     dose = models.CharField(max_length=10)  # Dose prescrite
     duree = models.CharField(max_length=15)  # Durée en jours
+    duree_traitement = models.DurationField(null=True, blank=True, editable=False)  # `duree` interprétée (filtre des ordonnances actives en SQL)
     ordonnance = models.ForeignKey(Ordonnance, on_delete=models.CASCADE, related_name='medicaments')  # Relation avec ordonnance (OneToMany)
-     
+    catalogue = models.ForeignKey(MedicamentCatalogue, on_delete=models.SET_NULL, null=True, blank=True, related_name='prescriptions')  # Entrée du catalogue portant ce nom, s'il y en a une
+
+    def save(self, *args, **kwargs):
+        self.duree_traitement = duree_traitement(self.duree)
+        if self.catalogue_id is None:
+            from .catalogue import associer_catalogue
+            associer_catalogue([self])
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.nom})"
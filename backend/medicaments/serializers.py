@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from backend.projections import Projection
 from .models import Medicament
 
 
@@ -8,4 +9,11 @@ class MedicamentSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Medicament
-        fields = [ 'nom', 'dose', 'duree']
+        fields = [ 'nom', 'dose', 'duree', 'catalogue']
+        extra_kwargs = {
+            'catalogue': {'read_only': True},  # Déduit du nom (voir medicaments.catalogue.associer_catalogue)
+        }
+
+
+# Mêmes données que MedicamentSerializer, lues sans instancier les médicaments
+PROJECTION_MEDICAMENTS = Projection.depuis_serializer(MedicamentSerializer)
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.cache import invalider_apres_commit
+from .catalogue import invalider_catalogue
+from .models import MedicamentCatalogue
+
+
+@receiver(post_save, sender=MedicamentCatalogue)
+@receiver(post_delete, sender=MedicamentCatalogue)
+def rafraichir_index_catalogue(sender, instance, **kwargs):
+    """
+    Recharge l'index d'autocomplétion quand un médicament du catalogue est ajouté, renommé ou
+    supprimé, tout de suite puis après le commit : un index rechargé entre-temps par une autre
+    requête contiendrait encore l'ancien catalogue.
+    """
+    invalider_apres_commit(invalider_catalogue)
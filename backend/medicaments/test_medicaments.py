@@ -0,0 +1,142 @@
+import time
+from datetime import date
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from consultations.models import Consultation
+from DPI.models import DPI
+from ordonnance.models import Ordonnance
+from .catalogue import IndexCatalogue, index_catalogue, invalider_catalogue
+from .models import Medicament, MedicamentCatalogue, normaliser_nom
+
+
+@pytest.fixture(autouse=True)
+def index_vide():
+    invalider_catalogue()
+    yield
+    invalider_catalogue()
+
+
+@pytest.fixture
+def catalogue(db):
+    return {nom: MedicamentCatalogue.objects.create(nom=nom).id_catalogue
+            for nom in ('Paracétamol', 'Amoxicilline acide clavulanique', 'Amoxicilline', 'Ibuprofène')}
+
+
+@pytest.fixture
+def medecin(db):
+    return User.objects.create_user(email='m@example.com', nom='Dr M', password='x', role='medecin', specialite='other')
+
+
+@pytest.fixture
+def ordonnance(medecin):
+    patient = User.objects.create_user(email='p@example.com', nom='P', password='x', role='patient', specialite='other')
+    dpi = DPI.objects.create(nss='123123123', date_naissance='1970-01-01', telephone='0600000000', adresse='A',
+                             mutuelle='M', sexe='F', patient=patient, medecin_traitant=medecin)
+    consultation = Consultation.objects.create(dpi=dpi, medecin=medecin, date=date(2024, 5, 1))
+    return Ordonnance.objects.create(consultation=consultation)
+
+
+class TestIndexCatalogue:
+    """Test suite for the in-memory drug catalogue index."""
+
+    def test_normalisation(self):
+        assert normaliser_nom('  Paracétamol   500 ') == 'paracetamol 500'
+        assert normaliser_nom('IBUPROFÈNE') == 'ibuprofene'
+
+    def test_recherche_par_prefixe(self):
+        index = IndexCatalogue([(1, 'Paracétamol'), (2, 'Amoxicilline acide clavulanique'), (3, 'Amoxicilline')])
+
+        assert index.rechercher('amox') == [{'id': 3, 'nom': 'Amoxicilline'},
+                                            {'id': 2, 'nom': 'Amoxicilline acide clavulanique'}]
+        assert index.rechercher('PARACE') == [{'id': 1, 'nom': 'Paracétamol'}]
+        assert index.rechercher('clav') == [{'id': 2, 'nom': 'Amoxicilline acide clavulanique'}]
+        assert index.rechercher('amox', limite=1) == [{'id': 3, 'nom': 'Amoxicilline'}]
+        assert index.rechercher('doli') == []
+        assert index.rechercher('  ') == []
+
+    def test_debut_du_nom_avant_les_autres_mots(self):
+        index = IndexCatalogue([(1, 'Acide folique'), (2, 'Amoxicilline acide clavulanique')])
+
+        assert [trouve['id'] for trouve in index.rechercher('acide')] == [1, 2]
+
+    def test_recherche_sans_requete(self, catalogue, django_assert_num_queries):
+        index_catalogue()
+        with django_assert_num_queries(0):
+            assert index_catalogue().rechercher('ibu') == [{'id': catalogue['Ibuprofène'], 'nom': 'Ibuprofène'}]
+
+    def test_recharge_apres_modification(self, catalogue):
+        assert index_catalogue().rechercher('doli') == []
+
+        doliprane = MedicamentCatalogue.objects.create(nom='Doliprane')
+        assert index_catalogue().rechercher('doli') == [{'id': doliprane.id_catalogue, 'nom': 'Doliprane'}]
+
+        doliprane.delete()
+        assert index_catalogue().rechercher('doli') == []
+
+    def test_recharge_apres_commit(self, catalogue, django_capture_on_commit_callbacks):
+        from . import catalogue as module
+
+        with django_capture_on_commit_callbacks(execute=True):
+            doliprane = MedicamentCatalogue.objects.create(nom='Doliprane')
+            # Index reloaded by a concurrent request that did not see the uncommitted entry yet
+            module._index, module._version = IndexCatalogue([]), cache.get(module.CLE_VERSION)
+            module._verifie_a = time.monotonic()
+
+        assert index_catalogue().rechercher('doli') == [{'id': doliprane.id_catalogue, 'nom': 'Doliprane'}]
+
+@pytest.mark.django_db
+class TestRattachementCatalogue:
+    """Test suite for linking prescribed drugs to the catalogue."""
+
+    def test_rattache_par_nom(self, catalogue, ordonnance):
+        medicament = Medicament.objects.create(ordonnance=ordonnance, nom='paracetamol', dose='500mg', duree='5 jours')
+        inconnu = Medicament.objects.create(ordonnance=ordonnance, nom='Doliprane', dose='1g', duree='3 jours')
+
+        assert medicament.catalogue_id == catalogue['Paracétamol']
+        assert inconnu.catalogue_id is None
+
+    def test_creation_consultation_avec_ordonnance(self, catalogue, medecin, ordonnance):
+        client = APIClient()
+        client.force_authenticate(user=medecin)
+        response = client.post(reverse('creerConsultationAvecOrdonnace'), {
+            'dpi': ordonnance.consultation.dpi_id,
+            'resume': 'Douleurs',
+            'ordonnance': {'medicaments': [{'nom': 'Ibuprofène', 'dose': '400mg', 'duree': '3 jours'}]},
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Medicament.objects.get(nom='Ibuprofène').catalogue_id == catalogue['Ibuprofène']
+
+
+@pytest.mark.django_db
+class TestRechercherCatalogue:
+    """Test suite for the drug catalogue autocomplete endpoint."""
+
+    def test_autocompletion(self, catalogue, medecin):
+        client = APIClient()
+        client.force_authenticate(user=medecin)
+
+        response = client.get(reverse('rechercher_catalogue'), {'q': 'amox', 'limit': 1})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [{'id': catalogue['Amoxicilline'], 'nom': 'Amoxicilline'}]
+
+    def test_parametres_invalides(self, medecin):
+        client = APIClient()
+        client.force_authenticate(user=medecin)
+
+        assert client.get(reverse('rechercher_catalogue')).status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get(reverse('rechercher_catalogue'), {'q': 'a', 'limit': 'x'}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_reserve_aux_medecins(self, catalogue):
+        infirmier = User.objects.create_user(email='i@example.com', nom='I', password='x', role='infirmier', specialite='other')
+        client = APIClient()
+        client.force_authenticate(user=infirmier)
+
+        assert client.get(reverse('rechercher_catalogue'), {'q': 'amox'}).status_code == status.HTTP_403_FORBIDDEN
@@ -1,10 +1,16 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
+from accounts.permissions import IsMedecin
+from backend.docs import openapi, swagger_auto_schema
+from .catalogue import index_catalogue
 from .models import Medicament
-from .serializers import MedicamentSerializer
+from .serializers import MedicamentSerializer, PROJECTION_MEDICAMENTS
+
+LIMITE_CATALOGUE = 50
 
 @api_view(['POST'])
+@permission_classes([IsMedecin])
 def creer_medicament(request):
     """
     Créer un nouveau médicament.
@@ -16,6 +22,7 @@ def creer_medicament(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['DELETE'])
+@permission_classes([IsMedecin])
 def supprimer_medicament(request, id_medicament):
     """
     Supprimer un médicament par son ID.
@@ -28,10 +35,38 @@ def supprimer_medicament(request, id_medicament):
         return Response({"detail": "Médicament introuvable."}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
+@permission_classes([IsMedecin])
 def obtenir_medicaments(request):
     """
     Récupérer la liste de tous les médicaments.
     """
-    medicaments = Medicament.objects.all()
-    serializer = MedicamentSerializer(medicaments, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # Sans les médicaments des consultations supprimées en attente de purge
+    medicaments = PROJECTION_MEDICAMENTS.donnees(Medicament.objects.filter(ordonnance__consultation__supprime_le__isnull=True))
+    return Response(medicaments, status=status.HTTP_200_OK)
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Autocomplétion des noms de médicaments du catalogue (début du nom ou d'un de ses mots, sans tenir compte des accents ni de la casse).",
+    manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, description="Début du nom recherché", type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter('limit', openapi.IN_QUERY, description=f"Nombre maximal de résultats (10 par défaut, {LIMITE_CATALOGUE} au plus)", type=openapi.TYPE_INTEGER, required=False),
+    ],
+    responses={
+        200: "Liste de {'id', 'nom'}",
+        400: "Le paramètre q est obligatoire."
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsMedecin])
+def rechercher_catalogue(request):
+    """
+    Rechercher des médicaments du catalogue par préfixe, depuis l'index en mémoire du worker.
+    """
+    texte = request.query_params.get('q', '').strip()
+    if not texte:
+        return Response({"detail": "Le paramètre q est obligatoire."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limite = min(int(request.query_params.get('limit', 10)), LIMITE_CATALOGUE)
+    except ValueError:
+        return Response({"detail": "Le paramètre limit doit être un entier."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(index_catalogue().rechercher(texte, max(limite, 1)), status=status.HTTP_200_OK)
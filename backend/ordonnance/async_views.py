@@ -0,0 +1,44 @@
+from rest_framework import status
+
+from accounts.async_api import async_api_view, reponse_json
+from DPI.permissions import IsPatientOrMedecin
+from DPI.models import DPI
+from bilans.pagination import demande_pagination
+from .models import Ordonnance
+from .pagination import filtrer_ordonnances, paginer_ordonnances, fin_de_page
+from .serializers import OrdonnanceDetailSerializer
+
+
+@async_api_view([IsPatientOrMedecin])
+async def get_ordonnances_async(request):
+    """
+    Version asynchrone de get_ordonnances.
+    """
+    params = request.GET
+    nss = params.get('nss')
+
+    if not nss:
+        return reponse_json({'detail': 'Le champ NSS est obligatoire.'}, status.HTTP_400_BAD_REQUEST)
+
+    if not await DPI.visibles.filter(nss=nss).aexists():
+        return reponse_json({'detail': 'DPI non trouvé avec ce NSS.'}, status.HTTP_404_NOT_FOUND)
+
+    ordonnances = Ordonnance.visibles.filter(
+        consultation__dpi=nss
+    ).select_related('consultation__medecin').prefetch_related('medicaments')
+
+    try:
+        ordonnances = filtrer_ordonnances(ordonnances, params)
+    except ValueError as erreur:
+        return reponse_json({'detail': str(erreur)}, status.HTTP_400_BAD_REQUEST)
+
+    if demande_pagination(params):
+        try:
+            page, limit = paginer_ordonnances(ordonnances, params)
+        except ValueError:
+            return reponse_json({'detail': "Le curseur doit être de la forme 'AAAA-MM-JJ:id' et 'limit' un entier positif."}, status.HTTP_400_BAD_REQUEST)
+        ordonnances, next_cursor = fin_de_page([ordonnance async for ordonnance in page], limit)
+        return reponse_json({'results': OrdonnanceDetailSerializer(ordonnances, many=True).data, 'next_cursor': next_cursor})
+
+    ordonnances = [ordonnance async for ordonnance in ordonnances.order_by('consultation__date', 'id_ordonnance')]
+    return reponse_json(OrdonnanceDetailSerializer(ordonnances, many=True).data)
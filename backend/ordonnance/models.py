@@ -1,6 +1,7 @@
 from django.db import models
 from DPI.models import DPI
 from consultations.models import Consultation 
+from backend.suppression import VisiblesManager
 
 class Ordonnance(models.Model):
     """
@@ -20,5 +21,8 @@ class Ordonnance(models.Model):
         related_name='ordonnance'
     )
 
+    objects = models.Manager()
+    visibles = VisiblesManager('consultation__supprime_le')  # Ordonnances des consultations non supprimées
+
     def __str__(self):
         return f"Ordonnance {self.id_ordonnance} (Consultation ID: {self.consultation.id_consultation})"
@@ -0,0 +1,69 @@
+from datetime import date, datetime, time, timezone
+
+from django.db.models import DateTimeField, Exists, ExpressionWrapper, F, OuterRef, Q
+from django.utils import timezone as dj_timezone
+
+from bilans.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, lire_date
+from medicaments.models import Medicament
+
+VALEURS_VRAIES = ('1', 'true', 'oui')
+VALEURS_FAUSSES = ('0', 'false', 'non')
+
+
+def filtrer_ordonnances(queryset, params):
+    """
+    Applique en SQL les filtres 'date' (consultations après cette date) et 'active'.
+    Une ordonnance est active si l'un de ses médicaments est encore en cours aujourd'hui
+    (date de la consultation + durée du traitement) ; les médicaments dont la durée n'a
+    pas été reconnue ne rendent pas l'ordonnance active.
+    Lève ValueError si 'date' n'est pas une date valide ou si 'active' n'est pas un booléen.
+    """
+    date_debut = lire_date(params, 'date')
+    active = params.get('active', '').lower()
+
+    if date_debut:
+        queryset = queryset.filter(consultation__date__gt=date_debut)
+    if active:
+        if active not in VALEURS_VRAIES + VALEURS_FAUSSES:
+            raise ValueError("Le paramètre 'active' doit valoir true ou false.")
+        en_cours = Exists(Medicament.objects.filter(ordonnance=OuterRef('pk')).alias(
+            fin=ExpressionWrapper(OuterRef('consultation__date') + F('duree_traitement'), output_field=DateTimeField())
+        ).filter(fin__gt=datetime.combine(dj_timezone.localdate(), time.min, tzinfo=timezone.utc)))
+        queryset = queryset.filter(en_cours if active in VALEURS_VRAIES else ~en_cours)
+    return queryset
+
+
+def paginer_ordonnances(queryset, params):
+    """
+    Pagination par curseur (keyset) sur (date de la consultation, id_ordonnance), par ordre
+    chronologique. Le curseur est 'AAAA-MM-JJ:id' (dernière ordonnance de la page précédente).
+    Retourne le queryset de la page, limité à une ligne de plus que la taille demandée, et
+    cette taille : voir `fin_de_page`.
+    Lève ValueError si 'cursor' ou 'limit' ne sont pas valides.
+    """
+    cursor = params.get('cursor')
+    limit = int(params.get('limit') or DEFAULT_PAGE_SIZE)
+    if limit < 1:
+        raise ValueError("Le paramètre 'limit' doit être positif.")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    queryset = queryset.order_by('consultation__date', 'id_ordonnance')
+    if cursor:
+        date_curseur, _, id_curseur = cursor.partition(':')
+        date_curseur, id_curseur = date.fromisoformat(date_curseur), int(id_curseur)
+        queryset = queryset.filter(
+            Q(consultation__date__gt=date_curseur) | Q(consultation__date=date_curseur, id_ordonnance__gt=id_curseur)
+        )
+    # On lit une ligne de plus pour savoir s'il existe une page suivante
+    return queryset[:limit + 1], limit
+
+
+def fin_de_page(ordonnances, limit):
+    """
+    Retire la ligne lue en plus et retourne (ordonnances de la page, curseur suivant ou None).
+    """
+    if len(ordonnances) <= limit:
+        return ordonnances, None
+    ordonnances = ordonnances[:limit]
+    derniere = ordonnances[-1]
+    return ordonnances, f'{derniere.consultation.date.isoformat()}:{derniere.id_ordonnance}'
@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.tokens import RoleRefreshToken
+from consultations.models import Consultation
+from DPI.models import DPI
+from medicaments.models import Medicament, duree_traitement
+from .models import Ordonnance
+
+
+@pytest.fixture
+def medecin(db):
+    return User.objects.create_user(email='m@example.com', nom='Dr M', password='x', role='medecin', specialite='other')
+
+
+@pytest.fixture
+def dpi(medecin):
+    patient = User.objects.create_user(email='p@example.com', nom='P', password='x', role='patient', specialite='other')
+    return DPI.objects.create(nss='123123123', date_naissance='1970-01-01', telephone='0600000000', adresse='A',
+                              mutuelle='M', sexe='F', patient=patient, medecin_traitant=medecin)
+
+
+@pytest.fixture
+def api_client(medecin):
+    client = APIClient()
+    client.force_authenticate(user=medecin)
+    return client
+
+
+def prescrire(dpi, medecin, il_y_a, *durees):
+    """Ordonnance d'une consultation datée d'il y a `il_y_a` jours, un médicament par durée."""
+    consultation = Consultation.objects.create(dpi=dpi, medecin=medecin, date=timezone.localdate() - timedelta(days=il_y_a))
+    ordonnance = Ordonnance.objects.create(consultation=consultation)
+    for duree in durees:
+        Medicament.objects.create(ordonnance=ordonnance, nom='Paracétamol', dose='500mg', duree=duree)
+    return ordonnance.id_ordonnance
+
+
+class TestDureeTraitement:
+    """Test suite for parsing free-text prescription durations."""
+
+    @pytest.mark.parametrize('duree, jours', [
+        ('5 jours', 5), ('5 days', 5), ('10j', 10), ('2 semaines', 14), ('1 Mois', 30), ('3', 3), ('7 j.', 7),
+        ('Pendant 5 jours', None), ('5 ans', None), ('', None), (None, None),
+    ])
+    def test_interpretation(self, duree, jours):
+        assert duree_traitement(duree) == (timedelta(days=jours) if jours is not None else None)
+
+
+@pytest.mark.django_db
+class TestGetOrdonnances:
+    """Test suite for the ordonnance listing endpoint."""
+
+    def test_nombre_de_requetes_constant(self, api_client, dpi, medecin, django_assert_num_queries):
+        for jour in range(20):
+            prescrire(dpi, medecin, jour, '5 jours', '10 jours')
+
+        # DPI, ordonnances (avec consultation et médecin), médicaments
+        with django_assert_num_queries(3):
+            response = api_client.get(reverse('get_ordonnances'), {'nss': dpi.nss})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 20
+        assert [len(ordonnance['medicaments']) for ordonnance in response.data] == [2] * 20
+        assert [ordonnance['date'] for ordonnance in response.data] == sorted(o['date'] for o in response.data)
+
+    def test_pagination_par_curseur(self, api_client, dpi, medecin, django_assert_num_queries):
+        # Plusieurs ordonnances le même jour : le curseur départage par id_ordonnance
+        attendues = [prescrire(dpi, medecin, jour // 2, '5 jours') for jour in range(7)]
+        attendues = [id_ordonnance for _, id_ordonnance in sorted(
+            (Ordonnance.objects.get(pk=id_ordonnance).consultation.date, id_ordonnance) for id_ordonnance in attendues
+        )]
+
+        lues, params = [], {'nss': dpi.nss, 'limit': 3}
+        while True:
+            with django_assert_num_queries(3):
+                page = api_client.get(reverse('get_ordonnances'), params).data
+            lues += [ordonnance['id_ordonnance'] for ordonnance in page['results']]
+            if page['next_cursor'] is None:
+                break
+            params['cursor'] = page['next_cursor']
+
+        assert lues == attendues
+
+    def test_filtre_active(self, api_client, dpi, medecin):
+        en_cours = prescrire(dpi, medecin, 3, '2 jours', '1 semaine')
+        terminee = prescrire(dpi, medecin, 10, '5 jours')
+        dernier_jour = prescrire(dpi, medecin, 4, '5 jours')
+        illisible = prescrire(dpi, medecin, 0, 'selon besoin')
+
+        actives = api_client.get(reverse('get_ordonnances'), {'nss': dpi.nss, 'active': 'true'})
+        inactives = api_client.get(reverse('get_ordonnances'), {'nss': dpi.nss, 'active': 'false'})
+
+        assert {o['id_ordonnance'] for o in actives.data} == {en_cours, dernier_jour}
+        assert {o['id_ordonnance'] for o in inactives.data} == {terminee, illisible}
+
+    @pytest.mark.parametrize('params', [{'active': 'peut-etre'}, {'date': 'abc'}, {'cursor': 'hier'}, {'limit': '0'}])
+    def test_parametres_invalides(self, api_client, dpi, params):
+        response = api_client.get(reverse('get_ordonnances'), {'nss': dpi.nss, **params})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_vue_asynchrone_identique(self, api_client, dpi, medecin):
+        for jour in range(5):
+            prescrire(dpi, medecin, jour, '3 jours')
+        params = {'nss': dpi.nss, 'active': 'true', 'limit': 2}
+
+        synchrone = api_client.get(reverse('get_ordonnances'), params)
+        token = RoleRefreshToken.for_user(medecin).access_token
+        response = Client(HTTP_AUTHORIZATION=f'Bearer {token}').get(reverse('get_ordonnances_async'), params)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == synchrone.json()
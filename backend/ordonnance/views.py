@@ -5,8 +5,9 @@ from .models import DPI, Ordonnance
 from .serializers import OrdonnanceDetailSerializer
 from DPI.permissions import IsPatientOrMedecin
 from rest_framework.decorators import permission_classes
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from backend.docs import openapi, swagger_auto_schema
+from bilans.pagination import demande_pagination, MAX_PAGE_SIZE
+from .pagination import filtrer_ordonnances, paginer_ordonnances, fin_de_page
 
  
 @swagger_auto_schema(
@@ -15,10 +16,13 @@ from drf_yasg import openapi
     manual_parameters=[
         openapi.Parameter('nss', openapi.IN_QUERY, description="Numéro de Sécurité Sociale du patient", type=openapi.TYPE_STRING, required=True),
         openapi.Parameter('date', openapi.IN_QUERY, description="Date à partir de laquelle filtrer les ordonnances", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False),
+        openapi.Parameter('active', openapi.IN_QUERY, description="Seulement les ordonnances dont un médicament est encore en cours (true) ou terminées (false)", type=openapi.TYPE_BOOLEAN, required=False),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Curseur renvoyé par la page précédente (active la pagination)", type=openapi.TYPE_STRING, required=False),
+        openapi.Parameter('limit', openapi.IN_QUERY, description=f"Taille de page (active la pagination, max {MAX_PAGE_SIZE})", type=openapi.TYPE_INTEGER, required=False),
     ],
     responses={
-        200: OrdonnanceDetailSerializer,
-        400: "Le champ NSS est obligatoire.",
+        200: OrdonnanceDetailSerializer(many=True),
+        400: "Le champ NSS est obligatoire, ou paramètres invalides.",
         404: "DPI non trouvé avec ce NSS."
     }
 )
@@ -26,31 +30,39 @@ from drf_yasg import openapi
 @permission_classes([IsPatientOrMedecin])
 def get_ordonnances(request):
     """
-    Récupérer les ordonnances d'un patient à partir de son NSS.
+    Récupérer les ordonnances d'un patient à partir de son NSS, par ordre chronologique.
+    Paginées par curseur si 'cursor' ou 'limit' est fourni.
     Accessible aux médecins et aux patients.
     """
    
-    nss = request.query_params.get('nss')
-    date = request.query_params.get('date')
+    params = request.query_params
+    nss = params.get('nss')
 
     if not nss:
         return Response({'detail': 'Le champ NSS est obligatoire.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        # Récupérer le DPI
-        dpi = DPI.objects.get(nss=nss)
-    except DPI.DoesNotExist:
+    if not DPI.visibles.filter(nss=nss).exists():
         return Response({'detail': 'DPI non trouvé avec ce NSS.'}, status=status.HTTP_404_NOT_FOUND)
 
-    # Filtrer les ordonnances par NSS et éventuellement par date
-    ordonnances = Ordonnance.objects.filter(
-        consultation__dpi=dpi
-    ).select_related('consultation__medecin')
+    # Filtrer les ordonnances par NSS, date et état en SQL ; médicaments chargés en une requête
+    ordonnances = Ordonnance.visibles.filter(
+        consultation__dpi=nss
+    ).select_related('consultation__medecin').prefetch_related('medicaments')
+
+    try:
+        ordonnances = filtrer_ordonnances(ordonnances, params)
+    except ValueError as erreur:
+        return Response({'detail': str(erreur)}, status=status.HTTP_400_BAD_REQUEST)
 
-    if date:
-        ordonnances = ordonnances.filter(consultation__date__gt=date)
+    if demande_pagination(params):
+        try:
+            page, limit = paginer_ordonnances(ordonnances, params)
+        except ValueError:
+            return Response({'detail': "Le curseur doit être de la forme 'AAAA-MM-JJ:id' et 'limit' un entier positif."}, status=status.HTTP_400_BAD_REQUEST)
+        ordonnances, next_cursor = fin_de_page(list(page), limit)
+        serializer = OrdonnanceDetailSerializer(ordonnances, many=True)
+        return Response({'results': serializer.data, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
 
-    # Sérialiser les données
-    serializer = OrdonnanceDetailSerializer(ordonnances, many=True)
+    serializer = OrdonnanceDetailSerializer(ordonnances.order_by('consultation__date', 'id_ordonnance'), many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
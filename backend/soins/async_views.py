@@ -0,0 +1,18 @@
+from rest_framework import status
+
+from accounts.async_api import async_api_view, reponse_json
+from DPI.models import DPI
+from .models import Soin
+from .serializers import PROJECTION_SOINS
+from .permissions import IsPatientOrMedecinOrInfirmier
+
+
+@async_api_view([IsPatientOrMedecinOrInfirmier])
+async def get_soins_par_dpi_async(request, dpi_id):
+    """
+    Version asynchrone de get_soins_par_dpi (ORM asynchrone, déploiement ASGI).
+    """
+    if not await DPI.visibles.filter(nss=dpi_id).aexists():
+        return reponse_json({'detail': 'DPI spécifié introuvable.'}, status.HTTP_404_NOT_FOUND)
+
+    return reponse_json(await PROJECTION_SOINS.adonnees(Soin.objects.filter(dpi_id=dpi_id)))
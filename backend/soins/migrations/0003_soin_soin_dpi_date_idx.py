@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DPI', '0007_alter_dpi_medecin_traitant'),
+        ('soins', '0002_alter_soin_infirmier'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='soin',
+            index=models.Index(fields=['dpi', 'date'], name='soin_dpi_date_idx'),
+        ),
+    ]
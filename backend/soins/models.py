@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings  # Pour utiliser AUTH_USER_MODEL
 from DPI.models import DPI  # Assurez-vous d'importer le modèle DPI
+from backend.suppression import VisiblesManager
 
 class Soin(models.Model):
     """
@@ -13,5 +14,13 @@ class Soin(models.Model):
     dpi = models.ForeignKey(DPI, on_delete=models.CASCADE, related_name='soins')  # Relation avec DPI (OneToMany)
     infirmier = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='soins_realises',limit_choices_to={'role': 'infirmier'})  # Relation avec l'utilisateur infirmier
 
+    objects = models.Manager()
+    visibles = VisiblesManager('dpi__supprime_le')  # Soins des DPI non supprimés
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dpi', 'date'], name='soin_dpi_date_idx'),
+        ]
+
     def __str__(self):
         return f"Soin {self.id_soin} pour DPI {self.dpi.id} par infirmier {self.infirmier.username}"
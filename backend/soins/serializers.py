@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from backend.projections import Projection
 from .models import Soin
 
 class SoinSerializer(serializers.ModelSerializer):
@@ -12,6 +13,20 @@ class SoinSerializer(serializers.ModelSerializer):
             'observations': {'allow_null': True},  # Autoriser null pour observations
         }
 
+
+class SoinTourneeSerializer(serializers.Serializer):
+    """
+    Validation d'un soin d'une tournée (ajouterSoinsEnLot).
+    Les DPI référencés sont vérifiés par la vue, en une requête pour toute la tournée.
+    """
+    dpi = serializers.IntegerField()
+    soins = serializers.CharField(max_length=255)
+    observations = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+# Mêmes données que SoinSerializer, lues sans instancier les soins (listes en lecture seule)
+PROJECTION_SOINS = Projection.depuis_serializer(SoinSerializer)
+
 class SoinDetailSerializer(serializers.ModelSerializer):
     infirmier = serializers.StringRelatedField()  # Affiche le nom de l'infirmier (ou tout autre champ)
 
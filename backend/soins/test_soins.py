@@ -1,4 +1,5 @@
 import pytest
+from django.test import Client
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -6,6 +7,7 @@ from django.contrib.auth import get_user_model
 from datetime import datetime
 
 from DPI.models import DPI
+from accounts.tokens import RoleRefreshToken
 from .models import Soin
 
 User = get_user_model()
@@ -133,6 +135,75 @@ class TestAjouterSoins:
         assert response.data['detail'] == 'DPI spécifié introuvable.'
 
 
+@pytest.mark.django_db
+class TestAjouterSoinsEnLot:
+    """Test suite for the ajouterSoinsEnLot view."""
+
+    def test_tournee_complete(self, api_client, infirmier_user, dpi, django_assert_num_queries):
+        """
+        Toute une tournée est enregistrée avec un nombre de requêtes indépendant de sa taille.
+        """
+        api_client.force_authenticate(user=infirmier_user)
+        data = {'soins': [{'dpi': dpi.nss, 'soins': f'Soin {i}', 'observations': None} for i in range(60)]}
+
+        # Vérification des NSS, puis INSERT dans une transaction (SAVEPOINT / RELEASE)
+        with django_assert_num_queries(4) as requetes:
+            response = api_client.post(reverse('ajouter-soins-lot'), data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['crees'] == 60 and response.data['erreurs'] == 0
+        assert len([r for r in requetes.captured_queries if r['sql'].startswith('INSERT')]) == 1
+        soins = Soin.objects.order_by('id_soin')
+        assert response.data['resultats'] == [{'index': i, 'statut': 'cree'} for i in range(60)]
+        assert [soin.soins for soin in soins] == [f'Soin {i}' for i in range(60)]
+        assert {soin.infirmier_id for soin in soins} == {infirmier_user.id}
+        assert {soin.date for soin in soins} == {datetime.now().date()}
+
+    def test_resultats_par_soin(self, api_client, infirmier_user, dpi):
+        """
+        Les soins valides sont enregistrés, les autres renvoyés avec leurs erreurs, dans l'ordre.
+        """
+        api_client.force_authenticate(user=infirmier_user)
+        data = {'soins': [
+            {'dpi': dpi.nss, 'soins': 'Pansement'},
+            {'dpi': 999999999, 'soins': 'Injection'},
+            {'dpi': dpi.nss},
+            {'dpi': dpi.nss, 'soins': 'Perfusion', 'observations': 'RAS'},
+        ]}
+
+        response = api_client.post(reverse('ajouter-soins-lot'), data, format='json')
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert response.data['crees'] == 2 and response.data['erreurs'] == 2
+        assert [r['statut'] for r in response.data['resultats']] == ['cree', 'erreur', 'erreur', 'cree']
+        assert 'dpi' in response.data['resultats'][1]['erreurs']
+        assert 'soins' in response.data['resultats'][2]['erreurs']
+        assert list(Soin.objects.order_by('id_soin').values_list('soins', flat=True)) == ['Pansement', 'Perfusion']
+
+    def test_aucun_soin_valide(self, api_client, infirmier_user):
+        api_client.force_authenticate(user=infirmier_user)
+
+        response = api_client.post(reverse('ajouter-soins-lot'), {'soins': [{'dpi': 999999999, 'soins': 'Injection'}]}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Soin.objects.count() == 0
+
+    @pytest.mark.parametrize('data', [{}, {'soins': []}, {'soins': 'Pansement'}])
+    def test_liste_obligatoire(self, api_client, infirmier_user, data):
+        api_client.force_authenticate(user=infirmier_user)
+
+        response = api_client.post(reverse('ajouter-soins-lot'), data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_reserve_aux_infirmiers(self, api_client, patient_user, dpi):
+        api_client.force_authenticate(user=patient_user)
+
+        response = api_client.post(reverse('ajouter-soins-lot'), {'soins': [{'dpi': dpi.nss, 'soins': 'Pansement'}]}, format='json')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
 @pytest.mark.django_db
 class TestSupprimerSoin:
     """Test suite for the supprimerSoin view."""
@@ -166,3 +237,42 @@ class TestSupprimerSoin:
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert response.data['detail'] == 'Soin introuvable.'
+
+
+@pytest.mark.django_db
+class TestGetSoinsParDPIAsync:
+    """Test suite for the asynchronous get_soins_par_dpi_async view."""
+
+    def test_get_soins_par_dpi_async_success(self, api_client, infirmier_user, dpi):
+        """
+        La version asynchrone renvoie les mêmes données que la vue synchrone.
+        """
+        Soin.objects.create(
+            date=datetime.now(),
+            soins='Test soin',
+            observations='Test observation',
+            dpi=dpi,
+            infirmier=infirmier_user
+        )
+        api_client.force_authenticate(user=infirmier_user)
+        synchrone = api_client.get(reverse('get_soins_par_dpi', args=[dpi.nss]))
+
+        token = RoleRefreshToken.for_user(infirmier_user).access_token
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.get(reverse('get_soins_par_dpi_async', args=[dpi.nss]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == synchrone.json()
+
+    def test_get_soins_par_dpi_async_not_authenticated(self, dpi):
+        response = Client().get(reverse('get_soins_par_dpi_async', args=[dpi.nss]))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_get_soins_par_dpi_async_not_found(self, infirmier_user):
+        token = RoleRefreshToken.for_user(infirmier_user).access_token
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = client.get(reverse('get_soins_par_dpi_async', args=['999999999']))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()['detail'] == 'DPI spécifié introuvable.'
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     # Endpoint pour ajouter un soin
     path('ajouter/', views.ajouterSoins, name='ajouter-soins'),
+    # Endpoint pour enregistrer les soins d'une tournée en une requête
+    path('ajouter-lot/', views.ajouterSoinsEnLot, name='ajouter-soins-lot'),
     path('supprimer/<int:soin_id>/', views.supprimerSoin, name='supprimer_soin'),
     path('dpi/<int:dpi_id>/', views.get_soins_par_dpi, name='get_soins_par_dpi'),  # Modification ici
 ]
@@ -3,11 +3,14 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import Soin
 from DPI.models import DPI
-from .serializers import SoinSerializer
+from .serializers import SoinSerializer, SoinTourneeSerializer, PROJECTION_SOINS
 from .permissions import IsInfirmier ,IsPatientOrMedecinOrInfirmier
 from datetime import datetime
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from django.db import transaction
+from backend.docs import openapi, swagger_auto_schema
+
+# Nombre maximal de soins acceptés par appel à ajouterSoinsEnLot
+TAILLE_MAX_TOURNEE = 500
 
 
 @swagger_auto_schema(
@@ -28,14 +31,12 @@ def get_soins_par_dpi(request, dpi_id):
     Récupérer tous les soins pour un DPI spécifique, en utilisant l'ID du DPI.
     Accessible uniquement aux infirmiers.
     """
-    try:
-        dpi = DPI.objects.get(nss=dpi_id)  # Récupérer le DPI par son ID (int)
-    except DPI.DoesNotExist:
+    if not DPI.visibles.filter(nss=dpi_id).exists():
         return Response({'detail': 'DPI spécifié introuvable.'}, status=status.HTTP_404_NOT_FOUND)
-    
-    soins = Soin.objects.filter(dpi=dpi)  # Récupérer tous les soins associés au DPI
-    serializer = SoinSerializer(soins, many=True)  # Sérialiser les soins
-    return Response(serializer.data, status=status.HTTP_200_OK)
+
+    # Soins associés au DPI, lus colonne par colonne (mêmes données que SoinSerializer)
+    soins = PROJECTION_SOINS.donnees(Soin.objects.filter(dpi_id=dpi_id))
+    return Response(soins, status=status.HTTP_200_OK)
 
 
 @swagger_auto_schema(
@@ -62,7 +63,7 @@ def ajouterSoins(request):
         data['date'] = datetime.now().strftime('%Y-%m-%d')
         # Valider que le DPI existe
         dpi_id = data.get('dpi', None)
-        if not DPI.objects.filter(nss=dpi_id).exists():
+        if not DPI.visibles.filter(nss=dpi_id).exists():
             return Response({'detail': 'DPI spécifié introuvable.'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Sérialisation et création
@@ -74,6 +75,94 @@ def ajouterSoins(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@swagger_auto_schema(
+    method='post',
+    operation_description=(
+        "Enregistrer en une seule requête les soins d'une tournée. Chaque soin est validé séparément : "
+        "les soins valides sont enregistrés ensemble, les autres sont renvoyés avec leurs erreurs. "
+        "Accessible uniquement aux infirmiers."
+    ),
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['soins'],
+        properties={
+            'soins': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                description=f"Soins de la tournée ({TAILLE_MAX_TOURNEE} au plus)",
+                items=openapi.Items(type=openapi.TYPE_OBJECT, properties={
+                    'dpi': openapi.Schema(type=openapi.TYPE_INTEGER, description="NSS du patient"),
+                    'soins': openapi.Schema(type=openapi.TYPE_STRING),
+                    'observations': openapi.Schema(type=openapi.TYPE_STRING),
+                })
+            ),
+        },
+    ),
+    responses={
+        201: "Tous les soins ont été enregistrés",
+        207: "Une partie des soins a été enregistrée (voir 'resultats')",
+        400: "Aucun soin valide, ou liste absente ou trop longue",
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsInfirmier])
+def ajouterSoinsEnLot(request):
+    """
+    Enregistrer les soins d'une tournée en un seul aller-retour : les NSS sont vérifiés en une
+    requête, les soins valides insérés par un seul bulk_create dans une transaction. La réponse
+    donne, dans l'ordre de la requête, le résultat de chaque soin ('cree' ou 'erreur'), sans
+    id_soin : MySQL ne renvoie pas les clés primaires d'un INSERT multiple.
+    Accessible uniquement aux infirmiers.
+    """
+    soins_data = request.data.get('soins') if isinstance(request.data, dict) else None
+    if not isinstance(soins_data, list) or not soins_data:
+        return Response({'detail': "Le champ 'soins' doit être une liste non vide."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(soins_data) > TAILLE_MAX_TOURNEE:
+        return Response({'detail': f"Une tournée ne peut pas dépasser {TAILLE_MAX_TOURNEE} soins."}, status=status.HTTP_400_BAD_REQUEST)
+
+    resultats = [None] * len(soins_data)
+    valides = {}  # index -> données validées
+    for index, item in enumerate(soins_data):
+        serializer = SoinTourneeSerializer(data=item)
+        if serializer.is_valid():
+            valides[index] = serializer.validated_data
+        else:
+            resultats[index] = {'index': index, 'statut': 'erreur', 'erreurs': serializer.errors}
+
+    # Vérifier tous les DPI référencés avec une seule requête
+    nss_existants = set(
+        DPI.visibles.filter(nss__in={item['dpi'] for item in valides.values()}).values_list('nss', flat=True)
+    )
+    for index, item in list(valides.items()):
+        if item['dpi'] not in nss_existants:
+            resultats[index] = {'index': index, 'statut': 'erreur', 'erreurs': {'dpi': [f"DPI {item['dpi']} introuvable."]}}
+            del valides[index]
+
+    if valides:
+        aujourd_hui = datetime.now().date()
+        with transaction.atomic():
+            Soin.objects.bulk_create([
+                Soin(
+                    date=aujourd_hui,
+                    soins=item['soins'],
+                    observations=item.get('observations'),
+                    dpi_id=item['dpi'],
+                    infirmier_id=request.user.id,
+                )
+                for item in valides.values()
+            ])
+        for index in valides:
+            resultats[index] = {'index': index, 'statut': 'cree'}
+
+    crees = len(valides)
+    if crees == len(soins_data):
+        code = status.HTTP_201_CREATED
+    elif crees:
+        code = status.HTTP_207_MULTI_STATUS
+    else:
+        code = status.HTTP_400_BAD_REQUEST
+    return Response({'crees': crees, 'erreurs': len(soins_data) - crees, 'resultats': resultats}, status=code)
+
+
 @api_view(['DELETE'])
 @permission_classes([IsInfirmier])
 def supprimerSoin(request, soin_id):
@@ -82,7 +171,7 @@ def supprimerSoin(request, soin_id):
     Accessible uniquement aux infirmiers.
     """
     try:
-        soin = Soin.objects.get(id_soin=soin_id)
+        soin = Soin.visibles.get(id_soin=soin_id)
     except Soin.DoesNotExist:
         return Response({'detail': 'Soin introuvable.'}, status=status.HTTP_404_NOT_FOUND)
     